@@ -8,5 +8,24 @@ module.exports = {
     watch: false,
     max_restarts: 10,
     restart_delay: 5000
+  }, {
+    name: "hyperliquid-optimizer",
+    script: "learning/optimizer.py",
+    cwd: "./src",
+    interpreter: "C:\\Users\\藤田　洋平\\AppData\\Local\\Programs\\Python\\Python313\\python.exe",
+    autorestart: true,
+    watch: false,
+    max_restarts: 10,
+    restart_delay: 5000
+  }, {
+    name: "hyperliquid-funding",
+    script: "data/funding_store.py",
+    args: "collect",
+    cwd: "./src",
+    interpreter: "C:\\Users\\藤田　洋平\\AppData\\Local\\Programs\\Python\\Python313\\python.exe",
+    autorestart: true,
+    watch: false,
+    max_restarts: 10,
+    restart_delay: 5000
   }]
 };
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Dashboard Server - Polls every account once and pushes diffs to browsers over SSE
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from typing import Dict, Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data.hyperliquid_client import HyperliquidClient
+from data.equity_store import EquityStore
+
+log = logging.getLogger("dashboard")
+
+CONFIG_FILE = Path(__file__).parent.parent / "config" / "dashboard.json"
+DASHBOARD_HTML = Path(__file__).parent.parent.parent / "hl-dashboard" / "index.html"
+USER_HOME = os.environ.get("USERPROFILE", "C:\\Users\\Default")
+RISK_GATE_FILE = Path(USER_HOME) / "clawd/memory/hyperliquid/risk-gate.json"
+
+
+UNCHANGED = object()  # diff() result when nothing changed (None is a real value: null deletes the key)
+
+
+def diff(old: Any, new: Any) -> Any:
+    """JSON merge-patch (RFC 7386) turning `old` into `new`; UNCHANGED when equal"""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return UNCHANGED if old == new else new
+    patch = {}
+    for key in old.keys() - new.keys():
+        patch[key] = None
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+            continue
+        sub = diff(old[key], value)
+        if sub is not UNCHANGED:
+            patch[key] = sub
+    return patch or UNCHANGED
+
+
+def summarize_account(account: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a clearinghouseState response to what the dashboard renders"""
+    balance = float(state.get("marginSummary", {}).get("accountValue", 0))
+    principal = account.get("principal", 0)
+    positions = {}
+    for item in state.get("assetPositions", []):
+        pos = item.get("position", {})
+        size = float(pos.get("szi", 0))
+        if size == 0:
+            continue
+        positions[pos["coin"]] = {
+            "size": size,
+            "entry": float(pos.get("entryPx") or 0),
+            "unrealized_pnl": float(pos.get("unrealizedPnl", 0)),
+        }
+    pnl = balance - principal
+    return {
+        "name": account["name"],
+        "principal": principal,
+        "balance": balance,
+        "pnl": pnl,
+        "pnl_pct": pnl / principal * 100 if principal else 0.0,
+        "unrealized_pnl": sum(p["unrealized_pnl"] for p in positions.values()),
+        "positions": positions,
+    }
+
+
+def _append_equity(samples: List[tuple]):
+    for store, t_ms, equity, pnl in samples:
+        try:
+            store.append(t_ms, equity, pnl)
+        except OSError as e:
+            log.error(f"Equity history write failed: {e}")
+
+
+class DashboardState:
+    """Single upstream poller + cached aggregate + fan-out to SSE subscribers"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.accounts: List[Dict[str, Any]] = config["accounts"]
+        self.poll_interval = config.get("poll_interval", 5)
+        self.idle_poll_interval = config.get("idle_poll_interval", 30)
+        self.risk_gate_path = Path(config.get("risk_gate_path") or RISK_GATE_FILE)
+        self.client = HyperliquidClient()
+        self.state: Dict[str, Any] = {"accounts": {}, "order": [a["wallet"] for a in self.accounts],
+                                      "totals": {}, "risk_gate": None, "updated_at": None}
+        self.version = 0
+        self.subscribers: List[asyncio.Queue] = []
+        self.upstream_calls = 0
+        self._risk_gate_mtime = 0.0
+        self._wake = asyncio.Event()
+        # The dashboard already polls every account, so it is the one writer of their equity history
+        self.equity: Dict[str, EquityStore] = {
+            a["wallet"]: EquityStore.for_account(a["wallet"]) for a in self.accounts
+        } if config.get("equity_history", True) else {}
+        # One thread owns the equity files: appends stay in order and never interleave with reads
+        self.equity_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="equity")
+
+    # ========== Upstream ==========
+
+    async def poll_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(None, self.client.get_user_state, a["wallet"])
+                    for a in self.accounts
+                ), return_exceptions=True)
+                self.upstream_calls += len(self.accounts)
+                self.update(results)
+            except Exception as e:
+                log.error(f"Poll failed: {e}")
+            interval = self.poll_interval if self.subscribers else self.idle_poll_interval
+            self._wake.clear()
+            try:
+                # A first viewer arriving while idle triggers an immediate refresh
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def update(self, results: List[Any]):
+        accounts = dict(self.state["accounts"])
+        samples = []
+        now_ms = int(time.time() * 1000)
+        for account, result in zip(self.accounts, results):
+            if isinstance(result, Exception):
+                log.warning(f"{account['name']}: {result}")
+                continue  # Keep the last good value for this account
+            summary = summarize_account(account, result)
+            accounts[account["wallet"]] = summary
+            if account["wallet"] in self.equity:
+                samples.append((self.equity[account["wallet"]], now_ms, summary["balance"], summary["pnl"]))
+        if samples:
+            # File appends for every account in one batch, off the loop that serves the streams
+            asyncio.get_running_loop().run_in_executor(self.equity_io, _append_equity, samples)
+
+        new_state = {
+            "accounts": accounts,
+            "order": self.state["order"],
+            "totals": self._totals(accounts),
+            "risk_gate": self._read_risk_gate(),
+            "updated_at": time.time(),
+        }
+        patch = diff(self.state, new_state)
+        self.state = new_state
+        if patch is not UNCHANGED:
+            self.version += 1
+            self.publish({"version": self.version, "patch": patch})
+
+    def _totals(self, accounts: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        values = list(accounts.values())
+        principal = sum(a["principal"] for a in values)
+        pnl = sum(a["pnl"] for a in values)
+        return {
+            "balance": sum(a["balance"] for a in values),
+            "pnl": pnl,
+            "pnl_pct": pnl / principal * 100 if principal else 0.0,
+            "unrealized_pnl": sum(a["unrealized_pnl"] for a in values),
+            "positions": sum(1 for a in values if a["positions"]),
+            "accounts": len(self.accounts),
+        }
+
+    def _read_risk_gate(self) -> Optional[Dict[str, Any]]:
+        """Re-read risk-gate.json only when its mtime changes"""
+        try:
+            mtime = self.risk_gate_path.stat().st_mtime
+        except OSError:
+            return self.state.get("risk_gate")
+        if mtime != self._risk_gate_mtime:
+            try:
+                gate = json.loads(self.risk_gate_path.read_text(encoding="utf-8-sig"))
+            except (OSError, ValueError):
+                return self.state.get("risk_gate")
+            self._risk_gate_mtime = mtime
+            return {k: gate.get(k) for k in ("allowNewEntry", "emergencyClose", "lockedUntil",
+                                             "lockReason", "blockedDirection", "dangerScore",
+                                             "reasons", "updatedAt")}
+        return self.state.get("risk_gate")
+
+    # ========== Fan-out ==========
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        self.subscribers.append(queue)
+        if len(self.subscribers) == 1:
+            self._wake.set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def publish(self, message: Dict[str, Any]):
+        for queue in self.subscribers:
+            if queue.full():
+                # Slow viewer: drop its backlog, it will resync from a full snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"version": self.version, "full": self.state})
+            else:
+                queue.put_nowait(message)
+
+
+# ========== HTTP ==========
+
+async def _send(writer: asyncio.StreamWriter, status: str, content_type: str, body: bytes):
+    writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nAccess-Control-Allow-Origin: *\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+async def _stream(dashboard: DashboardState, writer: asyncio.StreamWriter):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                 b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\n")
+    queue = dashboard.subscribe()
+    try:
+        message = {"version": dashboard.version, "full": dashboard.state}
+        while True:
+            writer.write(f"data: {json.dumps(message, separators=(',', ':'))}\n\n".encode())
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                    break
+                except asyncio.TimeoutError:
+                    # Every 15s of silence, or proxies and browsers drop an idle stream
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        dashboard.unsubscribe(queue)
+
+
+async def _send_equity(dashboard: DashboardState, params: Dict[str, List[str]], writer: asyncio.StreamWriter):
+    """GET /api/equity?account=<wallet>&days=7&points=500[&resolution=1m|1h|1d|raw]"""
+    store = dashboard.equity.get(params.get("account", [""])[0])
+    if store is None:
+        await _send(writer, "404 Not Found", "text/plain", b"Unknown account")
+        return
+    resolution = params.get("resolution", [None])[0]
+    if resolution not in (None, "raw", "1m", "1h", "1d"):
+        await _send(writer, "400 Bad Request", "text/plain", b"resolution: raw, 1m, 1h or 1d")
+        return
+    try:
+        days, points = float(params.get("days", ["7"])[0]), int(params.get("points", ["500"])[0])
+    except ValueError:
+        await _send(writer, "400 Bad Request", "text/plain", b"days: number, points: integer")
+        return
+    curve = await asyncio.get_running_loop().run_in_executor(
+        dashboard.equity_io, lambda: store.curve(days=days, resolution=resolution, points=points))
+    body = json.dumps({"resolution": curve["resolution"], "t": curve["t"].tolist(),
+                       "equity": curve["equity"].tolist(), "pnl": curve["pnl"].tolist()}).encode()
+    await _send(writer, "200 OK", "application/json", body)
+
+
+async def handle(dashboard: DashboardState, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request = await reader.readuntil(b"\r\n\r\n")
+        method, path, _ = request.split(b"\r\n", 1)[0].decode().split(" ", 2)
+        path, _, query = path.partition("?")
+        if method != "GET":
+            await _send(writer, "405 Method Not Allowed", "text/plain", b"GET only")
+        elif path == "/events":
+            await _stream(dashboard, writer)
+        elif path == "/api/state":
+            body = json.dumps({"version": dashboard.version, "full": dashboard.state}).encode()
+            await _send(writer, "200 OK", "application/json", body)
+        elif path == "/api/stats":
+            body = json.dumps({"viewers": len(dashboard.subscribers),
+                               "upstream_calls": dashboard.upstream_calls,
+                               "version": dashboard.version,
+                               "client": dashboard.client.health()}).encode()
+            await _send(writer, "200 OK", "application/json", body)
+        elif path == "/api/equity":
+            await _send_equity(dashboard, parse_qs(query), writer)
+        elif path in ("/", "/index.html"):
+            await _send(writer, "200 OK", "text/html; charset=utf-8", DASHBOARD_HTML.read_bytes())
+        else:
+            await _send(writer, "404 Not Found", "text/plain", b"Not found")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(config: Dict[str, Any]):
+    dashboard = DashboardState(config)
+    server = await asyncio.start_server(lambda r, w: handle(dashboard, r, w),
+                                        config.get("host", "127.0.0.1"), config.get("port", 8765))
+    log.info(f"Dashboard on http://{config.get('host', '127.0.0.1')}:{config.get('port', 8765)}")
+    async with server:
+        await asyncio.gather(server.serve_forever(), dashboard.poll_forever())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%H:%M:%S")
+    with open(CONFIG_FILE, encoding="utf-8-sig") as f:
+        asyncio.run(serve(json.load(f)))
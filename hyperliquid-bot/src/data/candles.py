@@ -0,0 +1,211 @@
+"""
+Candle Aggregator - Builds higher-timeframe OHLCV bars from the 1m stream
+"""
+from collections import deque
+from typing import Dict, List, Optional, Iterable
+
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+}
+
+BAR_FIELDS = ("t", "o", "h", "l", "c", "v", "n")
+BASE_INTERVAL = "1m"
+DEFAULT_TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h")
+
+
+def _to_bar(candle: Dict) -> Dict:
+    """Normalize an API candle (string fields) into a float bar"""
+    return {
+        "t": int(candle["t"]),
+        "o": float(candle.get("o", candle.get("open", 0))),
+        "h": float(candle.get("h", candle.get("high", 0))),
+        "l": float(candle.get("l", candle.get("low", 0))),
+        "c": float(candle.get("c", candle.get("close", 0))),
+        "v": float(candle.get("v", candle.get("volume", 0))),
+        "n": int(candle.get("n", 0)),
+    }
+
+
+def _merge(acc: Optional[Dict], bar: Dict) -> Dict:
+    """Fold a 1m bar into an aggregate bar (returns a new dict)"""
+    if acc is None:
+        return dict(bar)
+    return {
+        "t": acc["t"],
+        "o": acc["o"],
+        "h": max(acc["h"], bar["h"]),
+        "l": min(acc["l"], bar["l"]),
+        "c": bar["c"],
+        "v": acc["v"] + bar["v"],
+        "n": acc["n"] + bar["n"],
+    }
+
+
+class CandleAggregator:
+    """Maintains closed and forming bars for every timeframe from one 1m feed.
+
+    Feed it 1m candles (closed or still forming) via ``update``. A 1m bar is
+    treated as closed once a newer one arrives; only then is it folded into
+    the higher timeframes, so each update costs O(number of timeframes).
+    """
+
+    def __init__(self, coin: str = "BTC", timeframes: Iterable[str] = DEFAULT_TIMEFRAMES,
+                 max_bars: int = 500):
+        self.coin = coin
+        self.timeframes = [tf for tf in timeframes if tf in INTERVAL_MS]
+        if BASE_INTERVAL not in self.timeframes:
+            self.timeframes.insert(0, BASE_INTERVAL)
+        self.max_bars = max_bars
+
+        self._closed: Dict[str, deque] = {tf: deque(maxlen=max_bars) for tf in self.timeframes}
+        # Aggregate of the *closed* 1m bars inside each timeframe's current bucket
+        self._partial: Dict[str, Optional[Dict]] = {tf: None for tf in self.timeframes}
+        # The 1m bar that is still forming
+        self._base_forming: Optional[Dict] = None
+        # Timeframes whose first bucket was joined midway: that bar is never emitted as closed
+        self._incomplete: Dict[str, bool] = {tf: False for tf in self.timeframes}
+
+    # ========== Ingest ==========
+
+    def update(self, candle: Dict) -> List[str]:
+        """Ingest one 1m candle. Returns the timeframes that closed a bar."""
+        bar = _to_bar(candle)
+        forming = self._base_forming
+
+        if forming is None or bar["t"] > forming["t"]:
+            closed = self._close_base(forming) if forming else []
+            self._base_forming = bar
+            return closed
+
+        if bar["t"] == forming["t"]:
+            self._base_forming = bar
+        # Older bars were already folded in; ignore replays
+        return []
+
+    def update_many(self, candles: Iterable[Dict]) -> List[str]:
+        """Ingest a batch of 1m candles (e.g. a candleSnapshot response)"""
+        closed = []
+        for candle in sorted(candles, key=lambda c: int(c["t"])):
+            for tf in self.update(candle):
+                if tf not in closed:
+                    closed.append(tf)
+        return closed
+
+    def _close_base(self, bar: Dict) -> List[str]:
+        """Fold a finished 1m bar into every timeframe"""
+        closed = []
+        for tf in self.timeframes:
+            width = INTERVAL_MS[tf]
+            bucket = bar["t"] - bar["t"] % width
+            partial = self._partial[tf]
+
+            if partial is not None and partial["t"] != bucket:
+                self._close(tf, partial, closed)
+                partial = None
+
+            if partial is None:
+                if not self._closed[tf] and bar["t"] != bucket:
+                    self._incomplete[tf] = True
+                partial = dict(bar, t=bucket)
+            else:
+                partial = _merge(partial, bar)
+
+            if bar["t"] + INTERVAL_MS[BASE_INTERVAL] >= bucket + width:
+                # Last minute of the bucket: the bar is complete now
+                self._close(tf, partial, closed)
+                partial = None
+            self._partial[tf] = partial
+        return closed
+
+    def _close(self, tf: str, bar: Dict, closed: List[str]):
+        if self._incomplete[tf]:
+            self._incomplete[tf] = False  # Missed the start of this bucket: dropped
+            return
+        self._closed[tf].append(bar)
+        closed.append(tf)
+
+    # ========== Read ==========
+
+    def forming(self, interval: str) -> Optional[Dict]:
+        """Current (incomplete) bar for a timeframe, including the forming 1m bar"""
+        if interval not in self._partial:
+            raise ValueError(f"Unknown timeframe: {interval}")
+        partial = self._partial[interval]
+        base = self._base_forming
+        if base is None:
+            return self._format(partial, interval) if partial else None
+
+        width = INTERVAL_MS[interval]
+        bucket = base["t"] - base["t"] % width
+        if partial is not None and partial["t"] == bucket:
+            return self._format(_merge(partial, base), interval)
+        return self._format(dict(base, t=bucket), interval)
+
+    def get_candles(self, interval: str, limit: int = 100,
+                    include_forming: bool = True) -> List[Dict]:
+        """Candles in candleSnapshot shape, oldest first"""
+        if interval not in self._closed:
+            raise ValueError(f"Unknown timeframe: {interval}")
+        closed = self._closed[interval]
+        take = limit - 1 if include_forming else limit
+        bars = [self._format(b, interval) for b in list(closed)[-take:]] if take > 0 else []
+        if include_forming:
+            current = self.forming(interval)
+            if current:
+                bars.append(current)
+        return bars[-limit:]
+
+    def snapshot(self, limit: int = 100, include_forming: bool = True) -> Dict[str, List[Dict]]:
+        """Candles for every timeframe"""
+        return {tf: self.get_candles(tf, limit, include_forming) for tf in self.timeframes}
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Open time (ms) of the latest 1m bar seen"""
+        return self._base_forming["t"] if self._base_forming else None
+
+    # ========== Snapshot ==========
+
+    def to_state(self) -> Dict:
+        """Compact state (bars as rows) for warm restarts"""
+        row = lambda b: [b[k] for k in BAR_FIELDS] if b else None
+        return {
+            "coin": self.coin,
+            "closed": {tf: [row(b) for b in bars] for tf, bars in self._closed.items()},
+            "partial": {tf: row(b) for tf, b in self._partial.items()},
+            "forming": row(self._base_forming),
+            "incomplete": [tf for tf, flag in self._incomplete.items() if flag],
+        }
+
+    def load_state(self, state: Dict) -> None:
+        bar = lambda r: dict(zip(BAR_FIELDS, r)) if r else None
+        for tf in self.timeframes:
+            self._closed[tf] = deque((bar(r) for r in state.get("closed", {}).get(tf, [])),
+                                     maxlen=self.max_bars)
+            self._partial[tf] = bar(state.get("partial", {}).get(tf))
+            self._incomplete[tf] = tf in state.get("incomplete", [])
+        self._base_forming = bar(state.get("forming"))
+
+    def _format(self, bar: Dict, interval: str) -> Dict:
+        return {
+            "t": bar["t"],
+            "T": bar["t"] + INTERVAL_MS[interval] - 1,
+            "s": self.coin,
+            "i": interval,
+            "o": bar["o"],
+            "h": bar["h"],
+            "l": bar["l"],
+            "c": bar["c"],
+            "v": bar["v"],
+            "n": bar["n"],
+        }
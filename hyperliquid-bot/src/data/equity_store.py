@@ -0,0 +1,293 @@
+"""
+Equity Store - Per-account equity / PnL history as raw samples plus 1m, 1h and 1d rollups
+"""
+import os
+import sys
+import time
+import struct
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger("bot")
+
+EQUITY_DIR = Path(__file__).parent.parent.parent / "state" / "equity"
+
+RAW = np.dtype([("t", "<i8"), ("equity", "<f8"), ("pnl", "<f8")])
+# One rollup bucket; count = 0 marks a bucket with no samples (bot or dashboard down)
+BAR = np.dtype([("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                ("pnl", "<f8"), ("count", "<i8")])
+TIERS: Dict[str, int] = {"1m": 60_000, "1h": 3_600_000, "1d": 86_400_000}
+
+MAGIC = b"HLEQ"
+VERSION = 1
+PREFIX = struct.Struct("<4sH2xq")      # magic, version, index of the file's first bucket
+
+
+# ========== Decimation ==========
+
+def lttb(t: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Largest-triangle-three-buckets: indices of `points` samples that keep the curve's shape.
+
+    Unlike striding it keeps every spike and drawdown bottom that dominates its
+    bucket, and the first and last samples are always kept.
+    """
+    n = len(t)
+    if points >= n or points < 3:
+        return np.arange(n)
+    t, y = t.astype(float), y.astype(float)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        avg_t, avg_y = t[nxt].mean(), y[nxt].mean()
+        area = np.abs((t[a] - avg_t) * (y[lo:hi] - y[a]) - (t[a] - t[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+# ========== Tiers ==========
+
+class _Tier:
+    """Dense file of BAR rows, row i = bucket (origin + i) of `width` ms.
+
+    A bucket's position follows from its time, so reading any window is a
+    seek plus one contiguous read. The bucket being filled is rewritten on
+    every sample, so a restart resumes it from disk.
+    """
+
+    def __init__(self, path: Path, width: int):
+        self.path = path
+        self.width = width
+        self.origin: Optional[int] = None
+        self._index = -1
+        self._bar = np.zeros(1, BAR)[0]
+        if path.exists():
+            with open(path, "rb") as f:
+                magic, version, origin = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path.name}: not an equity tier")
+            self.origin = origin
+
+    def _offset(self, index: int) -> int:
+        return PREFIX.size + (index - self.origin) * BAR.itemsize
+
+    def add(self, t_ms: int, equity: float, pnl: float):
+        index = t_ms // self.width
+        if self.origin is None:
+            with open(self.path, "wb") as f:
+                f.write(PREFIX.pack(MAGIC, VERSION, index))
+            self.origin = index
+        if index < max(self.origin, self._index):
+            return  # Older than the bucket being filled: only the raw tier keeps it
+        if index != self._index:
+            self._index = index
+            stored = self._read(index, index + 1)
+            self._bar = stored[0] if len(stored) else np.zeros(1, BAR)[0]
+        bar = self._bar
+        if bar["count"]:
+            bar["high"], bar["low"] = max(bar["high"], equity), min(bar["low"], equity)
+        else:
+            bar["open"] = bar["high"] = bar["low"] = equity
+        bar["close"], bar["pnl"], bar["count"] = equity, pnl, bar["count"] + 1
+        with open(self.path, "r+b") as f:
+            f.seek(self._offset(index))   # Past the end leaves a zero-filled (count 0) gap
+            f.write(bar.tobytes())
+
+    def _read(self, start: int, end: int) -> np.ndarray:
+        """Rows for buckets [start, end) that exist in the file"""
+        if self.origin is None:
+            return np.zeros(0, BAR)
+        stored = (self.path.stat().st_size - PREFIX.size) // BAR.itemsize
+        start, end = max(start, self.origin), min(end, self.origin + stored)
+        if end <= start:
+            return np.zeros(0, BAR)
+        return np.fromfile(self.path, BAR, count=end - start, offset=self._offset(start))
+
+    def read(self, start_ms: int, end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(bucket start times, bars) overlapping [start_ms, end_ms], empty buckets dropped"""
+        first = start_ms // self.width
+        rows = self._read(first, end_ms // self.width + 1)
+        if self.origin is not None:
+            first = max(first, self.origin)
+        times = (first + np.arange(len(rows), dtype=np.int64)) * self.width
+        filled = rows["count"] > 0
+        return times[filled], rows[filled]
+
+
+# ========== Store ==========
+
+class EquityStore:
+    """One account's equity curve: raw samples in one file per UTC day (pruned after
+    `raw_days`), and one _Tier per rollup resolution kept forever (about 17MB a
+    year at 1m). Queries read only the rows of the window they ask for.
+    """
+
+    def __init__(self, root: Path, raw_days: int = 3, max_rows: int = 5000):
+        self.root = Path(root)
+        self.raw_days = raw_days
+        self.max_rows = max_rows
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "raw").mkdir(exist_ok=True)
+        self.tiers = {name: _Tier(self.root / f"{name}.bin", width) for name, width in TIERS.items()}
+        self._raw_day = ""
+
+    @classmethod
+    def for_account(cls, account: str, root: Path = EQUITY_DIR, **kwargs) -> "EquityStore":
+        return cls(Path(root) / account, **kwargs)
+
+    # ========== Writing ==========
+
+    def append(self, t_ms: int, equity: float, pnl: float = 0.0):
+        """One account sample (ms timestamp, account value, PnL)"""
+        t_ms = int(t_ms)
+        day = _day(t_ms)
+        with open(self.root / "raw" / f"{day}.bin", "ab") as f:
+            f.write(np.array([(t_ms, equity, pnl)], RAW).tobytes())
+        if day != self._raw_day:
+            self._raw_day = day
+            self._prune(t_ms)
+        for tier in self.tiers.values():
+            tier.add(t_ms, equity, pnl)
+
+    def _prune(self, t_ms: int):
+        oldest = _day(t_ms - self.raw_days * TIERS["1d"])
+        for path in (self.root / "raw").glob("*.bin"):
+            if path.stem < oldest:
+                os.remove(path)
+
+    # ========== Reading ==========
+
+    def raw(self, start_ms: int, end_ms: int) -> np.ndarray:
+        """RAW samples in [start_ms, end_ms] (only the last `raw_days` are kept)"""
+        parts = []
+        for path in sorted((self.root / "raw").glob("*.bin")):
+            day_start = int(datetime.strptime(path.stem, "%Y%m%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+            if day_start <= end_ms and day_start + TIERS["1d"] > start_ms:
+                # A torn last record after a crash is cut off
+                size = path.stat().st_size // RAW.itemsize
+                parts.append(np.fromfile(path, RAW, count=size))
+        if not parts:
+            return np.zeros(0, RAW)
+        samples = np.concatenate(parts)
+        return samples[(samples["t"] >= start_ms) & (samples["t"] <= end_ms)]
+
+    def bars(self, resolution: str, start_ms: int, end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(bucket start times, BAR rows) of one rollup tier"""
+        return self.tiers[resolution].read(start_ms, end_ms)
+
+    def resolution_for(self, start_ms: int, end_ms: int) -> str:
+        """Finest tier that covers the window in at most max_rows buckets"""
+        for name, width in TIERS.items():
+            if (end_ms - start_ms) // width < self.max_rows:
+                return name
+        return "1d"
+
+    def curve(self, days: Optional[float] = None, start_ms: Optional[int] = None,
+              end_ms: Optional[int] = None, resolution: Optional[str] = None,
+              points: Optional[int] = None) -> Dict[str, Any]:
+        """Equity curve for a window, e.g. curve(days=30, points=500) for a chart.
+
+        Served from the rollup tier chosen by resolution_for (or `resolution`,
+        "raw" included), so the cost depends on the window, not on how much
+        history is stored. `points` decimates with lttb.
+        """
+        end_ms = int(time.time() * 1000) if end_ms is None else int(end_ms)
+        if start_ms is None:
+            start_ms = end_ms - int((days or 1) * TIERS["1d"])
+        resolution = resolution or self.resolution_for(start_ms, end_ms)
+        if resolution == "raw":
+            samples = self.raw(start_ms, end_ms)
+            t, equity, pnl = samples["t"], samples["equity"], samples["pnl"]
+        else:
+            t, rows = self.bars(resolution, start_ms, end_ms)
+            equity, pnl = rows["close"], rows["pnl"]
+        if points:
+            keep = lttb(t, equity, points)
+            t, equity, pnl = t[keep], equity[keep], pnl[keep]
+        return {"resolution": resolution, "t": t, "equity": equity, "pnl": pnl}
+
+    def summary(self, days: float = 7, end_ms: Optional[int] = None) -> Dict[str, float]:
+        """Change, range and max drawdown over the last `days`, from the hourly tier"""
+        end_ms = int(time.time() * 1000) if end_ms is None else int(end_ms)
+        _, rows = self.bars("1h", end_ms - int(days * TIERS["1d"]), end_ms)
+        if not len(rows):
+            return {}
+        # Peak before each bar's low: earlier highs plus the bar's own open
+        peak = np.maximum(np.maximum.accumulate(np.concatenate([[rows["open"][0]], rows["high"][:-1]])),
+                          rows["open"])
+        return {
+            "start": float(rows["open"][0]),
+            "end": float(rows["close"][-1]),
+            "change": float(rows["close"][-1] - rows["open"][0]),
+            "high": float(rows["high"].max()),
+            "low": float(rows["low"].min()),
+            "max_drawdown": float(max(0.0, (peak - rows["low"]).max())),
+            "pnl": float(rows["pnl"][-1]),
+        }
+
+
+def _day(t_ms: int) -> str:
+    return datetime.fromtimestamp(t_ms / 1000, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def accounts(root: Path = EQUITY_DIR) -> list:
+    """Accounts with stored history"""
+    return sorted(p.name for p in Path(root).iterdir() if p.is_dir()) if Path(root).exists() else []
+
+
+if __name__ == "__main__":
+    import argparse
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    parser = argparse.ArgumentParser(description="Query stored equity curves, or benchmark the store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    query_parser = sub.add_parser("query")
+    query_parser.add_argument("account", nargs="?", help="wallet (default: every stored account)")
+    query_parser.add_argument("--days", type=float, default=7.0)
+    query_parser.add_argument("--points", type=int, default=20)
+    bench_parser = sub.add_parser("bench")
+    bench_parser.add_argument("--days", type=int, default=365, help="history to synthesize at 1 sample/min")
+    parser.add_argument("--root", type=Path, default=EQUITY_DIR)
+    args = parser.parse_args()
+
+    if args.command == "query":
+        for account in [args.account] if args.account else accounts(args.root):
+            store = EquityStore.for_account(account, args.root)
+            summary = store.summary(args.days)
+            if not summary:
+                print(f"{account}: no data")
+                continue
+            print(f"{account}: ${summary['start']:.2f} -> ${summary['end']:.2f} ({summary['change']:+.2f}), "
+                  f"max DD ${summary['max_drawdown']:.2f}")
+            curve = store.curve(days=args.days, points=args.points)
+            for t, equity in zip(curve["t"], curve["equity"]):
+                print(f"  {datetime.fromtimestamp(t / 1000):%Y-%m-%d %H:%M}  ${equity:.2f}")
+    else:
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            store = EquityStore(Path(tmp), raw_days=1)
+            end = int(time.time() * 1000) // 60_000 * 60_000
+            times = end - np.arange(args.days * 1440, 0, -1, dtype=np.int64) * 60_000
+            equity = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.05, len(times)))
+            # Backfill the older history straight into the tiers (its raw files would be pruned anyway)
+            for t, e in zip(times[:-10_000], equity[:-10_000]):
+                for tier in store.tiers.values():
+                    tier.add(int(t), float(e), float(e - 100))
+            started = time.perf_counter()
+            for t, e in zip(times[-10_000:], equity[-10_000:]):
+                store.append(int(t), float(e), float(e - 100))
+            per_append = (time.perf_counter() - started) / 10_000 * 1e6
+            for days in (1, 7, 30, args.days):
+                started = time.perf_counter()
+                curve = store.curve(days=days, end_ms=end, points=500)
+                ms = (time.perf_counter() - started) * 1000
+                print(f"last {days:>3}d: {curve['resolution']} -> {len(curve['t'])} points in {ms:.2f}ms")
+            print(f"append: {per_append:.1f}us per sample")
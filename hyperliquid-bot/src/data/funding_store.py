@@ -0,0 +1,309 @@
+"""
+Funding Store - Funding / open interest history for every perp in a compressed columnar store
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+log = logging.getLogger("bot")
+
+FUNDING_DIR = Path(__file__).parent.parent.parent / "state" / "funding"
+
+# Stored field -> (metaAndAssetCtxs key, fixed-point scale). Values are kept as int64
+# multiples of 1/scale, which is exact for every decimal string the API returns.
+FIELDS: Dict[str, Tuple[str, float]] = {
+    "funding": ("funding", 1e10),
+    "open_interest": ("openInterest", 1e5),
+    "mark": ("markPx", 1e10),
+    "oracle": ("oraclePx", 1e10),
+    "volume": ("dayNtlVlm", 1e2),
+}
+
+MAGIC = b"HLFS"
+VERSION = 1
+PREFIX = struct.Struct("<4sHI")        # magic, version, header length
+HEAD_FILE = "head.jsonl"              # Samples not yet sealed into a block
+
+
+# ========== Column codec ==========
+
+def _encode(fixed: np.ndarray) -> bytes:
+    """int64 matrix -> delta along time, byte-shuffled, zlib"""
+    deltas = np.diff(fixed, axis=0, prepend=np.zeros((1,) + fixed.shape[1:], np.int64))
+    shuffled = np.ascontiguousarray(deltas).view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(shuffled.tobytes(), 6)
+
+
+def _decode(blob: bytes, shape: Tuple[int, ...]) -> np.ndarray:
+    shuffled = np.frombuffer(zlib.decompress(blob), np.uint8).reshape(8, -1)
+    deltas = np.ascontiguousarray(shuffled.T).view(np.int64).reshape(shape)
+    return np.cumsum(deltas, axis=0)
+
+
+def _parse(ctx: Dict[str, Any]) -> List[float]:
+    out = []
+    for key, _ in FIELDS.values():
+        try:
+            out.append(float(ctx.get(key)))
+        except (TypeError, ValueError):
+            out.append(float("nan"))
+    return out
+
+
+# ========== Blocks ==========
+
+def write_block(path: Path, times: np.ndarray, coins: List[str], values: np.ndarray):
+    """values: float64 (rows, coins, fields), NaN where a coin had no sample"""
+    missing = np.isnan(values)
+    blobs = [_encode(times.astype(np.int64).reshape(-1, 1))]
+    columns = {"time": None}
+    for i, (name, (_, scale)) in enumerate(FIELDS.items()):
+        fixed = np.round(np.where(missing[:, :, i], 0.0, values[:, :, i]) * scale).astype(np.int64)
+        blobs.append(_encode(fixed))
+        columns[name] = None
+    if missing.any():
+        blobs.append(zlib.compress(np.packbits(missing).tobytes(), 6))
+        columns["missing"] = None
+
+    offset = 0
+    for name, blob in zip(columns, blobs):
+        columns[name] = [offset, len(blob)]
+        offset += len(blob)
+    header = json.dumps({
+        "start": int(times[0]), "end": int(times[-1]), "rows": len(times), "coins": coins,
+        "fields": {name: scale for name, (_, scale) in FIELDS.items()}, "columns": columns,
+    }, separators=(",", ":")).encode("utf-8")
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_block(path: Path) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """(times int64 (rows,), coins, values float64 (rows, coins, fields))"""
+    data = path.read_bytes()
+    magic, version, header_len = PREFIX.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path.name}: not a funding block")
+    header = json.loads(data[PREFIX.size:PREFIX.size + header_len])
+    body = memoryview(data)[PREFIX.size + header_len:]
+
+    def blob(name):
+        offset, length = header["columns"][name]
+        return body[offset:offset + length]
+
+    rows, coins = header["rows"], header["coins"]
+    times = _decode(blob("time"), (rows, 1))[:, 0]
+    values = np.empty((rows, len(coins), len(FIELDS)))
+    for i, name in enumerate(FIELDS):
+        values[:, :, i] = _decode(blob(name), (rows, len(coins))) / header["fields"][name]
+    if "missing" in header["columns"]:
+        bits = np.frombuffer(zlib.decompress(blob("missing")), np.uint8)
+        values[np.unpackbits(bits, count=values.size).reshape(values.shape).astype(bool)] = np.nan
+    return times, coins, values
+
+
+# ========== Store ==========
+
+class FundingStore:
+    """Samples append to a small JSONL head; every `block_rows` samples are sealed
+    into one immutable block file named by its time range, so a query only opens
+    the blocks that overlap it. Decoded blocks are cached by name.
+    """
+
+    def __init__(self, root: Path = FUNDING_DIR, block_rows: int = 360, cache_blocks: int = 64):
+        self.root = Path(root)
+        self.block_rows = block_rows
+        self.cache_blocks = cache_blocks
+        self._cache: Dict[str, Tuple[np.ndarray, List[str], np.ndarray]] = {}
+        self._head: List[Tuple[int, Dict[str, List[float]]]] = []
+        self._head_mtime = -1.0
+        self._head_matrix = None
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def head_path(self) -> Path:
+        return self.root / HEAD_FILE
+
+    # ========== Writing ==========
+
+    def append(self, t_ms: int, contexts: Dict[str, Dict[str, Any]]):
+        """One metaAndAssetCtxs sample (see HyperliquidClient.get_asset_contexts)"""
+        row = {coin: _parse(ctx) for coin, ctx in contexts.items()}
+        head = self._read_head()
+        with open(self.head_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"t": int(t_ms), "c": row}, separators=(",", ":")) + "\n")
+        # Keep the parsed head current instead of re-reading the file
+        self._head = head + [(int(t_ms), row)]
+        self._head_mtime, self._head_matrix = self.head_path.stat().st_mtime_ns, None
+        if len(self._head) >= self.block_rows:
+            self.seal()
+
+    def seal(self):
+        """Turn the head into a block (also done automatically every block_rows samples)"""
+        head = self._read_head()
+        if not head:
+            return
+        times, coins, values = _to_matrix(head)
+        write_block(self.root / f"{times[0]:013d}-{times[-1]:013d}.blk", times, coins, values)
+        os.remove(self.head_path)
+        self._head, self._head_mtime, self._head_matrix = [], -1.0, None
+
+    def _read_head(self) -> List[Tuple[int, Dict[str, List[float]]]]:
+        try:
+            mtime = self.head_path.stat().st_mtime_ns
+        except OSError:
+            self._head, self._head_mtime, self._head_matrix = [], -1.0, None
+            return self._head
+        if mtime != self._head_mtime:
+            rows = []
+            with open(self.head_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sample = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    rows.append((sample["t"], sample["c"]))
+            self._head, self._head_mtime, self._head_matrix = rows, mtime, None
+        return self._head
+
+    # ========== Reading ==========
+
+    def blocks(self, start_ms: int = 0, end_ms: int = 2 ** 62) -> List[Path]:
+        out = []
+        for path in sorted(self.root.glob("*.blk")):
+            first, last = (int(x) for x in path.stem.split("-"))
+            if last >= start_ms and first <= end_ms:
+                out.append(path)
+        return out
+
+    def _load(self, path: Path) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        # Blocks never change once written, so the name is a sufficient cache key
+        cached = self._cache.pop(path.name, None)
+        if cached is None:
+            cached = read_block(path)
+        self._cache[path.name] = cached
+        while len(self._cache) > self.cache_blocks:
+            self._cache.pop(next(iter(self._cache)))
+        return cached
+
+    def query(self, coins: Sequence[str], start_ms: int, end_ms: int,
+              fields: Sequence[str] = tuple(FIELDS)) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Sample times (int64 ms) and {field: float64 (samples, len(coins))} aligned on them.
+
+        A coin that was not listed at some sample reads NaN there.
+        """
+        field_index = [list(FIELDS).index(f) for f in fields]
+        parts = [self._load(path) for path in self.blocks(start_ms, end_ms)]
+        if self._read_head():
+            if self._head_matrix is None:
+                self._head_matrix = _to_matrix(self._head)
+            parts.append(self._head_matrix)
+
+        times_out, values_out = [], []
+        for times, block_coins, values in parts:
+            rows = (times >= start_ms) & (times <= end_ms)
+            if not rows.any():
+                continue
+            position = {c: i for i, c in enumerate(block_coins)}
+            picked = np.full((int(rows.sum()), len(coins), len(field_index)), np.nan)
+            for j, coin in enumerate(coins):
+                if coin in position:
+                    picked[:, j, :] = values[rows, position[coin]][:, field_index]
+            times_out.append(times[rows])
+            values_out.append(picked)
+
+        if not times_out:
+            empty = np.empty((0, len(coins)))
+            return np.empty(0, np.int64), {f: empty.copy() for f in fields}
+        times = np.concatenate(times_out)
+        values = np.concatenate(values_out)
+        order = np.argsort(times, kind="stable")
+        return times[order], {f: values[order, :, i] for i, f in enumerate(fields)}
+
+    def coins(self) -> List[str]:
+        """Coins in the most recent sample"""
+        head = self._read_head()
+        if head:
+            return sorted(head[-1][1])
+        blocks = self.blocks()
+        return self._load(blocks[-1])[1] if blocks else []
+
+
+def _to_matrix(samples: List[Tuple[int, Dict[str, List[float]]]]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    coins = sorted({coin for _, row in samples for coin in row})
+    position = {c: i for i, c in enumerate(coins)}
+    values = np.full((len(samples), len(coins), len(FIELDS)), np.nan)
+    for r, (_, row) in enumerate(samples):
+        values[r, [position[c] for c in row]] = list(row.values())
+    return np.array([t for t, _ in samples], np.int64), coins, values
+
+
+# ========== Collector ==========
+
+def collect(store: FundingStore, client, interval: float = 60.0, once: bool = False):
+    """Sample every perp's context on interval boundaries (separate process, like the optimizer)"""
+    while True:
+        started = time.time()
+        try:
+            store.append(int(started * 1000), client.get_asset_contexts())
+        except Exception as e:
+            log.warning(f"Funding sample failed: {e}")
+        if once:
+            return
+        time.sleep(interval - time.time() % interval)
+
+
+if __name__ == "__main__":
+    import argparse
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+    parser = argparse.ArgumentParser(description="Collect or query funding / open interest history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("collect")
+    run_parser.add_argument("--interval", type=float, default=60.0)
+    run_parser.add_argument("--once", action="store_true")
+    query_parser = sub.add_parser("query")
+    query_parser.add_argument("coins", nargs="+")
+    query_parser.add_argument("--hours", type=float, default=24.0)
+    query_parser.add_argument("--field", choices=list(FIELDS), default="funding")
+    sub.add_parser("seal")
+    parser.add_argument("--root", type=Path, default=FUNDING_DIR)
+    args = parser.parse_args()
+
+    store = FundingStore(args.root)
+    if args.command == "collect":
+        from data.hyperliquid_client import HyperliquidClient
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+        collect(store, HyperliquidClient(), args.interval, args.once)
+    elif args.command == "seal":
+        store.seal()
+    else:
+        end = int(time.time() * 1000)
+        started = time.perf_counter()
+        times, values = store.query(args.coins, end - int(args.hours * 3600_000), end, [args.field])
+        elapsed = (time.perf_counter() - started) * 1000
+        column = values[args.field]
+        print(f"{len(times)} samples in {elapsed:.1f}ms")
+        for j, coin in enumerate(args.coins):
+            series = column[:, j]
+            series = series[~np.isnan(series)]
+            if len(series):
+                print(f"{coin:>8s} {args.field}: last={series[-1]:.6g} min={series.min():.6g} "
+                      f"max={series.max():.6g} mean={series.mean():.6g}")
+            else:
+                print(f"{coin:>8s} no data")
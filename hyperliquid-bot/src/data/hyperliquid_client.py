@@ -9,6 +9,13 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
+try:
+    from .candles import INTERVAL_MS
+    from .resilience import ResilientCaller, EndpointPolicy
+except ImportError:  # run as a script / from test_api.py
+    from candles import INTERVAL_MS
+    from resilience import ResilientCaller, EndpointPolicy
+
 load_dotenv()
 
 class HyperliquidClient:
@@ -16,18 +23,50 @@ class HyperliquidClient:
     
     BASE_URL = "https://api.hyperliquid.xyz"
     
+    # Per-endpoint budgets (all info requests are idempotent, so hedging is safe)
+    POLICIES = {
+        "allMids": EndpointPolicy(deadline=1.5),
+        "l2Book": EndpointPolicy(deadline=1.0),
+        "candleSnapshot": EndpointPolicy(deadline=3.0),
+        "meta": EndpointPolicy(deadline=3.0),
+        "metaAndAssetCtxs": EndpointPolicy(deadline=3.0),
+        "clearinghouseState": EndpointPolicy(deadline=2.0),
+        "openOrders": EndpointPolicy(deadline=2.0),
+        "userFills": EndpointPolicy(deadline=5.0),
+        "orderStatus": EndpointPolicy(deadline=2.0),
+    }
+    
     def __init__(self):
         self.wallet = os.getenv("HYPERLIQUID_WALLET_ADDRESS")
         self.secret = os.getenv("HYPERLIQUID_API_SECRET")
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
+        self.resilience = ResilientCaller(self.POLICIES)
     
     def _post_info(self, payload: dict) -> dict:
-        """POST to info endpoint"""
-        resp = self.session.post(f"{self.BASE_URL}/info", json=payload)
+        """POST to info endpoint under the endpoint's deadline/hedge/retry policy"""
+        endpoint = payload.get("type", "info")
+        return self.resilience.call(
+            endpoint, lambda timeout: self._post_raw(payload, timeout), self._retryable
+        )
+    
+    def _post_raw(self, payload: dict, timeout: float) -> dict:
+        resp = self.session.post(f"{self.BASE_URL}/info", json=payload, timeout=timeout)
         resp.raise_for_status()
         return resp.json()
     
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        """Retry network errors, 429 and 5xx; other 4xx won't get better"""
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return True
+    
+    def health(self) -> Dict[str, Any]:
+        """Circuit state and latency per endpoint"""
+        return self.resilience.health()
+    
     # ========== Read Operations ==========
     
     def get_all_mids(self) -> Dict[str, str]:
@@ -40,10 +79,12 @@ class HyperliquidClient:
         return float(mids.get("BTC", 0))
     
     def get_candles(self, coin: str = "BTC", interval: str = "1m", 
-                    limit: int = 100) -> List[Dict]:
-        """Get OHLCV candles"""
-        end_time = int(datetime.now().timestamp() * 1000)
-        start_time = end_time - (limit * 60 * 1000)  # Approximate
+                    limit: int = 100, start_time: Optional[int] = None,
+                    end_time: Optional[int] = None) -> List[Dict]:
+        """Get OHLCV candles (from start_time if given, else the last `limit`), up to end_time or now"""
+        end_time = end_time or int(datetime.now().timestamp() * 1000)
+        if start_time is None:
+            start_time = end_time - (limit * INTERVAL_MS.get(interval, 60_000))
         
         payload = {
             "type": "candleSnapshot",
@@ -57,14 +98,18 @@ class HyperliquidClient:
         return self._post_info(payload)
     
     def get_l2_book(self, coin: str = "BTC", levels: int = 5) -> Dict:
-        """Get order book"""
-        return self._post_info({"type": "l2Book", "coin": coin})
-    
-    def get_user_state(self) -> Dict:
-        """Get user's account state (positions, margin, etc)"""
-        if not self.wallet:
+        """Get order book, truncated to the top `levels` per side"""
+        book = self._post_info({"type": "l2Book", "coin": coin})
+        if levels and "levels" in book:
+            book["levels"] = [side[:levels] for side in book["levels"]]
+        return book
+    
+    def get_user_state(self, user: Optional[str] = None) -> Dict:
+        """Get account state (positions, margin, etc) for `user` or the configured wallet"""
+        user = user or self.wallet
+        if not user:
             raise ValueError("Wallet address not configured")
-        return self._post_info({"type": "clearinghouseState", "user": self.wallet})
+        return self._post_info({"type": "clearinghouseState", "user": user})
     
     def get_open_orders(self) -> List[Dict]:
         """Get user's open orders"""
@@ -78,6 +123,18 @@ class HyperliquidClient:
             raise ValueError("Wallet address not configured")
         return self._post_info({"type": "userFills", "user": self.wallet})
     
+    def get_order_status(self, oid, user: Optional[str] = None) -> Dict:
+        """Status of one order by exchange oid (int) or client order id ("0x..." hex), for `user` or the configured wallet"""
+        user = user or self.wallet
+        if not user:
+            raise ValueError("Wallet address not configured")
+        return self._post_info({"type": "orderStatus", "user": user, "oid": oid})
+    
+    def get_asset_contexts(self) -> Dict[str, Dict]:
+        """Funding, OI, mark/oracle price and 24h volume for every perp, by coin"""
+        meta, ctxs = self._post_info({"type": "metaAndAssetCtxs"})
+        return {asset["name"]: ctx for asset, ctx in zip(meta.get("universe", []), ctxs)}
+    
     def get_funding_rate(self, coin: str = "BTC") -> Dict:
         """Get current funding rate"""
         meta = self._post_info({"type": "meta"})
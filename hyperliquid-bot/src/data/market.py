@@ -1,17 +1,40 @@
 ﻿"""
 Market Data Module - Real data from Hyperliquid API
 """
+import time
 import asyncio
-from typing import Dict, Any, List
+import logging
+from typing import Dict, Any, List, Iterable
 from datetime import datetime
 from .hyperliquid_client import HyperliquidClient
+from .candles import CandleAggregator, DEFAULT_TIMEFRAMES, INTERVAL_MS, BASE_INTERVAL
+
+log = logging.getLogger("bot")
+
+MAX_CANDLES_PER_REQUEST = 5000  # candleSnapshot cap
 
 class MarketData:
-    def __init__(self, coin: str = "BTC"):
+    def __init__(self, coin: str = "BTC", timeframes: Iterable[str] = DEFAULT_TIMEFRAMES,
+                 history_bars: int = 100, orderbook: bool = False, book_levels: int = 20,
+                 max_staleness: float = 15.0):
         self.coin = coin
         self.client = HyperliquidClient()
         self.last_price = None
         self.candles_cache = []
+        # All timeframes are built locally from a single 1m feed
+        self.aggregator = CandleAggregator(coin, timeframes, max_bars=max(500, history_bars))
+        # Closed bars wanted per timeframe at startup; the largest timeframe sizes the 1m bootstrap
+        self.history_bars = history_bars
+        # Local L2 book, only polled when enabled (scalping timeframes)
+        self.books = None
+        if orderbook:
+            from .orderbook import OrderBooks  # Deferred: pulls in numpy
+            self.books = OrderBooks()
+        self.orderbook = orderbook
+        self.book_levels = book_levels
+        # Last successful refresh per feed; older than max_staleness => stale
+        self.max_staleness = max_staleness
+        self.updated_at = {"price": 0.0, "candles": 0.0}
         
     async def get_latest(self) -> Dict[str, Any]:
         # Run sync calls in executor
@@ -20,43 +43,112 @@ class MarketData:
         price = await loop.run_in_executor(None, self._get_price_sync)
         candles = await loop.run_in_executor(None, self._get_candles_sync)
         funding = await loop.run_in_executor(None, self._get_funding_sync)
+        book = await loop.run_in_executor(None, self._get_book_sync) if self.orderbook else None
         
         self.last_price = price
+        age = self.data_age()
         
         return {
             "timestamp": datetime.now().isoformat(),
+            "stale": age > self.max_staleness,
+            "data_age": age,
             "price": price,
             "candles": candles,
+            "timeframes": self.aggregator.snapshot(),
             "funding_rate": funding,
+            "orderbook": book,
             "sentiment": {"score": 0.0}  # TODO: implement
         }
     
+    def data_age(self) -> float:
+        """Seconds since the oldest of price/candles was last refreshed"""
+        return time.time() - min(self.updated_at.values())
+    
     def _get_price_sync(self) -> float:
         try:
-            return self.client.get_btc_price()
+            price = self.client.get_btc_price()
+            self.updated_at["price"] = time.time()
+            return price
         except Exception as e:
-            print(f"Price error: {e}")
+            log.warning(f"Price error: {e}")
             return self.last_price or 0.0
     
     def _get_candles_sync(self, limit: int = 100) -> List[Dict]:
         try:
-            candles = self.client.get_candles(self.coin, "1m", limit)
+            since = self.aggregator.last_time
+            if since is None:
+                fresh = self._bootstrap_candles(limit)
+            else:
+                # Only the forming bar and anything newer
+                fresh = self.client.get_candles(self.coin, "1m", start_time=since)
+            self.aggregator.update_many(fresh)
+            candles = self.aggregator.get_candles("1m", limit)
             self.candles_cache = candles
+            self.updated_at["candles"] = time.time()
             return candles
         except Exception as e:
-            print(f"Candles error: {e}")
-            return self.candles_cache
+            log.warning(f"Candles error: {e}")
+            return self.candles_cache or self.aggregator.get_candles("1m", limit)
+    
+    def _bootstrap_candles(self, limit: int) -> List[Dict]:
+        """1m history covering `history_bars` closed bars of the largest timeframe.
+
+        Starts on that timeframe's bucket boundary, so no first bar is partial,
+        and is fetched in request-sized chunks.
+        """
+        width = max(INTERVAL_MS[tf] for tf in self.aggregator.timeframes)
+        base = INTERVAL_MS[BASE_INTERVAL]
+        now = int(time.time() * 1000)
+        start = now - now % width - self.history_bars * width
+        start = min(start, now - limit * base)
+        candles = []
+        while start < now:
+            end = min(now, start + MAX_CANDLES_PER_REQUEST * base - 1)
+            candles.extend(self.client.get_candles(self.coin, BASE_INTERVAL, start_time=start, end_time=end))
+            start = end + 1
+        return candles
     
     def _get_funding_sync(self) -> float:
         try:
             data = self.client.get_funding_rate(self.coin)
             return float(data.get("funding_rate", 0))
         except Exception as e:
-            print(f"Funding error: {e}")
+            log.warning(f"Funding error: {e}")
             return 0.0
     
+    def _get_book_sync(self) -> Dict[str, float]:
+        try:
+            self.books.on_message(self.client.get_l2_book(self.coin, self.book_levels))
+        except Exception as e:
+            log.warning(f"Order book error: {e}")
+        return self.books.features(self.coin)
+    
     def get_price_sync(self) -> float:
         return self._get_price_sync()
     
     def get_candles_sync(self, limit: int = 100) -> List[Dict]:
         return self._get_candles_sync(limit)
+    
+    def get_timeframe_candles(self, interval: str, limit: int = 100) -> List[Dict]:
+        """Locally aggregated candles for any configured timeframe (no extra request)"""
+        return self.aggregator.get_candles(interval, limit)
+
+
+def config_timeframes(config: Dict[str, Any]) -> List[str]:
+    """Every timeframe the configured strategies read: "timeframes" plus the pool's variants and regime"""
+    timeframes = list(config.get("timeframes") or DEFAULT_TIMEFRAMES)
+    pool = config.get("strategy_pool") or {}
+    if pool.get("enabled"):
+        timeframes += [entry.get("timeframe", "1m") for entry in pool.get("strategies") or []]
+        if pool.get("regime_timeframe"):
+            timeframes.append(pool["regime_timeframe"])
+    return sorted(set(timeframes) & set(INTERVAL_MS), key=INTERVAL_MS.get)
+
+
+def create_market(config: Dict[str, Any], coin: str = "BTC") -> MarketData:
+    """MarketData for the configured timeframes and style (order book when scalping)"""
+    market_config = config.get("market") or {}
+    return MarketData(coin, config_timeframes(config),
+                      history_bars=market_config.get("history_bars", 100),
+                      orderbook=config.get("style") in ("scalp", "ultrascalp"),
+                      max_staleness=market_config.get("max_staleness", 15.0))
@@ -0,0 +1,205 @@
+"""
+Order Book - Local L2 book per coin with microstructure features
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+BID = "bid"
+ASK = "ask"
+
+
+class OrderBook:
+    """Array-backed L2 book kept current from l2Book snapshots and level updates.
+
+    Each side is a pair of numpy arrays sorted best-first (bids descending,
+    asks ascending), so the top of book is index 0. Cumulative depth is
+    rebuilt lazily on the first query after a change.
+    """
+
+    def __init__(self, coin: str = "BTC", max_levels: int = 50):
+        self.coin = coin
+        self.max_levels = max_levels
+        self.px = {BID: np.empty(0), ASK: np.empty(0)}
+        self.sz = {BID: np.empty(0), ASK: np.empty(0)}
+        self._cum: Dict[str, Optional[np.ndarray]] = {BID: None, ASK: None}
+        self.time = 0
+        self.updates = 0
+
+    # ========== Updates ==========
+
+    def apply_snapshot(self, book: Dict[str, Any]) -> None:
+        """Replace the book with an l2Book response / websocket message"""
+        bids, asks = book.get("levels", [[], []])
+        self._set_side(BID, bids)
+        self._set_side(ASK, asks)
+        self.time = int(book.get("time", 0))
+        self.updates += 1
+
+    def _set_side(self, side: str, levels: List[Dict]) -> None:
+        levels = levels[:self.max_levels]
+        self.px[side] = np.array([float(l["px"]) for l in levels], dtype=float)
+        self.sz[side] = np.array([float(l["sz"]) for l in levels], dtype=float)
+        self._cum[side] = None
+
+    def apply_update(self, side: str, px: float, sz: float, time: Optional[int] = None) -> None:
+        """Set the size at one price level (sz == 0 removes the level)"""
+        prices = self.px[side]
+        # Bids are stored descending; search on the negated array
+        keys = -prices if side == BID else prices
+        key = -px if side == BID else px
+        i = int(np.searchsorted(keys, key))
+        exists = i < len(prices) and prices[i] == px
+
+        if sz <= 0:
+            if exists:
+                self.px[side] = np.delete(prices, i)
+                self.sz[side] = np.delete(self.sz[side], i)
+        elif exists:
+            self.sz[side][i] = sz
+        else:
+            self.px[side] = np.insert(prices, i, px)[:self.max_levels]
+            self.sz[side] = np.insert(self.sz[side], i, sz)[:self.max_levels]
+
+        self._cum[side] = None
+        if time is not None:
+            self.time = time
+        self.updates += 1
+
+    # ========== Queries ==========
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.px[BID][0]) if len(self.px[BID]) else 0.0
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.px[ASK][0]) if len(self.px[ASK]) else 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.px[BID]) > 0 and len(self.px[ASK]) > 0
+
+    @property
+    def mid(self) -> float:
+        if not self.ready:
+            return 0.0
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid if self.ready else 0.0
+
+    @property
+    def spread_bps(self) -> float:
+        mid = self.mid
+        return self.spread / mid * 10_000 if mid else 0.0
+
+    def size_at(self, side: str, px: float) -> float:
+        """Resting size at an exact price level"""
+        prices = self.px[side]
+        keys = -prices if side == BID else prices
+        key = -px if side == BID else px
+        i = int(np.searchsorted(keys, key))
+        if i < len(prices) and prices[i] == px:
+            return float(self.sz[side][i])
+        return 0.0
+
+    def _cumulative(self, side: str) -> np.ndarray:
+        cum = self._cum[side]
+        if cum is None:
+            cum = np.cumsum(self.sz[side])
+            self._cum[side] = cum
+        return cum
+
+    def depth_to(self, side: str, px: float) -> float:
+        """Total size from the top of book through `px` inclusive"""
+        prices = self.px[side]
+        if side == BID:
+            n = int(np.searchsorted(-prices, -px, side="right"))
+        else:
+            n = int(np.searchsorted(prices, px, side="right"))
+        return float(self._cumulative(side)[n - 1]) if n else 0.0
+
+    def depth_within(self, bps: float) -> Tuple[float, float]:
+        """(bid, ask) size resting within `bps` of mid"""
+        mid = self.mid
+        if not mid:
+            return 0.0, 0.0
+        offset = mid * bps / 10_000
+        return self.depth_to(BID, mid - offset), self.depth_to(ASK, mid + offset)
+
+    def imbalance(self, levels: int = 5) -> float:
+        """(bid - ask) / (bid + ask) size over the top `levels`, in [-1, 1]"""
+        bid = float(self.sz[BID][:levels].sum())
+        ask = float(self.sz[ASK][:levels].sum())
+        total = bid + ask
+        return (bid - ask) / total if total else 0.0
+
+    @property
+    def microprice(self) -> float:
+        """Top-of-book size-weighted price, leaning toward the thinner side"""
+        if not self.ready:
+            return 0.0
+        bid_sz, ask_sz = self.sz[BID][0], self.sz[ASK][0]
+        total = bid_sz + ask_sz
+        if not total:
+            return self.mid
+        return float((self.best_bid * ask_sz + self.best_ask * bid_sz) / total)
+
+    def fill_price(self, size: float, is_buy: bool) -> float:
+        """VWAP of a market order walking the opposite side (paper fills)"""
+        side = ASK if is_buy else BID
+        prices, sizes = self.px[side], self.sz[side]
+        if not len(prices) or size <= 0:
+            return self.mid
+        cum = self._cumulative(side)
+        n = int(np.searchsorted(cum, size))
+        if n >= len(prices):
+            # Book too thin: fill the rest at the last visible level
+            return float((np.dot(prices, sizes) + (size - cum[-1]) * prices[-1]) / size)
+        filled_before = cum[n - 1] if n else 0.0
+        cost = np.dot(prices[:n], sizes[:n]) + (size - filled_before) * prices[n]
+        return float(cost / size)
+
+    def features(self, levels: int = 5, depth_bps: float = 10) -> Dict[str, float]:
+        """Cheap snapshot of microstructure features for strategies"""
+        bid_depth, ask_depth = self.depth_within(depth_bps)
+        mid = self.mid
+        return {
+            "best_bid": self.best_bid,
+            "best_ask": self.best_ask,
+            "mid": mid,
+            "spread": self.spread,
+            "spread_bps": self.spread_bps,
+            "microprice": self.microprice,
+            "micro_offset_bps": (self.microprice - mid) / mid * 10_000 if mid else 0.0,
+            "imbalance": self.imbalance(levels),
+            "bid_depth": bid_depth,
+            "ask_depth": ask_depth,
+            "time": self.time,
+        }
+
+
+class OrderBooks:
+    """One OrderBook per coin"""
+
+    def __init__(self, max_levels: int = 50):
+        self.max_levels = max_levels
+        self.books: Dict[str, OrderBook] = {}
+
+    def get(self, coin: str) -> OrderBook:
+        book = self.books.get(coin)
+        if book is None:
+            book = OrderBook(coin, self.max_levels)
+            self.books[coin] = book
+        return book
+
+    def on_message(self, message: Dict[str, Any]) -> OrderBook:
+        """Handle an l2Book response or websocket `data` payload"""
+        book = self.get(message.get("coin", "BTC"))
+        book.apply_snapshot(message)
+        return book
+
+    def features(self, coin: str) -> Optional[Dict[str, float]]:
+        book = self.books.get(coin)
+        return book.features() if book and book.ready else None
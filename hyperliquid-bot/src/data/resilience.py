@@ -0,0 +1,225 @@
+"""
+Resilience - Deadlines, hedged requests, jittered retries and circuit breaking
+"""
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """No attempt finished before the endpoint deadline"""
+
+
+class CircuitOpenError(Exception):
+    """Endpoint is failing; calls are short-circuited until the cooldown ends"""
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the `attempt`-th retry (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+@dataclass
+class EndpointPolicy:
+    deadline: float = 3.0          # Total budget per call, including retries (s)
+    retries: int = 2
+    hedge: bool = True             # Only for idempotent reads
+    min_hedge_delay: float = 0.05  # Never hedge sooner than this (s)
+    backoff_base: float = 0.1
+    backoff_cap: float = 1.0
+
+
+class LatencyTracker:
+    """Rolling latency window used to pick the hedge delay"""
+
+    def __init__(self, window: int = 200, default: float = 0.5):
+        self.samples = deque(maxlen=window)
+        self.default = default
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q: float = 0.95) -> float:
+        with self._lock:
+            if len(self.samples) < 20:
+                return self.default
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open after `cooldown`.
+
+    Half-open admits a single probe; other callers are rejected until it succeeds
+    (closed) or fails (open again). A probe that never reports back is replaced
+    after another `cooldown`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_success = 0.0
+        self.probe_at: Optional[float] = None   # Start of the half-open probe in flight
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at < self.cooldown:
+                return False
+            if self.probe_at is not None and now - self.probe_at < self.cooldown:
+                return False  # Half-open with a probe outstanding
+            self.state = self.HALF_OPEN
+            self.probe_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.probe_at = None
+            self.failures = 0
+            self.last_success = time.time()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_at = None
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """Runs blocking calls under a deadline, hedging slow ones and retrying failures.
+
+    `fn(timeout)` must honour the timeout it is given (e.g. requests' timeout=).
+    A hedge is a duplicate request fired once the first has been outstanding
+    longer than the endpoint's p95 latency; whichever answers first wins.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, EndpointPolicy]] = None,
+                 default: Optional[EndpointPolicy] = None, max_workers: int = 8):
+        self.policies = policies or {}
+        self.default = default or EndpointPolicy()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hl-http")
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats = {"calls": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()  # Calls come from several run_in_executor threads
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _tracker(self, endpoint: str) -> LatencyTracker:
+        if endpoint not in self.latency:
+            self.latency[endpoint] = LatencyTracker()
+        return self.latency[endpoint]
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker()
+        return self.breakers[endpoint]
+
+    def call(self, endpoint: str, fn: Callable[[float], T],
+             retryable: Callable[[Exception], bool] = lambda e: True) -> T:
+        policy = self.policies.get(endpoint, self.default)
+        breaker = self.breaker(endpoint)
+        tracker = self._tracker(endpoint)
+        deadline_at = time.monotonic() + policy.deadline
+        self._count("calls")
+        last_error: Exception = DeadlineExceeded(endpoint)
+
+        for attempt in range(policy.retries + 1):
+            if not breaker.allow():
+                if attempt:
+                    break  # Half-open probe was this call's first attempt: report its error
+                raise CircuitOpenError(f"{endpoint} circuit open")
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._count("retries")
+
+            start = time.monotonic()
+            try:
+                result = self._attempt(fn, remaining, policy, tracker)
+            except Exception as e:
+                last_error = e
+                if isinstance(e, DeadlineExceeded):
+                    self._count("timeouts")
+                    break
+                if not retryable(e):
+                    break
+                # Full jitter, never sleeping past the deadline
+                delay = backoff(attempt, policy.backoff_base, policy.backoff_cap)
+                time.sleep(max(0.0, min(delay, deadline_at - time.monotonic())))
+                continue
+
+            tracker.record(time.monotonic() - start)
+            breaker.record_success()
+            return result
+
+        # One failure per call, once its retries are spent
+        breaker.record_failure()
+        raise last_error
+
+    def _attempt(self, fn: Callable[[float], T], budget: float, policy: EndpointPolicy,
+                 tracker: LatencyTracker) -> T:
+        start = time.monotonic()
+        deadline_at = start + budget
+        hedge_at = start + max(policy.min_hedge_delay, tracker.quantile(0.95))
+        primary = self.pool.submit(fn, budget)
+        pending = {primary}
+        hedged = not policy.hedge
+        last_error: Optional[Exception] = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at:
+                raise DeadlineExceeded(f"no response within {budget:.2f}s")
+            if not hedged and now >= hedge_at:
+                pending.add(self.pool.submit(fn, deadline_at - now))
+                hedged = True
+                self._count("hedges")
+            until = deadline_at if hedged else min(deadline_at, hedge_at)
+            done, pending = wait(pending, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                last_error = error
+
+        raise last_error
+
+    def health(self) -> Dict[str, Any]:
+        """Per-endpoint breaker state, p95 latency and seconds since last success"""
+        now = time.time()
+        return {
+            name: {
+                "state": b.state,
+                "failures": b.failures,
+                "p95": self._tracker(name).quantile(0.95),
+                "since_success": now - b.last_success if b.last_success else None,
+            }
+            for name, b in self.breakers.items()
+        }
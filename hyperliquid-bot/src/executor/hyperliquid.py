@@ -1,13 +1,21 @@
 """
 Hyperliquid Executor - Uses Node.js bridge for signed operations
 """
+import os
 import subprocess
+import asyncio
 import json
 import re
+import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
 
+from executor.quality import OrderTrace, ExecutionStats
+from executor.orders import OrderManager, ManagedOrder, FILLED
+
+log = logging.getLogger("bot")
+
 @dataclass
 class TradeResult:
     success: bool
@@ -19,8 +27,14 @@ class TradeResult:
     error: Optional[str] = None
 
 class HyperliquidExecutor:
-    def __init__(self, mode: str = "paper"):
+    def __init__(self, mode: str = "paper", books=None, submit_timeout: float = 30.0, account: int = 1):
         self.mode = mode
+        self.account = account  # HYPERLIQUID_SECRET_/WALLET_<account>, passed to the bridge as --account
+        self.books = books  # Optional data.orderbook.OrderBooks for paper fills
+        self.open_orders: Dict[int, Dict[str, Any]] = {}  # Resting limit orders by oid
+        self.quality = ExecutionStats()  # Signal-to-fill latency and slippage per coin/side/type
+        self.orders = OrderManager(self, submit_timeout=submit_timeout)
+        self._client = None  # HyperliquidClient for order status, created on first use
         self.node_executor_dir = Path(__file__).parent / "node-executor"
         self.executor_script = self.node_executor_dir / "executor.js"
         self._verify_setup()
@@ -31,14 +45,36 @@ class HyperliquidExecutor:
                 f"Node modules not installed. Run: cd {self.node_executor_dir} && npm install"
             )
     
+    @property
+    def wallet(self) -> Optional[str]:
+        """Address this executor trades for (what the bridge resolves for --account)"""
+        return os.getenv(f"HYPERLIQUID_WALLET_{self.account}") or os.getenv("HYPERLIQUID_WALLET_ADDRESS")
+    
     def _run_node(self, *args) -> Dict[str, Any]:
-        cmd = ["node", str(self.executor_script)] + [str(a) for a in args]
+        cmd = ["node", str(self.executor_script)] + [str(a) for a in args] + ["--account", str(self.account)]
         result = subprocess.run(
             cmd, capture_output=True, text=True,
             cwd=str(self.node_executor_dir), timeout=30
         )
-        
-        output = result.stdout.strip()
+        return self._parse_output(result.stdout, result.stderr)
+    
+    async def _run_node_async(self, *args, timeout: float = 30.0) -> Dict[str, Any]:
+        """_run_node without blocking the loop; kills the bridge and raises TimeoutError on timeout"""
+        proc = await asyncio.create_subprocess_exec(
+            "node", str(self.executor_script), *[str(a) for a in args], "--account", str(self.account),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            cwd=str(self.node_executor_dir)
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            proc.kill()
+            await proc.wait()
+            raise
+        return self._parse_output(stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace"))
+    
+    def _parse_output(self, stdout: str, stderr: str) -> Dict[str, Any]:
+        output = stdout.strip()
         
         # Find JSON object in output (skip WebSocket logs)
         json_match = re.search(r'(\{[\s\S]*\}|\[[\s\S]*\])(?=\s*(?:WebSocket|$))', output)
@@ -63,7 +99,7 @@ class HyperliquidExecutor:
                 except:
                     continue
         
-        return {"error": result.stderr or output or "No output"}
+        return {"error": stderr or output or "No output"}
     
     # === Trading Operations ===
     
@@ -76,8 +112,7 @@ class HyperliquidExecutor:
     
     def market_close(self, coin: str, size: Optional[float] = None, slippage: float = 0.01) -> TradeResult:
         if self.mode == "paper":
-            return TradeResult(success=True, order_id=0, filled_size=size or 0, 
-                             avg_price=0, side="close", coin=coin)
+            return self._paper_close(coin, size or 0)
         
         args = ["market_close", coin]
         if size:
@@ -91,12 +126,19 @@ class HyperliquidExecutor:
         
         cmd = "buy" if is_buy else "sell"
         result = self._run_node(cmd, coin, size, price)
-        return self._parse_order_result(result, coin, cmd)
+        trade = self._parse_order_result(result, coin, cmd)
+        if trade.success and trade.order_id and trade.filled_size < size:
+            self.open_orders[trade.order_id] = {
+                "coin": coin, "side": cmd, "size": size, "price": price
+            }
+        return trade
     
     def cancel_order(self, coin: str, order_id: int) -> bool:
         if self.mode == "paper":
             return True
         result = self._run_node("cancel", coin, order_id)
+        if result.get("success", False):
+            self.open_orders.pop(order_id, None)
         return result.get("success", False)
     
     def cancel_all(self, coin: Optional[str] = None) -> bool:
@@ -106,8 +148,79 @@ class HyperliquidExecutor:
         if coin:
             args.append(coin)
         result = self._run_node(*args)
+        if result.get("success", False):
+            self.open_orders = {oid: o for oid, o in self.open_orders.items()
+                                if coin and o["coin"] != coin}
         return result.get("success", False)
     
+    # === Async order lifecycle (see executor/orders.py) ===
+    
+    async def submit(self, order: ManagedOrder, timeout: float = 30.0) -> TradeResult:
+        """Send one managed order, tagged with its client order id"""
+        if self.mode == "paper":
+            loop = asyncio.get_running_loop()
+            # get_price may spawn Node when there is no local book
+            if order.kind == "close":
+                return await loop.run_in_executor(None, self._paper_close, order.coin, order.size)
+            return await loop.run_in_executor(None, self._paper_trade, order.coin, order.size,
+                                              order.is_buy, order.price)
+        
+        if order.kind == "close":
+            args = ["market_close", order.coin] + ([order.size, 0.01] if order.size else [])
+        elif order.kind == "limit":
+            args = ["buy" if order.is_buy else "sell", order.coin, order.size, order.price]
+        else:
+            args = ["market_open", order.coin, order.size, str(order.is_buy).lower(), 0.01]
+        result = await self._run_node_async(*args, "--cloid", order.cloid, timeout=timeout)
+        trade = self._parse_order_result(result, order.coin, order.side)
+        if order.kind == "limit" and trade.success and trade.order_id and trade.filled_size < order.size:
+            self.open_orders[trade.order_id] = {
+                "coin": order.coin, "side": order.side, "size": order.size, "price": order.price,
+                "cloid": order.cloid
+            }
+        return trade
+    
+    async def cancel_cloid(self, coin: str, cloid: str) -> bool:
+        if self.mode == "paper":
+            return True
+        try:
+            result = await self._run_node_async("cancel_cloid", coin, cloid, timeout=15)
+        except asyncio.TimeoutError:
+            return False
+        if result.get("success", False):
+            self._forget(cloid)
+        return result.get("success", False)
+    
+    async def order_status(self, cloid: str) -> str:
+        """Exchange status of an order ("open", "filled", "canceled", ...; "" if unknown)"""
+        if self.mode == "paper":
+            return "filled"
+        if self._client is None:
+            from data.hyperliquid_client import HyperliquidClient
+            self._client = HyperliquidClient()
+        loop = asyncio.get_running_loop()
+        try:
+            # The executor's own wallet: an account-2 order is unknown to the default wallet
+            response = await loop.run_in_executor(None, self._client.get_order_status, cloid, self.wallet)
+        except Exception:
+            return ""
+        status = (response.get("order") or {}).get("status", "")
+        if status and status != "open":
+            self._forget(cloid)
+        return status
+    
+    def _forget(self, cloid: str):
+        self.open_orders = {oid: o for oid, o in self.open_orders.items() if o.get("cloid") != cloid}
+    
+    # === Snapshot ===
+    
+    def to_state(self) -> Dict[str, Any]:
+        return {"open_orders": [{"oid": oid, **o} for oid, o in self.open_orders.items()]}
+    
+    def load_state(self, state: Dict[str, Any]):
+        self.open_orders = {o["oid"]: {k: v for k, v in o.items() if k != "oid"}
+                            for o in state.get("open_orders", [])}
+    
     # === Info Operations ===
     
     def get_balance(self) -> Dict[str, float]:
@@ -137,10 +250,11 @@ class HyperliquidExecutor:
             data = result.get("order", {}).get("response", {}).get("data", {})
             statuses = data.get("statuses", [{}])
             filled = statuses[0].get("filled", {})
+            resting = statuses[0].get("resting", {})
             
             return TradeResult(
                 success=True,
-                order_id=filled.get("oid"),
+                order_id=filled.get("oid") or resting.get("oid"),
                 filled_size=float(filled.get("totalSz", 0)),
                 avg_price=float(filled.get("avgPx", 0)),
                 side=side,
@@ -151,6 +265,11 @@ class HyperliquidExecutor:
                          avg_price=0, side=side, coin=coin, error="Unknown error")
     
     def _paper_trade(self, coin: str, size: float, is_buy: bool, price: float = None) -> TradeResult:
+        if not price and self.books is not None:
+            book = self.books.get(coin)
+            if book.ready:
+                # Walk the local book so paper fills pay spread and depth
+                price = book.fill_price(size, is_buy)
         if not price:
             price = self.get_price(coin)
         return TradeResult(
@@ -158,9 +277,16 @@ class HyperliquidExecutor:
             avg_price=price, side="buy" if is_buy else "sell", coin=coin
         )
     
+    def _paper_close(self, coin: str, size: float) -> TradeResult:
+        # Direction unknown here: fill at the mid rather than walking one side
+        book = self.books.get(coin) if self.books is not None else None
+        price = book.mid if book is not None and book.ready else self.get_price(coin)
+        return TradeResult(success=True, order_id=0, filled_size=size, avg_price=price,
+                           side="close", coin=coin)
+    
     # === Signal-based execution ===
     
-    async def execute(self, signal, size: float) -> Optional[Dict]:
+    async def execute(self, signal, size: float, trace: Optional[OrderTrace] = None) -> Optional[Dict]:
         from strategy.engine import SignalType
         
         if signal.type == SignalType.NONE:
@@ -168,21 +294,47 @@ class HyperliquidExecutor:
         
         coin = "BTC"
         is_buy = signal.type == SignalType.LONG
+        trace = trace or OrderTrace.from_signal(signal)
+        trace.coin, trace.size = coin, size
+        trace.side = "close" if signal.type == SignalType.CLOSE else ("buy" if is_buy else "sell")
+        trace.order_type = "close" if signal.type == SignalType.CLOSE else "market"
         
-        if signal.type == SignalType.CLOSE:
-            result = self.market_close(coin)
-        else:
-            result = self.market_open(coin, size, is_buy)
+        trace.mark("sent")
+        # Size 0 closes the whole position; paper has no exchange position, so it closes `size`
+        close_size = size if self.mode == "paper" else 0
+        order = self.orders.submit(coin, close_size if trace.order_type == "close" else size, trace.side,
+                                   kind=trace.order_type)
+        result = await order.done
+        # The bridge returns once the exchange answered; IOC market orders are filled by then
+        trace.mark("acked", order.acked)
+        trace.order_id, trace.error = result.order_id, result.error
+        if result.success and result.filled_size:
+            trace.filled, trace.fill_price, trace.filled_size = trace.acked, result.avg_price, result.filled_size
+        row = self.quality.record(trace)
         
-        if result.success:
+        if result.success and order.status == FILLED:
             return {
                 "coin": coin,
                 "side": result.side,
                 "size": result.filled_size,
                 "price": result.avg_price,
                 "order_id": result.order_id,
-                "pnl": 0
+                "pnl": 0,  # Opening fill; realized PnL is known only when the position closes
+                "slippage_bps": row.get("slippage_mid_bps"),
+                "latency_ms": row.get("signal_to_fill"),
+                "trace": row,
             }
         
-        print(f"Order failed: {result.error}")
-        return None
\ No newline at end of file
+        # An IOC that matched nothing is rejected without an error from the exchange
+        log.error(f"Order failed: {result.error or f'{order.status}, nothing filled'}")
+        return None
+
+
+def create_executor(mode: str = "paper", books=None, config: Optional[Dict[str, Any]] = None) -> HyperliquidExecutor:
+    """SdkExecutor when "executor.backend" is "sdk", else the Node bridge"""
+    config = config or {}
+    timeout = config.get("submit_timeout", 30.0)
+    if config.get("backend") == "sdk":
+        from executor.sdk_executor import SdkExecutor  # Deferred: pulls in the SDK and eth_account
+        return SdkExecutor(mode=mode, books=books, submit_timeout=timeout, account=config.get("account", 1))
+    return HyperliquidExecutor(mode=mode, books=books, submit_timeout=timeout, account=config.get("account", 1))
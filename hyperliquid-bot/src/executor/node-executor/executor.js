@@ -25,7 +25,20 @@ function extractAccount(argv) {
   return { account, args };
 }
 
-const { account: ACCOUNT, args: cleanedArgv } = extractAccount(process.argv.slice(2));
+// Parse --cloid 0x<32 hex> (client order id set by the Python order manager)
+function extractCloid(argv) {
+  const args = [...argv];
+  let cloid = null;
+  const idx = args.indexOf('--cloid');
+  if (idx !== -1 && args[idx + 1]) {
+    cloid = args[idx + 1];
+    args.splice(idx, 2);
+  }
+  return { cloid, args };
+}
+
+const { account: ACCOUNT, args: accountArgv } = extractAccount(process.argv.slice(2));
+const { cloid: CLOID, args: cleanedArgv } = extractCloid(accountArgv);
 
 // Load credentials for the selected account
 // Account 1: HYPERLIQUID_SECRET_1 / HYPERLIQUID_WALLET_1 (or legacy HYPERLIQUID_API_SECRET)
@@ -158,6 +171,11 @@ async function main() {
         result = await cancelAllOrders(args[1]);
         break;
         
+      case 'cancel_cloid':
+        // cancel_cloid <coin> <cloid>
+        result = await cancelOrderByCloid(args[1], args[2]);
+        break;
+        
       case 'position':
         result = await getPosition(args[1]);
         break;
@@ -175,7 +193,7 @@ async function main() {
         break;
         
       default:
-        result = { error: 'Unknown command. Use: buy, sell, market_open, market_close, cancel, cancel_all, position, balance, price, test' };
+        result = { error: 'Unknown command. Use: buy, sell, market_open, market_close, cancel, cancel_all, cancel_cloid, position, balance, price, test' };
     }
     
     console.log(JSON.stringify(result, null, 2));
@@ -217,6 +235,7 @@ async function placeOrder(coin, size, isBuy, limitPrice = null) {
     order_type: orderType,
     reduce_only: false
   };
+  if (CLOID) order.cloid = CLOID;
   
   const response = await sdk.exchange.placeOrder(order);
   return { success: true, order: response };
@@ -224,12 +243,12 @@ async function placeOrder(coin, size, isBuy, limitPrice = null) {
 
 async function marketOpen(coin, size, isBuy, slippage = 0.01) {
   // Use custom operation for market orders
-  const response = await sdk.custom.marketOpen(coin, isBuy, size, null, slippage);
+  const response = await sdk.custom.marketOpen(coin, isBuy, size, null, slippage, CLOID || undefined);
   return { success: true, order: response };
 }
 
 async function marketClose(coin, size = null, slippage = 0.01) {
-  const response = await sdk.custom.marketClose(coin, size, null, slippage);
+  const response = await sdk.custom.marketClose(coin, size, null, slippage, CLOID || undefined);
   return { success: true, order: response };
 }
 
@@ -238,6 +257,11 @@ async function cancelOrder(coin, orderId) {
   return { success: true, result: response };
 }
 
+async function cancelOrderByCloid(coin, cloid) {
+  const response = await sdk.exchange.cancelOrderByCloid(coin, cloid);
+  return { success: true, result: response };
+}
+
 async function cancelAllOrders(coin = null) {
   const response = await sdk.custom.cancelAllOrders(coin);
   return { success: true, result: response };
@@ -0,0 +1,189 @@
+"""
+Order Manager - Non-blocking order lifecycle tracked by client order id
+"""
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Set
+
+log = logging.getLogger("bot")
+
+PENDING = "pending"        # Submitted, no exchange answer yet
+RESTING = "resting"        # Limit order on the book
+FILLED = "filled"
+CANCELLED = "cancelled"
+REJECTED = "rejected"
+TIMEOUT = "timeout"        # No answer in time; cancelled by cloid in case it landed
+DONE = (FILLED, CANCELLED, REJECTED, TIMEOUT)
+
+
+def new_cloid() -> str:
+    """Hyperliquid client order id: 16 random bytes as 0x-prefixed hex"""
+    return "0x" + os.urandom(16).hex()
+
+
+@dataclass
+class ManagedOrder:
+    cloid: str
+    coin: str
+    side: str                         # buy / sell / close
+    size: float
+    kind: str = "market"              # market / limit / close
+    price: Optional[float] = None     # Limit price
+    status: str = PENDING
+    oid: Optional[int] = None
+    result: Any = None                # TradeResult once done
+    submitted: float = field(default_factory=time.time)
+    acked: Optional[float] = None
+    finished: Optional[float] = None
+    done: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def is_buy(self) -> bool:
+        return self.side == "buy"
+
+
+@dataclass
+class OrderEvent:
+    status: str
+    order: ManagedOrder
+    at: float = field(default_factory=time.time)
+
+
+class OrderManager:
+    """Submits orders as tasks so the event loop keeps running while Node signs and sends.
+
+    Orders for one coin go out one at a time (a later order should see the
+    earlier fill); different coins run concurrently. Every status change is
+    pushed to subscribers as an OrderEvent, and `order.done` resolves to the
+    final TradeResult. Resting limit orders are polled until filled or their
+    ttl runs out, then cancelled.
+    """
+
+    def __init__(self, executor, submit_timeout: float = 30.0, poll_interval: float = 2.0):
+        self.executor = executor
+        self.submit_timeout = submit_timeout
+        self.poll_interval = poll_interval
+        self.orders: Dict[str, ManagedOrder] = {}     # In flight, by cloid
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def in_flight(self, coin: Optional[str] = None) -> List[ManagedOrder]:
+        return [o for o in self.orders.values() if coin is None or o.coin == coin]
+
+    def submit(self, coin: str, size: float, side: str, kind: str = "market",
+               price: Optional[float] = None, ttl: Optional[float] = None) -> ManagedOrder:
+        """Queue an order and return at once; await `order.done` for its TradeResult"""
+        order = ManagedOrder(new_cloid(), coin, side, size, kind, price)
+        order.done = asyncio.get_running_loop().create_future()
+        self.orders[order.cloid] = order
+        task = asyncio.create_task(self._run(order, ttl), name=f"order-{order.cloid[:10]}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return order
+
+    async def cancel(self, cloid: str) -> bool:
+        order = self.orders.get(cloid)
+        if order is None:
+            return False
+        cancelled = await self.executor.cancel_cloid(order.coin, cloid)
+        if cancelled:
+            self._finish(order, CANCELLED, order.result or self._failed(order, "cancelled"))
+        return cancelled
+
+    async def close(self):
+        """Stop monitoring (orders on the exchange are left as they are)"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    # ========== Lifecycle ==========
+
+    def _lock(self, coin: str) -> asyncio.Lock:
+        if coin not in self._locks:
+            self._locks[coin] = asyncio.Lock()
+        return self._locks[coin]
+
+    async def _run(self, order: ManagedOrder, ttl: Optional[float]):
+        try:
+            async with self._lock(order.coin):
+                self._emit(PENDING, order)
+                try:
+                    result = await self.executor.submit(order, timeout=self.submit_timeout)
+                except asyncio.TimeoutError:
+                    # The order may have reached the exchange before the bridge was killed
+                    cancelled = await self.executor.cancel_cloid(order.coin, order.cloid)
+                    log.warning(f"Order {order.cloid} timed out after {self.submit_timeout:.0f}s "
+                                f"({'cancelled' if cancelled else 'cancel failed'})")
+                    self._finish(order, TIMEOUT, self._failed(order, "submit timed out"))
+                    return
+                order.acked, order.oid, order.result = time.time(), result.order_id, result
+
+                if not result.success:
+                    self._finish(order, REJECTED, result)
+                    return
+                if not (order.kind == "limit" and result.filled_size < order.size):
+                    # An IOC that matched nothing (close included) comes back successful but empty
+                    self._finish(order, FILLED if result.filled_size > 0 else REJECTED, result)
+                    return
+                self._emit(RESTING, order)
+            # Outside the coin lock: a resting order must not hold up the next one
+            await self._watch(order, ttl)
+        except asyncio.CancelledError:
+            if not order.done.done():
+                order.done.cancel()
+            raise
+        except Exception as e:
+            log.error(f"Order {order.cloid} failed: {e}")
+            self._finish(order, REJECTED, self._failed(order, str(e)))
+
+    async def _watch(self, order: ManagedOrder, ttl: Optional[float]):
+        """Poll a resting order until it fills, disappears or outlives its ttl"""
+        deadline = time.time() + ttl if ttl else None
+        while order.status not in DONE:
+            await asyncio.sleep(self.poll_interval)
+            if order.status in DONE:
+                return  # Cancelled through cancel() meanwhile
+            status = await self.executor.order_status(order.cloid)
+            if status in ("filled", "canceled", "rejected", "marginCanceled"):
+                filled = status == "filled"
+                result = order.result
+                if filled:
+                    result.filled_size, result.avg_price = order.size, result.avg_price or order.price
+                self._finish(order, FILLED if filled else CANCELLED, result)
+                return
+            if deadline and time.time() >= deadline:
+                if await self.executor.cancel_cloid(order.coin, order.cloid):
+                    self._finish(order, CANCELLED, order.result)
+                    return
+                deadline = None  # Cancel failed (most likely filled meanwhile): keep polling
+
+    def _failed(self, order: ManagedOrder, error: str):
+        from executor.hyperliquid import TradeResult
+        return TradeResult(success=False, order_id=order.oid, filled_size=0, avg_price=0,
+                           side=order.side, coin=order.coin, error=error)
+
+    def _finish(self, order: ManagedOrder, status: str, result):
+        if order.status in DONE:
+            return
+        order.result, order.finished = result, time.time()
+        self.orders.pop(order.cloid, None)
+        self._emit(status, order)
+        if not order.done.done():
+            order.done.set_result(result)
+
+    def _emit(self, status: str, order: ManagedOrder):
+        order.status = status
+        event = OrderEvent(status, order)
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # A slow subscriber loses its oldest events, not the order loop
+            queue.put_nowait(event)
@@ -0,0 +1,182 @@
+"""
+Execution Quality - Per-order timestamp traces, slippage and latency percentiles
+"""
+import json
+import time
+import logging
+from pathlib import Path
+from datetime import datetime
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, List, Tuple, Deque, Iterable
+
+from logconfig import journal
+
+log = logging.getLogger("bot")
+executions_log = logging.getLogger("bot.executions")
+
+EXECUTIONS_FILE = Path(__file__).parent.parent.parent / "state" / "executions.jsonl"
+
+# Trace timestamps in order; latency is reported for each consecutive pair and end to end
+STAMPS = ("signal", "risk", "sent", "acked", "filled")
+LATENCIES = ("signal_to_risk", "risk_to_sent", "sent_to_acked", "acked_to_filled", "signal_to_fill")
+SLIPPAGES = ("slippage_entry_bps", "slippage_mid_bps")
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class OrderTrace:
+    """One order's path from signal to fill. Timestamps are epoch seconds (time.time())."""
+    coin: str = "BTC"
+    side: str = ""                    # buy / sell / close
+    order_type: str = "market"        # market / limit / close
+    size: float = 0.0
+    entry_price: float = 0.0          # Signal.entry_price
+    mid: float = 0.0                  # Book mid (or last price) when the signal was made
+    signal: Optional[float] = None
+    risk: Optional[float] = None
+    sent: Optional[float] = None
+    acked: Optional[float] = None
+    filled: Optional[float] = None
+    fill_price: float = 0.0
+    filled_size: float = 0.0
+    order_id: Optional[int] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_signal(cls, signal, data: Optional[Dict[str, Any]] = None) -> "OrderTrace":
+        """Start a trace from a strategy signal and the market snapshot it was computed on"""
+        try:
+            created = datetime.fromisoformat(signal.timestamp).timestamp()
+        except (TypeError, ValueError):
+            created = time.time()
+        mid = 0.0
+        if data:
+            book = data.get("orderbook") or {}
+            mid = float(book.get("mid") or data.get("price") or 0)
+        return cls(entry_price=float(signal.entry_price or 0), mid=mid or float(signal.entry_price or 0),
+                   signal=created)
+
+    def mark(self, stamp: str, at: Optional[float] = None) -> "OrderTrace":
+        if stamp not in STAMPS:
+            raise ValueError(f"unknown trace stamp {stamp!r}")
+        setattr(self, stamp, time.time() if at is None else at)
+        return self
+
+    def latency_ms(self) -> Dict[str, float]:
+        """Milliseconds between consecutive stamps that were both recorded"""
+        out = {}
+        for (a, b), name in zip(zip(STAMPS, STAMPS[1:]), LATENCIES):
+            start, end = getattr(self, a), getattr(self, b)
+            if start is not None and end is not None:
+                out[name] = (end - start) * 1000
+        if self.signal is not None and self.filled is not None:
+            out["signal_to_fill"] = (self.filled - self.signal) * 1000
+        return out
+
+    def slippage_bps(self) -> Dict[str, float]:
+        """Signed cost in basis points: positive = filled worse than the reference"""
+        if not self.fill_price or self.side not in ("buy", "sell"):
+            return {}
+        direction = 1 if self.side == "buy" else -1
+        out = {}
+        for name, ref in zip(SLIPPAGES, (self.entry_price, self.mid)):
+            if ref:
+                out[name] = direction * (self.fill_price - ref) / ref * 10_000
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), **self.latency_ms(), **self.slippage_bps()}
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class ExecutionStats:
+    """Rolling window of traces per (coin, side, order type), appended to a JSONL log
+    by the logging writer thread (see logconfig.journal), never on the event loop.
+
+    Only completed (filled) traces count towards percentiles; rejected and
+    unfilled orders are counted separately so a bad venue day still shows up.
+    """
+
+    def __init__(self, window: int = 500, path: Optional[Path] = EXECUTIONS_FILE):
+        self.window = window
+        self.path = path
+        self.traces: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = {}
+        self.failed: Dict[Tuple[str, str, str], int] = {}
+
+    def record(self, trace: OrderTrace) -> Dict[str, Any]:
+        row = trace.to_dict()
+        self.add(row)
+        if self.path:
+            journal(executions_log, {self.path: json.dumps(row, default=str)})
+        return row
+
+    def add(self, row: Dict[str, Any]):
+        key = (row["coin"], row["side"], row["order_type"])
+        if row.get("filled") is None:
+            self.failed[key] = self.failed.get(key, 0) + 1
+            return
+        if key not in self.traces:
+            self.traces[key] = deque(maxlen=self.window)
+        self.traces[key].append(row)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """{"BTC/buy/market": {"fills": n, "failed": n, "signal_to_fill": {"p50": ..}, ..}}"""
+        out = {}
+        for key in sorted(set(self.traces) | set(self.failed)):
+            rows = self.traces.get(key, ())
+            group: Dict[str, Any] = {"fills": len(rows), "failed": self.failed.get(key, 0)}
+            for metric in LATENCIES + SLIPPAGES:
+                values = sorted(r[metric] for r in rows if r.get(metric) is not None)
+                if values:
+                    group[metric] = {f"p{p}": round(_percentile(values, p), 3) for p in PERCENTILES}
+                    group[metric]["mean"] = round(sum(values) / len(values), 3)
+            out["/".join(key)] = group
+        return out
+
+    def log_summary(self):
+        for key, group in self.summary().items():
+            latency = group.get("signal_to_fill", {})
+            slippage = group.get("slippage_mid_bps", {})
+            log.info(f"[exec {key}] fills={group['fills']} failed={group['failed']} "
+                     f"signal->fill p50={latency.get('p50', 0):.0f}ms p99={latency.get('p99', 0):.0f}ms "
+                     f"slippage vs mid p50={slippage.get('p50', 0):.2f}bps p90={slippage.get('p90', 0):.2f}bps")
+
+    @classmethod
+    def load(cls, path: Path = EXECUTIONS_FILE, window: int = 500,
+             since: Optional[float] = None) -> "ExecutionStats":
+        """Stats over the persisted log (no further appends)"""
+        stats = cls(window=window, path=None)
+        for row in _read_rows(path):
+            if since is None or (row.get("signal") or 0) >= since:
+                stats.add(row)
+        return stats
+
+
+def _read_rows(path: Path) -> Iterable[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+    except OSError:
+        return
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Latency and slippage percentiles from the execution log")
+    parser.add_argument("--path", type=Path, default=EXECUTIONS_FILE)
+    parser.add_argument("--window", type=int, default=10_000, help="most recent fills per group")
+    parser.add_argument("--hours", type=float, help="only orders signalled in the last N hours")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    print(json.dumps(ExecutionStats.load(args.path, args.window, since).summary(), indent=2))
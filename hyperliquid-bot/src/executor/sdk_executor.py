@@ -0,0 +1,313 @@
+"""
+SDK Executor - In-process signing with hyperliquid-python-sdk (no Node bridge)
+"""
+import os
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from dotenv import load_dotenv
+
+from executor.hyperliquid import HyperliquidExecutor, TradeResult
+from executor.orders import ManagedOrder
+
+load_dotenv(Path(__file__).parent.parent.parent / ".env")
+
+
+class SdkExecutor(HyperliquidExecutor):
+    """Same interface as HyperliquidExecutor, signing and posting from Python.
+
+    One Exchange client (one requests.Session) lives for the executor's
+    lifetime; asset ids and size decimals come from the meta it loads once.
+    Nonces are issued locally and strictly increase, so two actions in the
+    same millisecond (e.g. concurrent coins) never collide.
+    """
+
+    def __init__(self, mode: str = "paper", books=None, submit_timeout: float = 30.0,
+                 account: int = 1, base_url: Optional[str] = None):
+        self.base_url = base_url
+        self._exchange = None
+        self._nonce = 0
+        self._nonce_lock = threading.Lock()
+        super().__init__(mode=mode, books=books, submit_timeout=submit_timeout, account=account)
+
+    def _verify_setup(self):
+        pass  # Nothing to install beyond requirements.txt; credentials are checked on first use
+
+    @property
+    def exchange(self):
+        """Exchange client, created on first signed call (imports the SDK lazily)"""
+        if self._exchange is None:
+            import eth_account
+            from hyperliquid.exchange import Exchange
+            from hyperliquid.utils import constants
+
+            secret = os.getenv(f"HYPERLIQUID_SECRET_{self.account}") or os.getenv("HYPERLIQUID_API_SECRET")
+            wallet = os.getenv(f"HYPERLIQUID_WALLET_{self.account}") or os.getenv("HYPERLIQUID_WALLET_ADDRESS")
+            if not secret:
+                raise RuntimeError(f"No API secret found for Account {self.account}. "
+                                   f"Set HYPERLIQUID_SECRET_{self.account} in .env")
+            self._exchange = Exchange(eth_account.Account.from_key(secret),
+                                      self.base_url or constants.MAINNET_API_URL,
+                                      account_address=wallet)
+        return self._exchange
+
+    @property
+    def address(self) -> str:
+        exchange = self.exchange
+        return exchange.account_address or exchange.wallet.address
+
+    @property
+    def wallet(self) -> Optional[str]:
+        # Without a configured wallet the key's own address trades
+        return super().wallet or self.address
+
+    def _next_nonce(self) -> int:
+        with self._nonce_lock:
+            self._nonce = max(int(time.time() * 1000), self._nonce + 1)
+            return self._nonce
+
+    # === Signing ===
+
+    def _asset(self, coin: str) -> int:
+        return self.exchange.info.name_to_asset(coin)
+
+    def _round_size(self, coin: str, size: float) -> float:
+        return round(size, self.exchange.info.asset_to_sz_decimals[self._asset(coin)])
+
+    def _round_price(self, coin: str, price: float) -> float:
+        # Perp prices: 5 significant figures and at most 6 - szDecimals decimals
+        decimals = 6 - self.exchange.info.asset_to_sz_decimals[self._asset(coin)]
+        return round(float(f"{price:.5g}"), decimals)
+
+    def _market_price(self, coin: str, is_buy: bool, slippage: float) -> float:
+        mid = 0.0
+        if self.books is not None:
+            book = self.books.get(coin)
+            if book.ready:
+                mid = book.mid
+        if not mid:
+            mid = float(self.exchange.info.all_mids()[coin])
+        return self._round_price(coin, mid * (1 + slippage) if is_buy else mid * (1 - slippage))
+
+    def _post(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        from hyperliquid.utils.signing import sign_l1_action
+        exchange = self.exchange
+        nonce = self._next_nonce()
+        signature = sign_l1_action(exchange.wallet, action, exchange.vault_address, nonce,
+                                   exchange.expires_after, exchange.base_url == _mainnet_url())
+        return exchange._post_action(action, signature, nonce)
+
+    def _order_action(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from hyperliquid.utils.signing import order_request_to_order_wire, order_wires_to_order_action
+        from hyperliquid.utils.types import Cloid
+        wires = []
+        for o in orders:
+            request = {
+                "coin": o["coin"], "is_buy": o["is_buy"],
+                "sz": self._round_size(o["coin"], o["sz"]),
+                "limit_px": o["limit_px"], "order_type": o["order_type"],
+                "reduce_only": o.get("reduce_only", False),
+            }
+            if o.get("cloid"):
+                request["cloid"] = Cloid.from_str(o["cloid"])
+            wires.append(order_request_to_order_wire(request, self._asset(o["coin"])))
+        return order_wires_to_order_action(wires)
+
+    def bulk_orders(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One signed action for several orders: [{coin, is_buy, sz, limit_px, order_type, reduce_only?, cloid?}]"""
+        return self._wrap(self._post(self._order_action(orders)))
+
+    def bulk_cancel(self, cancels: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One signed action cancelling [{coin, oid}] and/or [{coin, cloid}]"""
+        by_oid = [{"a": self._asset(c["coin"]), "o": int(c["oid"])} for c in cancels if "oid" in c]
+        by_cloid = [{"asset": self._asset(c["coin"]), "cloid": c["cloid"]} for c in cancels if "cloid" in c]
+        result: Dict[str, Any] = {"success": True}
+        for action in ({"type": "cancel", "cancels": by_oid}, {"type": "cancelByCloid", "cancels": by_cloid}):
+            if action["cancels"]:
+                response = self._wrap(self._post(action))
+                result["success"] = result["success"] and response.get("success", False)
+                result.setdefault("responses", []).append(response)
+        return result
+
+    @staticmethod
+    def _wrap(response: Any) -> Dict[str, Any]:
+        """Exchange response in the bridge's shape, so _parse_order_result works unchanged"""
+        if isinstance(response, dict) and response.get("status") == "ok":
+            statuses = response.get("response", {}).get("data", {}).get("statuses", [])
+            errors = [s["error"] for s in statuses if isinstance(s, dict) and "error" in s]
+            if errors:
+                return {"error": "; ".join(errors)}
+            return {"success": True, "order": response}
+        return {"error": str(response.get("response") if isinstance(response, dict) else response)}
+
+    def _call(self, fn, *args) -> Dict[str, Any]:
+        try:
+            return fn(*args)
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _send(self, coin: str, size: float, is_buy: bool, price: float, tif: str = "Ioc",
+              reduce_only: bool = False, cloid: Optional[str] = None) -> Dict[str, Any]:
+        return self._call(self.bulk_orders, [{
+            "coin": coin, "is_buy": is_buy, "sz": size, "limit_px": price,
+            "order_type": {"limit": {"tif": tif}}, "reduce_only": reduce_only, "cloid": cloid,
+        }])
+
+    def _close_order(self, coin: str, size: Optional[float], slippage: float,
+                     cloid: Optional[str] = None) -> Dict[str, Any]:
+        position = self.get_position(coin)
+        held = float(position.get("szi", 0) or 0)
+        if not held:
+            return {"error": f"No open {coin} position"}
+        is_buy = held < 0
+        return self._send(coin, size or abs(held), is_buy, self._market_price(coin, is_buy, slippage),
+                          reduce_only=True, cloid=cloid)
+
+    # === Trading Operations ===
+
+    def market_open(self, coin: str, size: float, is_buy: bool, slippage: float = 0.01) -> TradeResult:
+        if self.mode == "paper":
+            return self._paper_trade(coin, size, is_buy)
+        result = self._send(coin, size, is_buy, self._market_price(coin, is_buy, slippage))
+        return self._parse_order_result(result, coin, "buy" if is_buy else "sell")
+
+    def market_close(self, coin: str, size: Optional[float] = None, slippage: float = 0.01) -> TradeResult:
+        if self.mode == "paper":
+            return super().market_close(coin, size, slippage)
+        return self._parse_order_result(self._close_order(coin, size, slippage), coin, "close")
+
+    def limit_order(self, coin: str, size: float, price: float, is_buy: bool) -> TradeResult:
+        if self.mode == "paper":
+            return self._paper_trade(coin, size, is_buy, price)
+        side = "buy" if is_buy else "sell"
+        trade = self._parse_order_result(
+            self._send(coin, size, is_buy, self._round_price(coin, price), tif="Gtc"), coin, side)
+        if trade.success and trade.order_id and trade.filled_size < size:
+            self.open_orders[trade.order_id] = {"coin": coin, "side": side, "size": size, "price": price}
+        return trade
+
+    def cancel_order(self, coin: str, order_id: int) -> bool:
+        if self.mode == "paper":
+            return True
+        success = self._call(self.bulk_cancel, [{"coin": coin, "oid": order_id}]).get("success", False)
+        if success:
+            self.open_orders.pop(order_id, None)
+        return success
+
+    def cancel_all(self, coin: Optional[str] = None) -> bool:
+        if self.mode == "paper":
+            return True
+        try:
+            resting = self.exchange.info.open_orders(self.address)
+        except Exception:
+            return False
+        cancels = [{"coin": o["coin"], "oid": o["oid"]} for o in resting if not coin or o["coin"] == coin]
+        success = not cancels or self._call(self.bulk_cancel, cancels).get("success", False)
+        if success:
+            self.open_orders = {oid: o for oid, o in self.open_orders.items()
+                                if coin and o["coin"] != coin}
+        return success
+
+    # === Async order lifecycle ===
+
+    async def submit(self, order: ManagedOrder, timeout: float = 30.0) -> TradeResult:
+        if self.mode == "paper":
+            return await super().submit(order, timeout)
+        loop = asyncio.get_running_loop()
+        # Signing and the POST run in a worker thread; a timeout abandons the thread's answer
+        result = await asyncio.wait_for(loop.run_in_executor(None, self._submit_sync, order), timeout)
+        trade = self._parse_order_result(result, order.coin, order.side)
+        if order.kind == "limit" and trade.success and trade.order_id and trade.filled_size < order.size:
+            self.open_orders[trade.order_id] = {
+                "coin": order.coin, "side": order.side, "size": order.size, "price": order.price,
+                "cloid": order.cloid
+            }
+        return trade
+
+    def _submit_sync(self, order: ManagedOrder) -> Dict[str, Any]:
+        try:
+            if order.kind == "close":
+                return self._close_order(order.coin, order.size or None, 0.01, order.cloid)
+            if order.kind == "limit":
+                return self._send(order.coin, order.size, order.is_buy,
+                                  self._round_price(order.coin, order.price), tif="Gtc", cloid=order.cloid)
+            return self._send(order.coin, order.size, order.is_buy,
+                              self._market_price(order.coin, order.is_buy, 0.01), cloid=order.cloid)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def cancel_cloid(self, coin: str, cloid: str) -> bool:
+        if self.mode == "paper":
+            return True
+        loop = asyncio.get_running_loop()
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(None, self._call, self.bulk_cancel, [{"coin": coin, "cloid": cloid}]), 15)
+        except asyncio.TimeoutError:
+            return False
+        if result.get("success", False):
+            self._forget(cloid)
+        return result.get("success", False)
+
+    # === Info Operations ===
+
+    def get_balance(self) -> Dict[str, float]:
+        try:
+            state = self.exchange.info.user_state(self.address)
+        except Exception:
+            return {"accountValue": 0, "totalMarginUsed": 0, "withdrawable": 0}
+        return {
+            "accountValue": state["marginSummary"]["accountValue"],
+            "totalMarginUsed": state["marginSummary"]["totalMarginUsed"],
+            "withdrawable": state["withdrawable"],
+        }
+
+    def get_position(self, coin: Optional[str] = None) -> Any:
+        positions = [p["position"] for p in self.exchange.info.user_state(self.address)["assetPositions"]]
+        if coin:
+            return next((p for p in positions if p["coin"] == coin), {"coin": coin, "size": 0})
+        return positions
+
+    def get_price(self, coin: str) -> float:
+        return float(self.exchange.info.all_mids().get(coin, 0))
+
+
+def _mainnet_url() -> str:
+    from hyperliquid.utils import constants
+    return constants.MAINNET_API_URL
+
+
+def _bench(executor, rounds: int) -> Dict[str, float]:
+    """Median milliseconds of read-only calls (no orders are placed)"""
+    import statistics
+    timings = {}
+    for name, call in (("price", lambda: executor.get_price("BTC")),
+                       ("balance", executor.get_balance),
+                       ("position", lambda: executor.get_position("BTC"))):
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the Node bridge and the in-process SDK backend")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--account", type=int, default=1)
+    args = parser.parse_args()
+
+    for name, make in (("node", lambda: HyperliquidExecutor(mode="live", account=args.account)),
+                       ("sdk", lambda: SdkExecutor(mode="live", account=args.account))):
+        try:
+            timings = _bench(make(), args.rounds)
+        except Exception as e:
+            print(f"{name:5s} unavailable: {e}")
+            continue
+        print(f"{name:5s} " + "  ".join(f"{k}={v:.0f}ms" for k, v in timings.items()))
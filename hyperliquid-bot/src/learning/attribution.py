@@ -0,0 +1,126 @@
+"""
+Attribution - Per-factor trade performance from reason codes, as vectorized group-bys
+"""
+import sys
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from strategy.reasons import Reason, trade_codes
+
+TRADE_JOURNAL = Path(__file__).parent.parent.parent / "state" / "trade-journal.jsonl"
+
+
+class TradeFrame:
+    """Closed trades as columns: codes (uint32), pnl, win, plus one float column per feature (NaN if absent)"""
+
+    def __init__(self, trades: Sequence[Dict[str, Any]]):
+        self.codes = np.fromiter((trade_codes(t) for t in trades), dtype=np.uint32, count=len(trades))
+        self.pnl = np.fromiter((float(t.get("pnl") or 0) for t in trades), dtype=float, count=len(trades))
+        self.win = self.pnl > 0
+        names = sorted({k for t in trades for k in (t.get("features") or {})})
+        self.features = {name: np.fromiter((float((t.get("features") or {}).get(name, np.nan)) for t in trades),
+                                           dtype=float, count=len(trades))
+                         for name in names}
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def flags(self) -> np.ndarray:
+        """(trades x factors) boolean matrix, one column per Reason flag"""
+        bits = np.array([int(flag) for flag in Reason], dtype=np.uint32)
+        return (self.codes[:, None] & bits[None, :]) != 0
+
+
+def _summary(trades: np.ndarray, wins: np.ndarray, pnl: np.ndarray) -> List[Dict[str, float]]:
+    return [{"trades": int(n), "wins": int(w), "win_rate": float(w / n) if n else 0.0,
+             "pnl": float(p), "avg_pnl": float(p / n) if n else 0.0}
+            for n, w, p in zip(trades, wins, pnl)]
+
+
+def by_factor(frame: TradeFrame) -> Dict[str, Dict[str, float]]:
+    """Performance of every trade carrying each factor (a trade counts once per factor it has)"""
+    if not len(frame):
+        return {}
+    flags = frame.flags()
+    rows = _summary(flags.sum(axis=0), flags.T @ frame.win.astype(np.int64), flags.T @ frame.pnl)
+    return {flag.name: row for flag, row in zip(Reason, rows) if row["trades"]}
+
+
+def by_combination(frame: TradeFrame, mask: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+    """Performance per exact code combination (optionally only the bits in `mask`)"""
+    if not len(frame):
+        return {}
+    codes = frame.codes & np.uint32(mask) if mask is not None else frame.codes
+    keys, index = np.unique(codes, return_inverse=True)
+    rows = _summary(np.bincount(index), np.bincount(index, weights=frame.win),
+                    np.bincount(index, weights=frame.pnl))
+    return {"+".join(flag.name for flag in Reason(int(key))) or "NONE": row for key, row in zip(keys, rows)}
+
+
+def by_feature(frame: TradeFrame, feature: str, bins: Sequence[float]) -> Dict[str, Dict[str, float]]:
+    """Performance per feature bucket, e.g. by_feature(frame, "rsi", [30, 50, 70])"""
+    values = frame.features.get(feature)
+    if values is None:
+        return {}
+    known = np.isfinite(values)
+    index = np.digitize(values[known], bins)
+    edges = ["-inf", *(f"{b:g}" for b in bins), "inf"]
+    size = len(bins) + 1
+    rows = _summary(np.bincount(index, minlength=size),
+                    np.bincount(index, weights=frame.win[known], minlength=size),
+                    np.bincount(index, weights=frame.pnl[known], minlength=size))
+    return {f"{edges[i]}..{edges[i + 1]}": row for i, row in enumerate(rows) if row["trades"]}
+
+
+def load_journal(path: Path = TRADE_JOURNAL) -> List[Dict[str, Any]]:
+    """Entries from the bot's structured trade journal (one JSON object per line)"""
+    trades = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    trades.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn last line while the bot is writing
+    except OSError:
+        pass
+    return trades
+
+
+def closed_trades(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Join journal closes to their entries on trade_id: each close gets the entry's reason codes and features.
+
+    Rows without an event (trade-history.json style) already carry their PnL and pass through.
+    """
+    entries = {row["trade_id"]: row for row in rows if row.get("event") == "entry" and row.get("trade_id")}
+    trades = []
+    for row in rows:
+        event = row.get("event")
+        if event == "close":
+            trades.append({**entries.get(row.get("trade_id"), {}), **row})
+        elif event is None and row.get("pnl") is not None:
+            trades.append(row)
+    return trades
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Per-factor performance of closed trades (JSON list or JSONL)")
+    parser.add_argument("trades", type=Path, nargs="?", default=TRADE_JOURNAL)
+    parser.add_argument("--feature", help="bucket by this feature instead, e.g. rsi")
+    parser.add_argument("--bins", type=float, nargs="+", default=[30, 50, 70])
+    args = parser.parse_args()
+
+    text = args.trades.read_text(encoding="utf-8-sig")
+    trades = json.loads(text) if text.lstrip().startswith("[") else load_journal(args.trades)
+    frame = TradeFrame(closed_trades(trades))
+    table = by_feature(frame, args.feature, args.bins) if args.feature else by_factor(frame)
+    print(f"{len(frame)} trades with PnL")
+    for key, row in sorted(table.items(), key=lambda kv: -kv[1]["pnl"]):
+        print(f"  {key:<28} {row['trades']:>5} trades  win {row['win_rate']:>5.1%}  "
+              f"pnl {row['pnl']:>+10.2f}  avg {row['avg_pnl']:>+8.2f}")
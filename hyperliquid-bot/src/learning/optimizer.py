@@ -0,0 +1,283 @@
+"""
+Online Optimizer - Re-scores StrategyEngine entry parameters on a sliding candle window
+and publishes improvements for the live bot to hot-swap (runs as its own process)
+"""
+import sys
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from learning.params import SPACE, PARAMS_FILE, publish, read
+
+log = logging.getLogger("optimizer")
+
+CONFIG_FILE = Path(__file__).parent.parent.parent / "config" / "strategy.json"
+KEYS = list(SPACE)
+LOW = np.array([SPACE[k][0] for k in KEYS], dtype=float)
+HIGH = np.array([SPACE[k][1] for k in KEYS], dtype=float)
+IS_INT = np.array([SPACE[k][2] for k in KEYS])
+
+DEFAULTS = {
+    "window": 2000,            # 1m candles scored per cycle (~33h)
+    "holdout": 0.3,            # Most recent share of the window a candidate must not lose on
+    "interval": 300,           # Seconds between cycles
+    "evaluations": 300,        # Candidates per cycle
+    "max_hold": 60,            # Bars before a simulated trade times out
+    "fee_pct": 0.0007,         # Round-trip taker fees
+    "min_trades": 5,
+    "min_improvement": 0.002,  # Confidence-weighted return the swap must add
+}
+
+
+# ========== Window evaluation ==========
+
+class Window:
+    """Candle window with everything that doesn't depend on entry params precomputed"""
+
+    def __init__(self, candles: List[Dict[str, Any]], risk: Dict[str, Any], max_hold: int, fee_pct: float):
+        self.close = np.array([float(c.get("c", c.get("close", 0))) for c in candles])
+        self.high = np.array([float(c.get("h", c.get("high", 0))) for c in candles])
+        self.low = np.array([float(c.get("l", c.get("low", 0))) for c in candles])
+        self.volume = np.array([float(c.get("v", c.get("volume", 0))) for c in candles])
+        self.fee_pct = fee_pct
+        self._rsi: Dict[int, np.ndarray] = {}
+        self._sma: Dict[int, np.ndarray] = {}
+        self._spike_base = self._volume_base()
+        self.outcomes = {side: self._exits(side, risk.get("stop_loss_pct", 0.02),
+                                           risk.get("take_profit_pct", 0.03), max_hold)
+                         for side in (1, -1)}
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def rsi(self, period: int) -> np.ndarray:
+        """StrategyEngine._calculate_rsi for every bar (simple mean of the last `period` moves)"""
+        if period not in self._rsi:
+            n = len(self.close)
+            out = np.full(n, 50.0)
+            if n > period:
+                deltas = np.diff(self.close)
+                gains = sliding_window_view(np.where(deltas > 0, deltas, 0), period).mean(axis=1)
+                losses = sliding_window_view(np.where(deltas < 0, -deltas, 0), period).mean(axis=1)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rsi = np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+                out[period:] = rsi
+            self._rsi[period] = out
+        return self._rsi[period]
+
+    def sma(self, period: int) -> np.ndarray:
+        if period not in self._sma:
+            out = np.zeros(len(self.close))
+            if len(self.close) >= period:
+                out[period - 1:] = sliding_window_view(self.close, period).mean(axis=1)
+            self._sma[period] = out
+        return self._sma[period]
+
+    def _volume_base(self) -> np.ndarray:
+        """Mean of the 19 volumes before each bar (StrategyEngine._check_volume_spike)"""
+        out = np.full(len(self.volume), np.inf)
+        if len(self.volume) >= 20:
+            out[19:] = sliding_window_view(self.volume[:-1], 19).mean(axis=1)
+        return out
+
+    def _exits(self, side: int, sl_pct: float, tp_pct: float, max_hold: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(return, exit bar) of a trade opened at each close; SL wins when both hit in one bar"""
+        n = len(self.close)
+        returns = np.zeros(n)
+        exits = np.full(n, n)
+        if n <= max_hold:
+            return returns, exits
+        entries = self.close[:n - max_hold]
+        highs = sliding_window_view(self.high[1:], max_hold)[:len(entries)]
+        lows = sliding_window_view(self.low[1:], max_hold)[:len(entries)]
+        if side == 1:
+            stop, target = entries * (1 - sl_pct), entries * (1 + tp_pct)
+            hit_stop, hit_target = lows <= stop[:, None], highs >= target[:, None]
+        else:
+            stop, target = entries * (1 + sl_pct), entries * (1 - tp_pct)
+            hit_stop, hit_target = highs >= stop[:, None], lows <= target[:, None]
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), max_hold)
+        first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), max_hold)
+        timeout = self.close[max_hold:max_hold + len(entries)]
+        ret = np.where(first_stop <= first_target, -sl_pct, tp_pct)
+        ret = np.where(np.minimum(first_stop, first_target) == max_hold, side * (timeout / entries - 1), ret)
+        returns[:len(entries)] = ret
+        exits[:len(entries)] = np.minimum(np.minimum(first_stop, first_target), max_hold - 1) + 1 + np.arange(len(entries))
+        return returns, exits
+
+    def scores(self, entry: Dict[str, Any]) -> np.ndarray:
+        """StrategyEngine._combine_signals for every bar"""
+        rsi = self.rsi(entry["rsi_period"])
+        oversold, overbought = entry["rsi_oversold"], entry["rsi_overbought"]
+        score = np.where(rsi < oversold, 0.4 * (oversold - rsi) / oversold,
+                         np.where(rsi > overbought, -0.4 * (rsi - overbought) / (100 - overbought), 0.0))
+        fast, slow = self.sma(entry["sma_fast"]), self.sma(entry["sma_slow"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ma = np.where((fast > 0) & (slow > 0), (fast - slow) / slow * 10, 0.0)
+        score = score + ma
+        score = np.where(self.volume > self._spike_base * entry["volume_spike_threshold"], score * 1.3, score)
+        score = np.clip(score, -1, 1)
+        score[:19] = 0.0  # analyze() needs 20 candles
+        return score
+
+    def evaluate(self, entry: Dict[str, Any], start: int = 0) -> Tuple[float, int]:
+        """Confidence-weighted net return of one-position-at-a-time trading from bar `start`"""
+        score = self.scores(entry)
+        signals = np.flatnonzero(np.abs(score[start:]) >= entry["min_confidence"]) + start
+        total, trades, free_at = 0.0, 0, 0
+        for i in signals:
+            if i < free_at:
+                continue
+            side = 1 if score[i] > 0 else -1
+            returns, exits = self.outcomes[side]
+            if exits[i] >= len(self.close):
+                break  # Not enough bars left to resolve the trade
+            total += min(abs(score[i]), 1.0) * (returns[i] - self.fee_pct)
+            trades += 1
+            free_at = exits[i]
+        return total, trades
+
+
+# ========== Sequential optimizer ==========
+
+def encode(entry: Dict[str, Any]) -> np.ndarray:
+    return np.clip((np.array([entry[k] for k in KEYS], dtype=float) - LOW) / (HIGH - LOW), 0, 1)
+
+
+def decode(u: np.ndarray) -> Dict[str, Any]:
+    values = LOW + np.clip(u, 0, 1) * (HIGH - LOW)
+    return {k: int(round(v)) if is_int else round(float(v), 4) for k, v, is_int in zip(KEYS, values, IS_INT)}
+
+
+def feasible(entry: Dict[str, Any]) -> bool:
+    return entry["sma_fast"] < entry["sma_slow"] and entry["rsi_oversold"] < entry["rsi_overbought"]
+
+
+class OnlineOptimizer:
+    """(1+1) evolution strategy with the 1/5th success rule, warm-started every cycle.
+
+    The search state (incumbent and step size) carries over between windows, so
+    each cycle continues from where the last one left off instead of restarting.
+    A set is only published when the optimum clearly beats the live set, and
+    then only a step of at most `learning.parameter_adjustment_rate` of each
+    parameter's range towards it, which must not score worse than the live set
+    over the window or its most recent part. Large moves happen over cycles.
+    """
+
+    def __init__(self, config: Dict[str, Any], seed: Optional[int] = None):
+        learning = config.get("learning", {})
+        self.settings = {**DEFAULTS, **learning.get("optimizer", {})}
+        self.rate = learning.get("parameter_adjustment_rate", 0.1)
+        self.sigma = self.rate
+        self.incumbent: Optional[np.ndarray] = None
+        self.rng = np.random.default_rng(seed)
+
+    def objective(self, window: Window, entry: Dict[str, Any]) -> float:
+        if not feasible(entry):
+            return -np.inf
+        total, trades = window.evaluate(entry)
+        # Soft penalty keeps a slope towards sets that trade at all
+        return total - 0.01 * max(0, self.settings["min_trades"] - trades)
+
+    def search(self, window: Window, start: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        x = self.incumbent if self.incumbent is not None else encode(start)
+        best = self.objective(window, decode(x))  # Re-score: the window moved
+        for _ in range(self.settings["evaluations"]):
+            candidate = np.clip(x + self.rng.normal(0, self.sigma, len(x)), 0, 1)
+            score = self.objective(window, decode(candidate))
+            if score >= best:  # Ties too, so the search can cross flat regions
+                x = candidate
+                if score > best:
+                    self.sigma = min(0.5, self.sigma * 1.5)
+                best = score
+            else:
+                self.sigma = max(0.01, self.sigma * 1.5 ** -0.25)
+        self.incumbent = x
+        return decode(x), best
+
+    def step(self, candles: List[Dict[str, Any]], config: Dict[str, Any],
+             live: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """One cycle; returns the parameter set to publish, or None to keep the live one"""
+        s = self.settings
+        window = Window(candles, config.get("risk", {}), s["max_hold"], s["fee_pct"])
+        best, best_score = self.search(window, live)
+        if best_score - self.objective(window, live) < s["min_improvement"]:
+            return None
+
+        # Step at most `rate` of each range towards the optimum; the step must not hurt
+        step = np.clip(encode(best) - encode(live), -self.rate, self.rate)
+        proposal = decode(encode(live) + step)
+        if not feasible(proposal) or proposal == {k: live[k] for k in KEYS}:
+            return None
+
+        holdout = int(len(window) * (1 - s["holdout"]))
+        live_score, _ = window.evaluate(live)
+        new_score, trades = window.evaluate(proposal)
+        live_recent, _ = window.evaluate(live, holdout)
+        new_recent, _ = window.evaluate(proposal, holdout)
+        log.info(f"window {len(window)} bars: live {live_score:+.4f} -> proposal {new_score:+.4f} "
+                 f"({trades} trades), recent {live_recent:+.4f} -> {new_recent:+.4f}, "
+                 f"optimum {best_score:+.4f}, sigma {self.sigma:.3f}")
+        if new_score < live_score or new_recent < live_recent:
+            return None
+        return {"entry": proposal, "score": new_score, "baseline": live_score, "trades": trades,
+                "window": {"bars": len(window), "start": candles[0].get("t"), "end": candles[-1].get("t")}}
+
+
+# ========== Worker ==========
+
+def load_config() -> Dict[str, Any]:
+    with open(CONFIG_FILE, encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def live_params(config: Dict[str, Any], path: Path = PARAMS_FILE) -> Dict[str, Any]:
+    """What the bot is trading with: last published set over strategy.json (engine defaults last)"""
+    entry = {"rsi_period": 14, "rsi_oversold": 30, "rsi_overbought": 70, "sma_fast": 9, "sma_slow": 21,
+             "volume_spike_threshold": 1.5, "min_confidence": 0.5}
+    entry.update({k: v for k, v in config.get("entry", {}).items() if k in SPACE})
+    published = read(path)
+    if published:
+        entry.update(published.get("entry", {}))
+    return entry
+
+
+def run_worker(once: bool = False, path: Path = PARAMS_FILE):
+    from data.hyperliquid_client import HyperliquidClient
+
+    client = HyperliquidClient()
+    optimizer = OnlineOptimizer(load_config())
+    while True:
+        config = load_config()  # Pick up manual edits every cycle
+        settings = optimizer.settings
+        coin = config.get("pair", "BTC").split("-")[0]
+        try:
+            candles = client.get_candles(coin, "1m", settings["window"])
+            started = time.perf_counter()
+            result = optimizer.step(candles, config, live_params(config, path))
+            if result:
+                version = publish(result.pop("entry"), result, path)
+                log.info(f"Published params v{version} ({time.perf_counter() - started:.2f}s)")
+        except Exception as e:
+            log.error(f"Optimization cycle failed: {e}")
+        if once:
+            return
+        time.sleep(settings["interval"])
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Background re-optimization of entry parameters")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%H:%M:%S")
+    run_worker(once=args.once)
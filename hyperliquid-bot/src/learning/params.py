@@ -0,0 +1,98 @@
+"""
+Hot Parameters - Entry parameter sets published by the optimizer and swapped in between ticks
+"""
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+log = logging.getLogger("bot")
+
+PARAMS_FILE = Path(__file__).parent.parent.parent / "state" / "params.json"
+
+# entry.* keys the optimizer may tune: (low, high, is_int)
+SPACE: Dict[str, Tuple[float, float, bool]] = {
+    "rsi_period": (7, 28, True),
+    "rsi_oversold": (15, 45, False),
+    "rsi_overbought": (55, 85, False),
+    "sma_fast": (3, 20, True),
+    "sma_slow": (15, 60, True),
+    "volume_spike_threshold": (1.1, 3.0, False),
+    "min_confidence": (0.2, 0.9, False),
+}
+
+
+def validate(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Known keys within bounds and internally consistent; raises ValueError otherwise"""
+    clean = {}
+    for key, value in entry.items():
+        if key not in SPACE:
+            raise ValueError(f"unknown parameter entry.{key}")
+        low, high, is_int = SPACE[key]
+        if not low <= value <= high:
+            raise ValueError(f"entry.{key}={value} outside [{low}, {high}]")
+        clean[key] = int(value) if is_int else float(value)
+    if clean.get("sma_fast", 0) >= clean.get("sma_slow", float("inf")):
+        raise ValueError("sma_fast must be shorter than sma_slow")
+    if clean.get("rsi_oversold", 0) >= clean.get("rsi_overbought", 100):
+        raise ValueError("rsi_oversold must be below rsi_overbought")
+    return clean
+
+
+def publish(entry: Dict[str, Any], meta: Dict[str, Any], path: Path = PARAMS_FILE) -> int:
+    """Atomically replace the published parameter set; returns its version"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    previous = read(path)
+    version = (previous or {}).get("version", 0) + 1
+    payload = {"version": version, "published_at": time.time(), "entry": validate(entry), **meta}
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return version
+
+
+def read(path: Path = PARAMS_FILE) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ParamWatcher:
+    """Polled once per tick: a stat() call unless the optimizer published something new"""
+
+    def __init__(self, strategy, path: Path = PARAMS_FILE):
+        self.strategy = strategy
+        self.path = path
+        self.version = 0
+        self._mtime = 0.0
+
+    def poll(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+
+        published = read(self.path)
+        if not published or published.get("version", 0) <= self.version:
+            return False
+        try:
+            entry = validate(published.get("entry", {}))
+        except ValueError as e:
+            log.warning(f"Ignoring published params v{published.get('version')}: {e}")
+            return False
+        self.version = published["version"]
+        changed = self.strategy.update_params(entry)
+        if changed:
+            log.info(f"Params v{self.version} applied: "
+                     + ", ".join(f"{k}={v}" for k, v in changed.items()))
+        return bool(changed)
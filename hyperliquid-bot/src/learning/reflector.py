@@ -67,14 +67,9 @@ class Reflector:
         longs = [t for t in trades if t.get("type") == "long"]
         shorts = [t for t in trades if t.get("type") == "short"]
         
-        # Analyze by reason/indicator
-        reason_performance = {}
-        for t in trades:
-            for reason in t.get("reason", "").split("; "):
-                if reason not in reason_performance:
-                    reason_performance[reason] = {"trades": 0, "pnl": 0}
-                reason_performance[reason]["trades"] += 1
-                reason_performance[reason]["pnl"] += t.get("pnl", 0)
+        # Analyze by reason code (parsed from the reason text for older trades)
+        from learning.attribution import TradeFrame, by_factor  # Deferred: pulls in numpy
+        reason_performance = by_factor(TradeFrame(trades))
         
         return {
             "total_trades": len(trades),
@@ -134,7 +129,7 @@ class Reflector:
         if analysis["win_rate"] < 0.4:
             recommendations.append({
                 "type": "parameter",
-                "target": "entry.confidence_threshold",
+                "target": "entry.min_confidence",
                 "action": "increase",
                 "reason": "Low win rate suggests being too aggressive on entries"
             })
@@ -0,0 +1,376 @@
+"""
+Review Generator - Incremental per-day / per-strategy trade summaries rendered into the review markdown
+"""
+import os
+import re
+import sys
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+USER_HOME = os.environ.get("USERPROFILE", "C:\\Users\\Default")
+MEMORY_DIR = Path(USER_HOME) / "clawd/memory/hyperliquid"
+STATE_FILE = Path(__file__).parent.parent.parent / "state" / "review-state.json"
+VERSION = 2
+
+STATS_HEADING = "## 📊 統計（自動更新）"
+# The generated block sits between these; everything else in trade-lessons.md stays hand-written
+STATS_BEGIN = "<!-- review.py: stats begin -->"
+STATS_END = "<!-- review.py: stats end -->"
+_GENERATED = ("- 確定トレード:", "- 勝率:", "- 累計PnL:", "- 最大ドローダウン:", "- 最大連敗:",
+              "- 最良戦略:", "- 最悪戦略:")
+_TAIL = 32                # Bytes before the history cursor that must be unchanged
+EQUITY_DAYS = 7
+
+
+def _bucket() -> Dict[str, float]:
+    return {"trades": 0, "wins": 0, "losses": 0, "pnl": 0.0, "win_pnl": 0.0, "loss_pnl": 0.0}
+
+
+def _add(bucket: Dict[str, float], pnl: float, win: bool):
+    bucket["trades"] += 1
+    bucket["pnl"] += pnl
+    if win:
+        bucket["wins"] += 1
+        bucket["win_pnl"] += pnl
+    else:
+        bucket["losses"] += 1
+        bucket["loss_pnl"] += pnl
+
+
+def _closed(trade: Dict[str, Any]) -> bool:
+    return trade.get("result") in ("win", "loss")
+
+
+class ReviewState:
+    """Running summaries plus the read positions needed to pick up only new input"""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data if data and data.get("version") == VERSION else {}
+        self.history = data.get("history", {"offset": 0, "tail": "", "count": 0, "seen": 0,
+                                            "mtime": 0.0, "size": 0, "pending": []})
+        self.journal = data.get("journal", {"offset": 0})
+        self.days: Dict[str, Dict[str, float]] = data.get("days", {})
+        self.strategies: Dict[str, Dict[str, float]] = data.get("strategies", {})
+        self.accounts: Dict[str, Dict[str, float]] = data.get("accounts", {})
+        self.kinds: Dict[str, Dict[str, float]] = data.get("kinds", {})
+        self.bot_entries: Dict[str, int] = data.get("bot_entries", {})
+        self.totals = data.get("totals", {**_bucket(), "peak": 0.0, "max_drawdown": 0.0,
+                                          "loss_streak": 0, "max_loss_streak": 0})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": VERSION, "history": self.history, "journal": self.journal, "days": self.days,
+                "strategies": self.strategies, "accounts": self.accounts, "kinds": self.kinds,
+                "bot_entries": self.bot_entries, "totals": self.totals}
+
+    def add_trade(self, trade: Dict[str, Any]) -> str:
+        """Fold one closed trade into every summary; returns its day"""
+        pnl = float(trade.get("pnl") or 0)
+        win = trade["result"] == "win"
+        day = str(trade.get("time", ""))[:10] or "unknown"
+        strategies = trade.get("strategy") or ["unknown"]
+        if isinstance(strategies, str):
+            strategies = [strategies]
+
+        _add(self.days.setdefault(day, _bucket()), pnl, win)
+        _add(self.accounts.setdefault(str(trade.get("account", "?")), _bucket()), pnl, win)
+        for name in strategies:
+            _add(self.strategies.setdefault(name, _bucket()), pnl, win)
+        kind = "confluence" if trade.get("confluence") or len(strategies) > 1 else "single"
+        _add(self.kinds.setdefault(kind, _bucket()), pnl, win)
+
+        totals = self.totals
+        _add(totals, pnl, win)
+        totals["peak"] = max(totals["peak"], totals["pnl"])
+        totals["max_drawdown"] = max(totals["max_drawdown"], totals["peak"] - totals["pnl"])
+        totals["loss_streak"] = 0 if win else totals["loss_streak"] + 1
+        totals["max_loss_streak"] = max(totals["max_loss_streak"], totals["loss_streak"])
+        return day
+
+
+class ReviewGenerator:
+    """Consumes trade-history.json and the bot journal from where the last run stopped.
+
+    trade-history.json is append-only in practice: only entries past the
+    processed count, plus earlier ones still pending, are folded in. The bot
+    journal (trades.md) is read from its last byte offset. A file that shrank
+    was rewritten, which triggers a full rebuild.
+    """
+
+    def __init__(self, memory_dir: Path = MEMORY_DIR, state_path: Path = STATE_FILE):
+        self.memory_dir = Path(memory_dir)
+        self.state_path = Path(state_path)
+        self.history_path = self.memory_dir / "trade-history.json"
+        self.journal_path = self.memory_dir / "trades.md"
+        self.state = ReviewState(self._load_state())
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp, self.state_path)
+
+    # ========== Ingest ==========
+
+    def ingest_history(self) -> int:
+        """Fold new closed trades in; returns how many were added.
+
+        Parsing resumes at `offset`, the first record that may still change (the
+        earliest pending trade, else the end of the last record): everything
+        before it is final. If the bytes just before the offset differ, the file
+        was rewritten and everything is rebuilt.
+        """
+        try:
+            stat = self.history_path.stat()
+        except OSError:
+            return 0
+        cursor = self.state.history
+        if stat.st_mtime == cursor["mtime"] and stat.st_size == cursor["size"]:
+            return 0  # Untouched since the last run: not even opened
+
+        offset = cursor["offset"]
+        if stat.st_size < offset:
+            raise RebuildNeeded("trade-history.json shrank")
+        with open(self.history_path, "rb") as f:
+            f.seek(offset - len(bytes.fromhex(cursor["tail"])))
+            if f.read(offset - f.tell()).hex() != cursor["tail"]:
+                raise RebuildNeeded("trade-history.json rewritten")
+            chunk = f.read()
+        try:
+            records = _parse_records(chunk, offset)
+        except ValueError:
+            return 0  # Mid-write by an agent; next run picks it up
+
+        added = 0
+        pending = set(cursor["pending"])
+        still_pending = []
+        end = offset
+        for index, (start, end, trade) in enumerate(records, cursor["count"]):
+            if index < cursor["seen"] and index not in pending:
+                continue  # Closed and counted on an earlier run
+            if _closed(trade):
+                self.state.add_trade(trade)
+                added += 1
+            else:
+                still_pending.append((index, start))
+
+        # Next run starts at the earliest trade still open
+        count, offset = (still_pending[0] if still_pending else (cursor["count"] + len(records), end))
+        with open(self.history_path, "rb") as f:
+            f.seek(max(0, offset - _TAIL))
+            tail = f.read(offset - f.tell())
+        cursor.update(offset=offset, tail=tail.hex(), count=count, seen=cursor["count"] + len(records),
+                      mtime=stat.st_mtime, size=stat.st_size, pending=[i for i, _ in still_pending])
+        return added
+
+    def ingest_journal(self) -> int:
+        """Count bot journal rows (| YYYY-MM-DD HH:MM | side | ...) appended since the last offset"""
+        try:
+            size = self.journal_path.stat().st_size
+        except OSError:
+            return 0
+        cursor = self.state.journal
+        if size < cursor["offset"]:
+            raise RebuildNeeded("trades.md shrank")
+        if size == cursor["offset"]:
+            return 0
+        with open(self.journal_path, "rb") as f:
+            f.seek(cursor["offset"])
+            chunk = f.read()
+        # Only consume complete lines; a half-written row is read next time
+        end = chunk.rfind(b"\n") + 1
+        added = 0
+        for line in chunk[:end].decode("utf-8", "ignore").splitlines():
+            match = re.match(r"\|\s*(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}\s*\|\s*(long|short)\s*\|", line)
+            if match:
+                day = match.group(1)
+                self.state.bot_entries[day] = self.state.bot_entries.get(day, 0) + 1
+                added += 1
+        cursor["offset"] += end
+        return added
+
+    # ========== Render ==========
+
+    def render_stats(self) -> str:
+        s = self.state
+        t = s.totals
+        lines = [
+            "# 📊 Trade Review Stats（自動生成）",
+            "",
+            f"*最終更新: {datetime.now().strftime('%Y-%m-%d %H:%M')} — learning/review.py*",
+            "",
+            "## サマリー",
+            "",
+            "| 確定トレード | 勝率 | 累計PnL | 平均勝ち | 平均負け | 最大DD | 最大連敗 | 未確定 |",
+            "|---|---|---|---|---|---|---|---|",
+            f"| {t['trades']} | {_rate(t)} | {_usd(t['pnl'])} | {_avg(t, 'win')} | {_avg(t, 'loss')} "
+            f"| {_usd(-t['max_drawdown'])} | {t['max_loss_streak']} | {len(s.history['pending'])} |",
+            "",
+            "## 日次",
+            "",
+            "| 日付 | トレード | 勝 | 負 | 勝率 | PnL | Botエントリー |",
+            "|---|---|---|---|---|---|---|",
+        ]
+        for day in sorted(set(s.days) | set(s.bot_entries), reverse=True):
+            d = s.days.get(day, _bucket())
+            lines.append(f"| {day} | {d['trades']} | {d['wins']} | {d['losses']} | {_rate(d)} "
+                         f"| {_usd(d['pnl'])} | {s.bot_entries.get(day, 0)} |")
+        lines += _table("戦略別", "戦略", s.strategies)
+        lines += _table("アカウント別", "Account", s.accounts)
+        lines += _table("Confluence vs Single", "種別", s.kinds)
+        lines += _equity_table(EQUITY_DAYS)
+        return "\n".join(lines) + "\n"
+
+    def render_lessons_stats(self) -> str:
+        t = self.state.totals
+        lines = [STATS_BEGIN, f"- 確定トレード: {t['trades']}", f"- 勝率: {_rate(t)}",
+                 f"- 累計PnL: {_usd(t['pnl'])}", f"- 最大ドローダウン: {_usd(-t['max_drawdown'])}",
+                 f"- 最大連敗: {t['max_loss_streak']}"]
+        if self.state.strategies:
+            best = max(self.state.strategies.items(), key=lambda kv: kv[1]["pnl"])
+            worst = min(self.state.strategies.items(), key=lambda kv: kv[1]["pnl"])
+            lines += [f"- 最良戦略: {best[0]} ({_usd(best[1]['pnl'])}, {_rate(best[1])})",
+                      f"- 最悪戦略: {worst[0]} ({_usd(worst[1]['pnl'])}, {_rate(worst[1])})"]
+        return "\n".join(lines + [STATS_END])
+
+    def write_lessons_stats(self):
+        """Replace only the marked block in trade-lessons.md; the rest of the file stays hand-written.
+
+        Without markers yet, the block goes right under the stats heading and the
+        bullets it supersedes are dropped from that section; nothing else is touched.
+        """
+        path = self.memory_dir / "trade-lessons.md"
+        try:
+            text = path.read_text(encoding="utf-8-sig")
+        except OSError:
+            return
+        block = self.render_lessons_stats()
+        start, end = text.find(STATS_BEGIN), text.find(STATS_END)
+        if 0 <= start < end:
+            _write_atomic(path, text[:start] + block + text[end + len(STATS_END):])
+            return
+        heading = text.find(STATS_HEADING)
+        if heading < 0:
+            return
+        body = text.find("\n", heading) + 1 or len(text)
+        section_end = min(i for i in (text.find("\n#", body), text.find("\n---", body), len(text)) if i >= 0)
+        kept = [line for line in text[body:section_end].split("\n") if not line.startswith(_GENERATED)]
+        _write_atomic(path, text[:body] + "\n" + block + "\n" + "\n".join(kept).lstrip("\n")
+                      + text[section_end:])
+
+    # ========== Run ==========
+
+    def update(self, force: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            added = self.ingest_history()
+            entries = self.ingest_journal()
+        except RebuildNeeded:
+            return self.rebuild()
+        if added or entries or force:
+            _write_atomic(self.memory_dir / "review-stats.md", self.render_stats())
+            if added or force:
+                self.write_lessons_stats()
+            self.save_state()
+        return {"trades": added, "bot_entries": entries, "seconds": time.perf_counter() - started}
+
+    def rebuild(self) -> Dict[str, Any]:
+        self.state = ReviewState()
+        return self.update(force=True)
+
+
+def _parse_records(chunk: bytes, offset: int) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """(start byte, end byte, record) for each top-level JSON array element in `chunk`, which begins at
+    byte `offset` of the file: at the opening bracket, between records or at a record start"""
+    text = chunk.decode("utf-8")
+    decoder = json.JSONDecoder()
+    records = []
+    pos, byte = 0, offset
+    while True:
+        skip = pos
+        while pos < len(text) and text[pos] in " \t\r\n,[\ufeff":
+            pos += 1
+        byte += len(text[skip:pos].encode("utf-8"))
+        if pos >= len(text) or text[pos] == "]":
+            if pos >= len(text) and chunk.strip():
+                raise ValueError("no closing bracket")  # Truncated mid-write
+            return records
+        record, end = decoder.raw_decode(text, pos)
+        start, byte = byte, byte + len(text[pos:end].encode("utf-8"))
+        records.append((start, byte, record))
+        pos = end
+
+
+class RebuildNeeded(Exception):
+    """An input was rewritten rather than appended to"""
+
+
+def _rate(b: Dict[str, float]) -> str:
+    return f"{b['wins'] / b['trades']:.1%}" if b["trades"] else "N/A"
+
+
+def _usd(value: float) -> str:
+    return f"-${-value:.2f}" if value < 0 else f"${value:.2f}"
+
+
+def _avg(b: Dict[str, float], kind: str) -> str:
+    count = b["wins"] if kind == "win" else b["losses"]
+    return _usd(b[f"{kind}_pnl"] / count) if count else "N/A"
+
+
+def _table(title: str, label: str, buckets: Dict[str, Dict[str, float]]) -> List[str]:
+    lines = ["", f"## {title}", "", f"| {label} | トレード | 勝率 | PnL | 平均勝ち | 平均負け |",
+             "|---|---|---|---|---|---|"]
+    for name, b in sorted(buckets.items(), key=lambda kv: -kv[1]["pnl"]):
+        lines.append(f"| {name} | {b['trades']} | {_rate(b)} | {_usd(b['pnl'])} "
+                     f"| {_avg(b, 'win')} | {_avg(b, 'loss')} |")
+    return lines
+
+
+def _equity_table(days: float) -> List[str]:
+    """Per-account equity over the last `days` from the dashboard's history (data/equity_store.py)"""
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    try:
+        from data.equity_store import EquityStore, accounts
+    except ImportError:
+        return []  # numpy not installed here
+    rows = []
+    for account in accounts():
+        summary = EquityStore.for_account(account).summary(days)
+        if summary:
+            rows.append(f"| {account[:10]}… | {_usd(summary['start'])} | {_usd(summary['end'])} "
+                        f"| {_usd(summary['change'])} | {_usd(-summary['max_drawdown'])} |")
+    if not rows:
+        return []
+    return ["", f"## エクイティ（{days:g}日）", "", "| Account | 開始 | 現在 | 増減 | 最大DD |",
+            "|---|---|---|---|---|"] + rows
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Update review markdown from new trades only")
+    parser.add_argument("--memory-dir", type=Path, default=MEMORY_DIR)
+    parser.add_argument("--state", type=Path, default=STATE_FILE)
+    parser.add_argument("--rebuild", action="store_true", help="discard the state and reprocess everything")
+    args = parser.parse_args()
+
+    generator = ReviewGenerator(args.memory_dir, args.state)
+    report = generator.rebuild() if args.rebuild else generator.update()
+    print(f"{report['trades']} new trades, {report['bot_entries']} new bot entries "
+          f"({report['seconds'] * 1000:.1f}ms)")
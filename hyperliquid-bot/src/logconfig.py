@@ -0,0 +1,199 @@
+"""
+Logging - Queue-based structured logging; the trading loop only pays for a queue put
+"""
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Any, Optional, Tuple
+
+LOG_DIR = Path(__file__).parent.parent / "state" / "logs"
+CONSOLE_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# Fields stamped on every record: tick, coin, account, mode, ...
+_context: contextvars.ContextVar = contextvars.ContextVar("log_context", default={})
+_listener: Optional[QueueListener] = None
+
+
+def bind(**fields):
+    """Add fields to the context of this task (asyncio tasks inherit it when created)"""
+    _context.set({**_context.get(), **fields})
+
+
+def current_context() -> Dict[str, Any]:
+    """Fields bound in this task, to hand over to work done in another task"""
+    return _context.get()
+
+
+def journal(logger: logging.Logger, lines: Dict[Path, str], **fields):
+    """Append one line per file from the writer thread; the first line and `fields` also land in the JSON log.
+
+    Skips the logger's level check, so trades are still journaled when `logging.level` is WARNING.
+    """
+    caller = sys._getframe(1)
+    record = logger.makeRecord(logger.name, logging.INFO, caller.f_code.co_filename, caller.f_lineno,
+                               next(iter(lines.values())), None, None, caller.f_code.co_name,
+                               extra={"journal": lines, "fields": fields})
+    logger.handle(record)
+
+
+class ContextQueueHandler(QueueHandler):
+    """Enqueues the record as-is; formatting and I/O happen in the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.context = _context.get()
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        if record.name != "bot":
+            entry["logger"] = record.name
+        entry.update(getattr(record, "context", {}))
+        entry.update(getattr(record, "fields", {}))
+        if getattr(record, "repeated", 0):
+            entry["repeated"] = record.repeated
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class DedupFilter(logging.Filter):
+    """Lets one warning/error per call site and message through every `window` seconds.
+
+    The next one that passes carries `repeated` = how many were dropped in
+    between, so a flapping API doesn't bury the log but isn't hidden either.
+    """
+
+    def __init__(self, window: float = 60.0):
+        super().__init__()
+        self.window = window
+        self._seen: Dict[Tuple[str, int, int, str], Tuple[float, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.window <= 0:
+            return True
+        # The unformatted msg: one template logged for different orders or coins stays separate
+        key = (record.pathname, record.lineno, record.levelno, str(record.msg))
+        last, dropped = self._seen.get(key, (0.0, 0))
+        if record.created - last < self.window:
+            self._seen[key] = (last, dropped + 1)
+            return False
+        self._seen[key] = (record.created, 0)
+        record.repeated = dropped
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        text = super().formatMessage(record)
+        return f"{text} (repeated {record.repeated}x)" if getattr(record, "repeated", 0) else text
+
+
+class JournalHandler(logging.Handler):
+    """Appends journal records (see journal()) to their own files"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return hasattr(record, "journal")
+
+    def emit(self, record: logging.LogRecord):
+        for path, line in record.journal.items():
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logging.getLogger("bot").error(f"Failed to append to {path}: {e}")
+
+
+class _NotJournal(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not hasattr(record, "journal")
+
+
+class _Listener(QueueListener):
+    """Writer thread; dedup runs here once per record, before any handler"""
+
+    def __init__(self, records, *handlers, dedup: DedupFilter):
+        super().__init__(records, *handlers, respect_handler_level=True)
+        self.dedup = dedup
+
+    def handle(self, record: logging.LogRecord):
+        if self.dedup.filter(record):
+            super().handle(record)
+
+
+def setup_logging(config: Optional[Dict[str, Any]] = None, name: str = "bot") -> QueueListener:
+    """Route the root logger through a queue to console, rotating JSON file and journals.
+
+    Config ("logging" section): level, console, file (default state/logs/<name>.jsonl),
+    max_bytes, backups, dedup_seconds.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    config = config or {}
+
+    handlers = []
+    if config.get("console", True):
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter(CONSOLE_FORMAT, datefmt="%H:%M:%S"))
+        console.addFilter(_NotJournal())
+        handlers.append(console)
+    path = Path(config.get("file") or LOG_DIR / f"{name}.jsonl")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = RotatingFileHandler(path, maxBytes=config.get("max_bytes", 10 * 1024 * 1024),
+                                       backupCount=config.get("backups", 5), encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    handlers.append(file_handler)
+    handlers.append(JournalHandler())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(ContextQueueHandler(records))
+    root.setLevel(config.get("level", "INFO"))
+
+    _listener = _Listener(records, *handlers, dedup=DedupFilter(config.get("dedup_seconds", 60)))
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush everything still queued (called at exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Measure what a log call costs the calling thread")
+    parser.add_argument("-n", type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_logging({"console": False, "file": str(LOG_DIR / "bench.jsonl")}, name="bench")
+    bind(tick=0, coin="BTC", account=1)
+    bench = logging.getLogger("bot")
+    start = time.perf_counter()
+    for i in range(args.n):
+        bench.info(f"tick {i} price {100000 + i:.2f}")
+    per_call = (time.perf_counter() - start) / args.n * 1e6
+    stop_logging()
+    print(f"{per_call:.2f}us per call -> {LOG_DIR / 'bench.jsonl'}")
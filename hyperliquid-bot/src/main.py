@@ -4,20 +4,30 @@ Hyperliquid Trading Bot - Main Entry Point
 import os
 import sys
 import json
+import signal
 import asyncio
+import logging
 from dotenv import load_dotenv
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from data.market import MarketData
-from strategy.engine import StrategyEngine
-from executor.hyperliquid import HyperliquidExecutor
+from data.market import create_market
+from strategy.engine import create_engine
+from strategy.position import PositionStateMachine, tick_time
+from executor.hyperliquid import create_executor
+from executor.quality import OrderTrace
+from data.resilience import backoff
 from risk.manager import RiskManager
+from risk.portfolio_gate import from_config as portfolio_gate
 from learning.reflector import Reflector
+from learning.params import ParamWatcher
+from snapshot import SnapshotWriter, load_snapshot, restore, capture, save_snapshot
+from logconfig import setup_logging, bind
 
 load_dotenv()
+log = logging.getLogger("bot")
 
 class TradingBot:
     def __init__(self, mode: str = "paper"):
@@ -25,12 +35,22 @@ class TradingBot:
         self.config = self._load_config()
         
         # Initialize modules
-        self.market = MarketData()
-        self.strategy = StrategyEngine(self.config)
-        self.executor = HyperliquidExecutor(mode=mode)
-        self.risk = RiskManager(self.config["risk"])
+        self.market = create_market(self.config)
+        self.strategy = create_engine(self.config)
+        self.params = ParamWatcher(self.strategy)
+        self.positions = PositionStateMachine(self.config.get("positions"), self.strategy)
+        self.executor = create_executor(mode, self.market.books, self.config.get("executor"))
+        self.risk = RiskManager(self.config["risk"], gate=portfolio_gate(self.config.get("portfolio_gate")))
         self.reflector = Reflector(self.config["learning"])
         
+        # Warm restart from the last snapshot, then only the gap is fetched
+        snapshot = load_snapshot()
+        if snapshot:
+            restore(snapshot, market=self.market, risk=self.risk, executor=self.executor,
+                    positions=self.positions)
+        self.snapshots = SnapshotWriter(self.config.get("snapshot_interval", 60), market=self.market,
+                                        risk=self.risk, executor=self.executor, positions=self.positions)
+        
         self.trade_count = 0
         self.running = False
         
@@ -41,47 +61,66 @@ class TradingBot:
     
     async def run(self):
         """Main trading loop"""
-        print(f"🤖 Starting bot in {self.mode} mode...")
+        log.info(f"🤖 Starting bot in {self.mode} mode...")
+        bind(coin="BTC", account=(self.config.get("executor") or {}).get("account", 1), mode=self.mode)
         self.running = True
+        tick = 0
+        failures = 0
         
         while self.running:
+            tick += 1
+            bind(tick=tick)
             try:
-                # 1. Get market data
+                # 1. Get market data (and any re-optimized parameters)
+                self.params.poll()
                 data = await self.market.get_latest()
+                await self.snapshots.maybe_save()
                 
                 # 2. Check risk limits
                 if not self.risk.can_trade():
-                    print("⚠️ Risk limit reached, pausing...")
+                    log.warning("⚠️ Risk limit reached, pausing...")
                     await asyncio.sleep(60)
                     continue
                 
-                # 3. Generate signal
-                signal = self.strategy.analyze(data)
+                # 3. Generate signal (dropped unless it changes the position)
+                signal = self.positions.decide(await self.strategy.analyze_async(data), now=tick_time(data))
                 
                 if signal:
                     # 4. Calculate position size
+                    trace = OrderTrace.from_signal(signal, data)
                     size = self.risk.calculate_position_size(signal)
+                    trace.mark("risk")
                     
                     # 5. Execute trade
-                    result = await self.executor.execute(signal, size)
+                    result = await self.executor.execute(signal, size, trace)
+                    closed = self.positions.on_result(signal, result, now=tick_time(data))
                     
                     if result:
                         self.trade_count += 1
-                        self.risk.record_trade(result)
+                        if closed:
+                            self.risk.record_trade(closed)  # Entry fills carry no PnL: only closes count as wins/losses
                         
                         # 6. Check if reflection needed
                         if self.trade_count % self.config["learning"]["reflection_interval"] == 0:
                             await self.reflector.reflect()
                 
+                failures = 0
                 await asyncio.sleep(1)  # 1 second interval
                 
             except Exception as e:
-                print(f"❌ Error: {e}")
-                await asyncio.sleep(5)
+                # Calls already ran under their endpoint deadline; back off instead of hammering a failing API
+                delay = 1 + backoff(failures, 1.0, 60.0)
+                failures += 1
+                log.error(f"❌ Error: {e} (retry in {delay:.1f}s)", exc_info=failures == 1)
+                await asyncio.sleep(delay)
     
     def stop(self):
         self.running = False
-        print("🛑 Bot stopped")
+        save_snapshot(capture(market=self.market, risk=self.risk, executor=self.executor,
+                              positions=self.positions))
+        if hasattr(self.strategy, "close"):
+            self.strategy.close()
+        log.info("🛑 Bot stopped")
 
 if __name__ == "__main__":
     import argparse
@@ -89,5 +128,15 @@ if __name__ == "__main__":
     parser.add_argument("--mode", default="paper", choices=["paper", "live"])
     args = parser.parse_args()
     
+    setup_logging()
     bot = TradingBot(mode=args.mode)
-    asyncio.run(bot.run())
+    
+    def terminate(signum, frame):
+        raise KeyboardInterrupt  # SIGTERM (systemd, docker stop) shuts down like Ctrl+C
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        asyncio.run(bot.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bot.stop()  # Final snapshot and worker shutdown
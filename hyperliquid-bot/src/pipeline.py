@@ -0,0 +1,252 @@
+"""
+Pipeline - ingest -> signal -> risk -> execute -> journal stages over bounded queues
+"""
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+
+from logconfig import bind, current_context
+from data.resilience import backoff
+
+log = logging.getLogger("bot")
+
+BLOCK = "block"        # Wait for room (nothing may be lost, e.g. the journal)
+COALESCE = "coalesce"  # Replace the oldest queued item (only the newest matters)
+DROP = "drop"          # Reject the new item when full
+
+
+@dataclass
+class Envelope:
+    tick: int
+    created: float                    # time.monotonic() at ingest
+    payload: Dict[str, Any] = field(default_factory=dict)
+    context: Dict[str, Any] = field(default_factory=dict)   # Log fields of the tick (tick id, mode, ...)
+
+
+class StageQueue:
+    """Bounded asyncio queue with a full-queue policy"""
+
+    def __init__(self, maxsize: int = 1, policy: str = COALESCE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+
+    async def put(self, item: Envelope):
+        if self.policy == BLOCK:
+            await self.queue.put(item)
+            return
+        if self.queue.full():
+            self.dropped += 1
+            if self.policy == DROP:
+                return
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    async def get(self) -> Envelope:
+        return await self.queue.get()
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+
+class Stage:
+    """Pulls envelopes from `inbox`, runs `handler(payload)`, forwards non-None results"""
+
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+                 inbox: StageQueue, outbox: Optional[StageQueue] = None, max_age: Optional[float] = None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.max_age = max_age
+        self.processed = 0
+        self.errors = 0
+        self.stale = 0
+        self.busy = 0.0
+
+    async def run(self):
+        while True:
+            envelope = await self.inbox.get()
+            if self.max_age is not None and time.monotonic() - envelope.created > self.max_age:
+                self.stale += 1  # Skip work that is already too old to act on
+                continue
+            bind(**envelope.context)
+            start = time.monotonic()
+            try:
+                result = await self.handler(envelope.payload)
+            except Exception as e:
+                self.errors += 1
+                log.error(f"[{self.name}] tick {envelope.tick}: {e}")
+                continue
+            finally:
+                self.busy += time.monotonic() - start
+            self.processed += 1
+            if result is not None and self.outbox is not None:
+                await self.outbox.put(Envelope(envelope.tick, envelope.created, result, envelope.context))
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "per_sec": self.processed / elapsed if elapsed else 0.0,
+            "avg_ms": self.busy / self.processed * 1000 if self.processed else 0.0,
+            "depth": self.inbox.depth(),
+            "dropped": self.inbox.dropped,
+            "stale": self.stale,
+            "errors": self.errors,
+        }
+
+
+class TradingPipeline:
+    """The run_bot loop split into concurrent stages.
+
+    A slow order no longer holds up the next fetch: fresh ticks coalesce in
+    front of the strategy, signals older than `max_signal_age` are dropped
+    before risk/execution, and only the journal applies backpressure.
+    """
+
+    def __init__(self, market, strategy, risk, executor, journal: Callable[[Dict], None],
+                 interval: float = 5.0, max_signal_age: float = 10.0,
+                 sleep=asyncio.sleep, on_tick: Optional[Callable[[], Awaitable[None]]] = None,
+                 positions=None, exits=None):
+        self.market = market
+        self.strategy = strategy
+        self.risk = risk
+        self.executor = executor
+        self.journal = journal
+        self.interval = interval
+        self.sleep = sleep
+        self.on_tick = on_tick
+        self.positions = positions
+        self.exits = exits
+        self.trade_count = 0
+        self.ticks = 0
+        self.started = time.monotonic()
+        self._risk_blocked = False
+
+        ticks = StageQueue(1, COALESCE)
+        signals = StageQueue(1, COALESCE)
+        orders = StageQueue(1, COALESCE)
+        trades = StageQueue(100, BLOCK)
+        self.stages: List[Stage] = [
+            Stage("signal", self._signal, ticks, signals),
+            Stage("risk", self._risk, signals, orders, max_age=max_signal_age),
+            Stage("execute", self._execute, orders, trades, max_age=max_signal_age),
+            Stage("journal", self._journal, trades),
+        ]
+        self.ticks_queue = ticks
+
+    # ========== Stages ==========
+
+    async def ingest(self):
+        failures = 0
+        while True:
+            try:
+                if self.on_tick:
+                    await self.on_tick()
+                data = await self.market.get_latest()
+                if self.exits:
+                    self.exits.on_price("BTC", data["price"])  # Stops don't wait for the strategy stage
+            except Exception as e:
+                # A failed fetch must not end ingest: every later stage would wait on it forever
+                delay = self.interval + backoff(failures, self.interval, 60.0)
+                failures += 1
+                log.error(f"[ingest] {e} (retry in {delay:.1f}s)", exc_info=failures == 1)
+                await self.sleep(delay)
+                continue
+            failures = 0
+            self.ticks += 1
+            bind(tick=self.ticks)
+            await self.ticks_queue.put(Envelope(self.ticks, time.monotonic(), {"data": data},
+                                                current_context()))
+            await self.sleep(self.interval)
+
+    async def _signal(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        from strategy.engine import SignalType
+        from executor.quality import OrderTrace
+        from strategy.position import tick_time
+        raw = await self.strategy.analyze_async(payload["data"])
+        signal = raw
+        if self.positions:
+            # Ask only: the order may still be dropped as stale before it reaches _execute
+            signal = self.positions.decide(raw, now=tick_time(payload["data"]), commit=False)
+        if not signal or signal.type == SignalType.NONE:
+            return None
+        return {"signal": signal, "raw": raw, "price": payload["data"]["price"], "data": payload["data"],
+                "trace": OrderTrace.from_signal(signal, payload["data"])}
+
+    async def _risk(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.risk.can_trade():
+            if not self._risk_blocked:
+                log.warning("Risk limit reached")
+            self._risk_blocked = True
+            return None
+        self._risk_blocked = False
+        signal = payload["signal"]
+        size = self.risk.calculate_position_size(signal)
+        payload["trace"].mark("risk")
+        log.info(f"SIGNAL: {signal.type.value.upper()} @ ${payload['price']:,.2f}")
+        log.info(f"  Reason: {signal.reason}")
+        log.info(f"  Size: {size:.6f} BTC")
+        return {**payload, "size": size}
+
+    async def _execute(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        from strategy.position import tick_time
+        signal, size = payload["signal"], payload["size"]
+        now = tick_time(payload["data"])
+        if self.positions:
+            signal = self.positions.decide(payload["raw"], now=now)
+            if not signal:
+                return None  # Another order changed the position since this signal was made
+        result = await self.executor.execute(signal, size, payload["trace"])
+        closed = self.positions.on_result(signal, result, now=now) if self.positions else None
+        if not result:
+            return None
+        self.trade_count += 1
+        if closed:
+            self.risk.record_trade(closed)  # Entry fills carry no PnL: only closes count as wins/losses
+        if self.exits:
+            self.exits.on_fill(signal, result)
+        log.info(f"Trade #{self.trade_count} executed @ ${result['price']:,.2f}")
+        if closed:
+            return closed
+        trade_id = self.positions.get(result["coin"]).trade_id if self.positions else str(result.get("order_id") or "")
+        return {"event": "entry", "trade_id": trade_id, "side": signal.type.value, "size": result["size"],
+                "entry": result["price"], "reason": signal.reason,
+                "reason_codes": signal.reason_codes, "features": signal.features}
+
+    async def _journal(self, payload: Dict[str, Any]) -> None:
+        # Blocking file I/O stays off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self.journal, payload)
+
+    # ========== Run ==========
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "ticks": self.ticks,
+            "trades": self.trade_count,
+            "stages": {stage.name: stage.stats(elapsed) for stage in self.stages},
+        }
+
+    async def report(self, every: float = 300.0):
+        while True:
+            await self.sleep(every)
+            for name, s in self.stats()["stages"].items():
+                log.info(f"[{name}] {s['processed']} done ({s['per_sec']:.2f}/s, {s['avg_ms']:.1f}ms avg) "
+                         f"depth={s['depth']} dropped={s['dropped']} stale={s['stale']} errors={s['errors']}")
+            quality = getattr(self.executor, "quality", None)
+            if quality:
+                quality.log_summary()
+
+    async def run(self, report_every: float = 300.0):
+        self.started = time.monotonic()
+        tasks = [asyncio.create_task(stage.run(), name=stage.name) for stage in self.stages]
+        tasks.append(asyncio.create_task(self.report(report_every), name="report"))
+        try:
+            await self.ingest()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
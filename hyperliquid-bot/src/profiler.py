@@ -0,0 +1,306 @@
+"""
+Profiler - On-demand stack sampling, slow-tick capture and event-loop lag detection
+"""
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from logconfig import journal
+
+log = logging.getLogger("bot")
+slow_ticks_log = logging.getLogger("bot.profiler")
+
+STATE_DIR = Path(__file__).parent.parent / "state"
+PROFILE_DIR = STATE_DIR / "profiles"
+CONTROL_FILE = STATE_DIR / "profile.on"   # Create to start sampling, delete to stop and dump
+
+
+def _stack(frame, limit: int = 64) -> List[str]:
+    """Innermost-first frame names ("func (file.py:firstline)"), stable across samples"""
+    names = []
+    while frame is not None and len(names) < limit:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return names
+
+
+def _where(frame) -> str:
+    """Innermost frame with its current line, for log messages"""
+    if frame is None:
+        return "?"
+    return f"{Path(frame.f_code.co_filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class StackSampler:
+    """Samples every thread's stack from a daemon thread into collapsed-stack counts.
+
+    The output ("thread;outer;...;inner count" per line) is what flamegraph.pl,
+    inferno and speedscope read.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.counts, self.samples, self.started = Counter(), 0, time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.counts
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            keys = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own or names.get(ident) == "loop-watchdog":
+                    continue
+                stack = _stack(frame)
+                stack.reverse()
+                keys.append(";".join([names.get(ident, str(ident))] + stack))
+            with self._lock:
+                self.counts.update(keys)
+                self.samples += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return self.counts.copy()
+
+    def dump(self, path: Path, counts: Optional[Counter] = None) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in (counts or self.counts).most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class LagMonitor:
+    """Heartbeat task on the event loop plus a watchdog thread.
+
+    The task wakes every `interval`; when it wakes late by more than
+    `threshold`, something blocked the loop. The watchdog notices the stall
+    while it is still happening and grabs the loop thread's stack, so the
+    warning names the blocking call (a subprocess.run, a file write, ...).
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_lag = 0.0
+        self.blocked: List[Dict[str, Any]] = []      # Recent stalls (bounded)
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._culprit: Optional[List[str]] = None
+        self._where = ""
+        self._stop = threading.Event()
+
+    async def run(self):
+        self._loop_thread = threading.get_ident()
+        watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                self._heartbeat = time.monotonic()
+                await asyncio.sleep(self.interval)
+                lag = time.monotonic() - self._heartbeat - self.interval
+                self.max_lag = max(self.max_lag, lag)
+                if lag > self.threshold:
+                    self._report(lag)
+        finally:
+            self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._culprit is None and time.monotonic() - self._heartbeat > self.threshold + self.interval:
+                frame = sys._current_frames().get(self._loop_thread)
+                self._where = _where(frame)
+                self._culprit = _stack(frame)
+
+    def pending(self) -> Optional[Dict[str, Any]]:
+        """The stall that just ended on this thread but has not been reported yet"""
+        if self._culprit is None:
+            return None
+        lag = time.monotonic() - self._heartbeat - self.interval
+        return {"at": time.time() - lag, "lag_ms": round(lag * 1000, 1), "stack": self._culprit}
+
+    def _report(self, lag: float):
+        stack, self._culprit = self._culprit or [], None
+        # "at" is when the stall began, so it can be matched to the tick it happened in
+        self.blocked.append({"at": time.time() - lag, "lag_ms": round(lag * 1000, 1), "stack": stack})
+        del self.blocked[:-50]
+        log.warning(f"Event loop blocked {lag * 1000:.0f}ms in {self._where or '?'}"
+                    + (f" <- {' <- '.join(stack[1:4])}" if len(stack) > 1 else ""))
+        self._where = ""
+
+    def stop(self):
+        self._stop.set()
+
+
+class Profiler:
+    """Lag monitor (always on), on-demand sampling and slow-tick records for the trading loop.
+
+    Sampling starts when CONTROL_FILE appears (or on SIGUSR1 where available)
+    and stops when it is deleted, after `duration_seconds`, or on the next
+    SIGUSR1; the profile is then written to state/profiles/*.folded. The
+    control file may hold {"seconds": .., "interval_ms": ..}.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, out_dir: Path = PROFILE_DIR,
+                 control: Path = CONTROL_FILE):
+        config = config or {}
+        self.slow_tick = config.get("slow_tick_seconds", 2.0)
+        self.duration = config.get("duration_seconds", 60)
+        self.out_dir = out_dir
+        self.control = control
+        self.lag = LagMonitor(config.get("lag_threshold_ms", 250) / 1000)
+        self.sampler = StackSampler(config.get("sample_interval_ms", 5) / 1000)
+        self._deadline = 0.0
+        self._by_signal = False
+        self._tick_started: Optional[float] = None
+        self._tick_wall = 0.0
+        self._tick_counts: Optional[Counter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the lag monitor; call from inside the running loop"""
+        loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self.lag.run(), name="lag-monitor")
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                loop.add_signal_handler(signal.SIGUSR1, self.toggle)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Not the main thread / not supported: the control file still works
+
+    def stop(self):
+        if self.sampler.running:
+            self._finish()
+        self.lag.stop()
+        if self._task:
+            self._task.cancel()
+
+    # ========== Sampling control ==========
+
+    def toggle(self):
+        if self.sampler.running:
+            self._finish()
+        else:
+            self._by_signal = True
+            self._begin(self.duration, self.sampler.interval)
+
+    def poll(self):
+        """Once per tick: a stat() of the control file and a deadline check"""
+        exists = self.control.exists()
+        if not self.sampler.running and exists:
+            try:
+                options = json.loads(self.control.read_text(encoding="utf-8") or "{}")
+            except (OSError, ValueError):
+                options = {}
+            self._by_signal = False
+            self._begin(options.get("seconds", self.duration),
+                        options.get("interval_ms", self.sampler.interval * 1000) / 1000)
+        elif self.sampler.running and ((not exists and not self._by_signal) or time.time() >= self._deadline):
+            self._finish()
+
+    def _begin(self, seconds: float, interval: float):
+        self.sampler.interval = interval
+        self._deadline = time.time() + seconds
+        self.sampler.start()
+        log.info(f"Profiling started ({seconds:.0f}s max, every {interval * 1000:.0f}ms)")
+
+    def _finish(self):
+        counts = self.sampler.stop()
+        path = self.out_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded"
+        # Written by its own (non-daemon) thread: a big profile must not stall the loop, even at exit
+        threading.Thread(target=self._dump, args=(path, counts), name="profile-dump").start()
+        log.info(f"Profiling stopped: {self.sampler.samples} samples -> {path}")
+        if self.control.exists() and time.time() >= self._deadline:
+            try:
+                self.control.unlink()  # Expired: remove so the next tick doesn't restart it
+            except OSError:
+                pass
+
+    def _dump(self, path: Path, counts: Counter):
+        try:
+            self.sampler.dump(path, counts)
+        except OSError as e:
+            log.error(f"Failed to write profile {path}: {e}")
+
+    # ========== Slow ticks ==========
+
+    def tick_start(self):
+        self._tick_started, self._tick_wall = time.monotonic(), time.time()
+        self._tick_counts = self.sampler.snapshot() if self.sampler.running else None
+
+    def tick_end(self):
+        if self._tick_started is None:
+            return
+        duration, self._tick_started = time.monotonic() - self._tick_started, None
+        if duration < self.slow_tick:
+            return
+        record: Dict[str, Any] = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration * 1000, 1),
+            "blocked": [b for b in self.lag.blocked if b["at"] >= self._tick_wall],
+        }
+        pending = self.lag.pending()
+        if pending:
+            record["blocked"].append(pending)
+        if self._tick_counts is not None:
+            during = self.sampler.snapshot() - self._tick_counts
+            record["stacks"] = [f"{stack} {count}" for stack, count in during.most_common(50)]
+        log.warning(f"Slow tick: {duration * 1000:.0f}ms"
+                    + (f", loop blocked {len(record['blocked'])}x" if record["blocked"] else ""))
+        journal(slow_ticks_log, {self.out_dir / "slow-ticks.jsonl": json.dumps(record)})
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "sampling": self.sampler.running,
+            "samples": self.sampler.samples,
+            "max_lag_ms": round(self.lag.max_lag * 1000, 1),
+            "blocked": len(self.lag.blocked),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Switch sampling on/off in the running bot")
+    parser.add_argument("command", choices=["on", "off"])
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    if args.command == "on":
+        CONTROL_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CONTROL_FILE.write_text(json.dumps({"seconds": args.seconds, "interval_ms": args.interval_ms}))
+        print(f"Sampling starts on the next tick; profile lands in {PROFILE_DIR}")
+    else:
+        CONTROL_FILE.unlink(missing_ok=True)
+        print(f"Sampling stops on the next tick; profile lands in {PROFILE_DIR}")
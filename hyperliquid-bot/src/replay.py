@@ -0,0 +1,249 @@
+"""
+Record & Replay - Capture live sessions and push them back through run_bot at CPU speed
+"""
+import sys
+import gzip
+import json
+import time
+import asyncio
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterator
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+class ReplayFinished(Exception):
+    """The recording has no more market ticks"""
+
+
+# ========== Recording ==========
+
+class Recorder:
+    """Appends {"t", "kind", "data"} records to a gzip JSON-lines file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.path, "at", encoding="utf-8", compresslevel=1)
+        self.count = 0
+
+    def write(self, kind: str, data: Any):
+        record = {"t": time.time(), "kind": kind, "data": data}
+        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+        self.count += 1
+        if self.count % 100 == 0:
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _signal_dict(signal) -> Dict[str, Any]:
+    return {
+        "type": signal.type.value,
+        "confidence": round(signal.confidence, 6),
+        "reason": signal.reason,
+        "reason_codes": signal.reason_codes,
+        "entry_price": signal.entry_price,
+        "stop_loss": signal.stop_loss,
+        "take_profit": signal.take_profit,
+    }
+
+
+class RecordingMarket:
+    """Wraps MarketData and records every get_latest payload"""
+
+    def __init__(self, market, recorder: Recorder):
+        self._market = market
+        self._recorder = recorder
+
+    async def get_latest(self) -> Dict[str, Any]:
+        data = await self._market.get_latest()
+        self._recorder.write("market", data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._market, name)
+
+
+class RecordingExecutor:
+    """Wraps HyperliquidExecutor and records every execute() call and response"""
+
+    def __init__(self, executor, recorder: Recorder):
+        self._executor = executor
+        self._recorder = recorder
+
+    async def execute(self, signal, size: float, trace=None) -> Optional[Dict]:
+        result = await self._executor.execute(signal, size, trace)
+        self._recorder.write("execute", {"signal": _signal_dict(signal), "size": size, "result": result})
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._executor, name)
+
+
+# ========== Replay ==========
+
+def read_recording(path: Path) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return  # Truncated tail of a live recording
+
+
+class VirtualClock:
+    """Clock that jumps instead of waiting; pass `clock.sleep` to run_bot"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.slept = 0.0
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+        self.slept += seconds
+        await asyncio.sleep(0)
+
+    def today(self) -> date:
+        return date.fromtimestamp(self.now)
+
+
+class ReplayMarket:
+    """Serves recorded payloads by virtual time, skipping ticks the loop slept through"""
+
+    books = None
+
+    def __init__(self, records: List[Dict[str, Any]], clock: VirtualClock):
+        self.ticks = [r for r in records if r["kind"] == "market"]
+        self.clock = clock
+        self.index = 0
+        self.last_price = None
+        if self.ticks and not clock.now:
+            clock.now = self.ticks[0]["t"]
+
+    async def get_latest(self) -> Dict[str, Any]:
+        if self.index >= len(self.ticks):
+            raise ReplayFinished()
+        # Latest tick at or before "now"; if none is due yet, jump ahead to the next one
+        while self.index + 1 < len(self.ticks) and self.ticks[self.index + 1]["t"] <= self.clock.now:
+            self.index += 1
+        tick = self.ticks[self.index]
+        self.clock.now = max(self.clock.now, tick["t"])
+        self.index += 1
+        self.last_price = tick["data"].get("price")
+        return tick["data"]
+
+
+class ReplayExecutor:
+    """Answers execute() from the recorded responses, in order; collects emitted signals"""
+
+    def __init__(self, records: List[Dict[str, Any]], clock: VirtualClock):
+        self.responses = [r["data"] for r in records if r["kind"] == "execute"]
+        self.clock = clock
+        self.signals: List[Dict[str, Any]] = []
+        self._next = 0
+
+    async def execute(self, signal, size: float, trace=None) -> Optional[Dict]:
+        emitted = _signal_dict(signal)
+        emitted.update(t=self.clock.now, size=size)
+        self.signals.append(emitted)
+
+        if self._next < len(self.responses):
+            recorded = self.responses[self._next]
+            self._next += 1
+            if recorded["signal"]["type"] == emitted["type"]:
+                return recorded["result"]
+        # Diverged from the recording: synthesize a paper fill
+        return {"coin": "BTC", "side": "buy" if emitted["type"] == "long" else "sell",
+                "size": size, "price": signal.entry_price, "order_id": 0, "pnl": 0}
+
+    def to_state(self) -> Dict[str, Any]:
+        return {}
+
+    def load_state(self, state: Dict[str, Any]):
+        pass
+
+
+def compare_signals(expected: List[Dict], actual: List[Dict], tolerance: float = 1e-6) -> List[str]:
+    """Differences between two replay signal lists (for regression checks)"""
+    diffs = []
+    if len(expected) != len(actual):
+        diffs.append(f"signal count {len(expected)} -> {len(actual)}")
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a["type"] != b["type"] or abs(a["t"] - b["t"]) > tolerance:
+            diffs.append(f"#{i}: {a['type']}@{a['t']:.0f} -> {b['type']}@{b['t']:.0f}")
+        elif abs(a["confidence"] - b["confidence"]) > tolerance:
+            diffs.append(f"#{i}: confidence {a['confidence']} -> {b['confidence']}")
+    return diffs
+
+
+async def replay(path: Path, mode: str = "paper") -> Dict[str, Any]:
+    """Run a recording through the unchanged run_bot loop"""
+    from run import run_bot
+
+    records = list(read_recording(path))
+    clock = VirtualClock()
+    market = ReplayMarket(records, clock)
+    executor = ReplayExecutor(records, clock)
+    start = clock.now
+
+    started = time.perf_counter()
+    try:
+        await run_bot(market=market, executor=executor, mode=mode, sleep=clock.sleep,
+                      journal=lambda trade: None, snapshots=False, hot_params=False,
+                      profile=False, today=clock.today, portfolio=False)
+    except ReplayFinished:
+        pass
+    elapsed = time.perf_counter() - started
+
+    return {
+        "ticks": market.index,
+        "virtual_seconds": clock.now - start,
+        "wall_seconds": elapsed,
+        "speedup": (clock.now - start) / elapsed if elapsed else 0.0,
+        "signals": executor.signals,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session")
+    parser.add_argument("recording", type=Path)
+    parser.add_argument("--expect", type=Path, help="signals JSON from a previous replay to diff against")
+    parser.add_argument("--save-signals", type=Path, help="write emitted signals as JSON")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile and print hot spots")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s",
+                        datefmt="%H:%M:%S")
+    if not args.verbose:
+        logging.getLogger("bot").setLevel(logging.WARNING)
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        report = asyncio.run(replay(args.recording))
+        profiler.disable()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        report = asyncio.run(replay(args.recording))
+
+    print(f"Replayed {report['ticks']} ticks / {report['virtual_seconds']:.0f}s virtual "
+          f"in {report['wall_seconds']:.2f}s ({report['speedup']:.0f}x), "
+          f"{len(report['signals'])} signals")
+
+    if args.save_signals:
+        args.save_signals.write_text(json.dumps(report["signals"], indent=2))
+    if args.expect:
+        diffs = compare_signals(json.loads(args.expect.read_text()), report["signals"])
+        for d in diffs:
+            print(f"  DIFF {d}")
+        print("✅ Signals match" if not diffs else f"❌ {len(diffs)} differences")
+        sys.exit(1 if diffs else 0)
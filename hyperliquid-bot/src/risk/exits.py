@@ -0,0 +1,267 @@
+"""
+Exit Engine - Tick-driven stop-loss, take-profit, break-even and trailing stops with reduce-only closes
+"""
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, List, Callable
+
+log = logging.getLogger("bot")
+
+INITIAL = 0        # Stop at stop_loss_pct
+BREAKEVEN = 1      # Stop moved to entry (plus fees)
+TRAILING = 2       # Stop follows the best price
+
+STAGES = ("initial", "breakeven", "trailing")
+
+
+@dataclass
+class ExitState:
+    coin: str
+    side: int                  # +1 long, -1 short
+    size: float
+    entry: float
+    stop: float                # Only ever moves in the position's favour
+    target: float              # Take-profit price, 0 = none
+    best: float                # Most favourable price seen since entry
+    stage: int = INITIAL
+    since: float = 0.0         # When tracking started (account sync grace period)
+    exiting: str = ""          # cloid of the reduce-only close in flight
+
+    def gain(self, price: float) -> float:
+        """Favourable move from entry as a fraction (negative = against)"""
+        return self.side * (price - self.entry) / self.entry
+
+
+class ExitEngine:
+    """Evaluates every tracked position on each price update and closes it reduce-only on a trigger.
+
+    Replaces the 10-minute CRO check (position-monitor.md): break-even at
+    +1%, trailing from +1.5%. The stop and target are checked on every price,
+    and a hit goes straight to the order manager, so the close is sent on the
+    same tick. Prices come from the trading loop (on_price) and from a fast
+    allMids poll (start); the account poll adopts positions opened elsewhere
+    and drops ones closed by hand.
+
+    The account poll also feeds `on_account` (the position state machine's
+    sync), so it keeps running with "enabled": false; only the stops are off.
+
+    Config ("exits" section, all optional):
+        enabled true
+        stop_loss_pct / take_profit_pct   default: risk section
+        breakeven_at_pct 0.01, breakeven_offset_pct 0.0005 (covers fees)
+        trail_at_pct 0.015, trail_pct 0.005 (distance from the best price)
+        price_interval 0.5, account_interval 5, adopt true
+    """
+
+    def __init__(self, executor, config: Optional[Dict[str, Any]] = None,
+                 risk_config: Optional[Dict[str, Any]] = None,
+                 on_exit: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_account: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        config, risk_config = config or {}, risk_config or {}
+        self.executor = executor
+        self.enabled = config.get("enabled", True)
+        self.stop_loss = config.get("stop_loss_pct", risk_config.get("stop_loss_pct", 0.02))
+        self.take_profit = config.get("take_profit_pct", risk_config.get("take_profit_pct", 0.03))
+        self.breakeven_at = config.get("breakeven_at_pct", 0.01)
+        self.breakeven_offset = config.get("breakeven_offset_pct", 0.0005)
+        self.trail_at = config.get("trail_at_pct", 0.015)
+        self.trail = config.get("trail_pct", 0.005)
+        self.price_interval = config.get("price_interval", 0.5)
+        self.account_interval = config.get("account_interval", 5)
+        self.adopt = config.get("adopt", True)
+        self.on_exit = on_exit
+        self.on_account = on_account
+        self.positions: Dict[str, ExitState] = {}
+        self.exits: List[Dict[str, Any]] = []       # Recent exits (bounded)
+        self._client = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ========== Positions ==========
+
+    def track(self, coin: str, size: float, entry: float, stop: Optional[float] = None,
+              target: Optional[float] = None, now: Optional[float] = None) -> Optional[ExitState]:
+        """Protect a position (signed size); keeps the stop already earned if it is the same position"""
+        if not self.enabled:
+            return None
+        side = 1 if size > 0 else -1
+        pos = self.positions.get(coin)
+        if pos and pos.side == side and abs(pos.entry - entry) / entry < 1e-6:
+            pos.size = abs(size)
+            return pos
+        pos = ExitState(
+            coin=coin, side=side, size=abs(size), entry=entry,
+            stop=stop or entry * (1 - side * self.stop_loss),
+            target=target if target is not None else entry * (1 + side * self.take_profit),
+            best=entry, since=time.time() if now is None else now,
+        )
+        self.positions[coin] = pos
+        log.info(f"{coin} exits armed: {'long' if side > 0 else 'short'} {pos.size} @ ${entry:,.2f}, "
+                 f"SL ${pos.stop:,.2f}" + (f", TP ${pos.target:,.2f}" if pos.target else ""))
+        return pos
+
+    def untrack(self, coin: str):
+        self.positions.pop(coin, None)
+
+    def on_fill(self, signal, result: Dict[str, Any]):
+        """Arm the stops for an executed entry (the signal's SL/TP), disarm them after a CLOSE"""
+        kind = signal.type.value
+        if kind == "close":
+            self.untrack(result["coin"])
+        elif result.get("price") and result.get("size"):
+            size = result["size"] if kind == "long" else -result["size"]
+            self.track(result["coin"], size, result["price"], signal.stop_loss, signal.take_profit)
+
+    def sync(self, asset_positions: List[Dict[str, Any]], now: Optional[float] = None):
+        """Reconcile with clearinghouseState.assetPositions"""
+        now = time.time() if now is None else now
+        held = {}
+        for item in asset_positions:
+            p = item.get("position", item)
+            size = float(p.get("szi") or 0)
+            if abs(size) > 1e-9:
+                held[p["coin"]] = (size, float(p.get("entryPx") or 0))
+        for coin, (size, entry) in held.items():
+            pos = self.positions.get(coin)
+            if (pos is None or pos.side * size < 0) and self.adopt and entry:
+                self.track(coin, size, entry, now=now)  # Opened elsewhere, or flipped by hand
+            elif pos and not pos.exiting:
+                pos.size = abs(size)  # Partial fills / manual reductions
+        for coin in list(self.positions):
+            pos = self.positions[coin]
+            # A fresh fill may not be in the account state yet
+            if coin not in held and not pos.exiting and now - pos.since > 2 * self.account_interval:
+                log.info(f"{coin} position gone from the account, exits disarmed")
+                self.untrack(coin)
+
+    # ========== Rules ==========
+
+    def on_price(self, coin: str, price: float) -> Optional[str]:
+        """Advance the position's stop and fire a reduce-only close if it is hit; returns the trigger"""
+        pos = self.positions.get(coin)
+        if pos is None or pos.exiting or not price:
+            return None
+        if pos.side * (price - pos.best) > 0:
+            pos.best = price
+
+        peak = pos.gain(pos.best)
+        if pos.stage < BREAKEVEN and peak >= self.breakeven_at:
+            self._raise_stop(pos, pos.entry * (1 + pos.side * self.breakeven_offset), BREAKEVEN)
+        if peak >= self.trail_at:
+            self._raise_stop(pos, pos.best * (1 - pos.side * self.trail), TRAILING)
+
+        if pos.side * (price - pos.stop) <= 0:
+            trigger = "stop_loss" if pos.stage == INITIAL else STAGES[pos.stage] + "_stop"
+        elif pos.target and pos.side * (price - pos.target) >= 0:
+            trigger = "take_profit"
+        else:
+            return None
+        self._close(pos, trigger, price)
+        return trigger
+
+    def _raise_stop(self, pos: ExitState, stop: float, stage: int):
+        if pos.side * (stop - pos.stop) > 0:
+            if stage != pos.stage:
+                log.info(f"{pos.coin} stop -> {STAGES[stage]} ${stop:,.2f} "
+                         f"(best ${pos.best:,.2f}, {pos.gain(pos.best):+.2%})")
+            pos.stop, pos.stage = stop, max(pos.stage, stage)
+
+    def _close(self, pos: ExitState, trigger: str, price: float):
+        # kind="close" goes out as market_close: reduce-only, cannot flip the position
+        order = self.executor.orders.submit(pos.coin, pos.size, "close", kind="close")
+        pos.exiting = order.cloid
+        log.warning(f"{pos.coin} {trigger} @ ${price:,.2f} (entry ${pos.entry:,.2f}, stop ${pos.stop:,.2f}) "
+                    f"-> reduce-only close {pos.size}")
+        triggered = time.monotonic()
+        order.done.add_done_callback(lambda done: self._closed(pos, order, trigger, price, triggered))
+
+    def _closed(self, pos: ExitState, order, trigger: str, price: float, triggered: float):
+        result = order.result
+        if not (result and result.success):
+            pos.exiting = ""  # Still open: re-evaluated (and retried) on the next price
+            log.error(f"{pos.coin} {trigger} close failed: {result.error if result else order.status}")
+            return
+        fill = result.avg_price or price  # Paper closes report no price
+        record = {
+            "coin": pos.coin, "trigger": trigger, "side": "long" if pos.side > 0 else "short",
+            "size": pos.size, "entry": pos.entry, "exit": fill, "stop": pos.stop,
+            "pnl": pos.side * (fill - pos.entry) * pos.size,
+            "reaction_ms": (time.monotonic() - triggered) * 1000,   # Trigger -> close confirmed
+            "time": time.time(),
+        }
+        if self.positions.get(pos.coin) is pos:
+            self.untrack(pos.coin)
+        self.exits.append(record)
+        del self.exits[:-100]
+        log.info(f"{pos.coin} closed by {trigger} @ ${fill:,.2f}, PnL ${record['pnl']:+.2f} "
+                 f"({record['reaction_ms']:.0f}ms after the trigger)")
+        if self.on_exit:
+            self.on_exit(record)
+
+    # ========== Feeds ==========
+
+    def start(self, live: bool = True):
+        """Start the price poll (and, when live, the account poll); call inside the running loop"""
+        self._tasks.append(asyncio.create_task(self._price_feed(), name="exit-prices"))
+        if live:
+            self._tasks.append(asyncio.create_task(self._account_feed(), name="exit-account"))
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def switch(self, executor, live: bool):
+        """Mode change: positions of the other mode are not this executor's to close"""
+        self.stop()
+        self.executor = executor
+        self.positions.clear()
+        self.start(live=live)
+
+    def client(self):
+        if self._client is None:
+            from data.hyperliquid_client import HyperliquidClient
+            self._client = HyperliquidClient()
+        return self._client
+
+    async def _price_feed(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.positions:
+                try:
+                    mids = await loop.run_in_executor(None, self.client().get_all_mids)
+                    for coin in list(self.positions):
+                        if coin in mids:
+                            self.on_price(coin, float(mids[coin]))
+                except Exception as e:
+                    log.warning(f"Exit price feed: {e}")
+            await asyncio.sleep(self.price_interval)
+
+    def fetch_account(self) -> List[Dict[str, Any]]:
+        """clearinghouseState.assetPositions of the executor's wallet (blocking)"""
+        return self.client().get_user_state(self.executor.wallet).get("assetPositions", [])
+
+    async def _account_feed(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                asset_positions = await loop.run_in_executor(None, self.fetch_account)
+                self.sync(asset_positions)
+                if self.on_account:
+                    self.on_account(asset_positions)
+            except Exception as e:
+                log.warning(f"Exit account feed: {e}")
+            await asyncio.sleep(self.account_interval)
+
+    def status(self) -> Dict[str, Any]:
+        return {coin: {**asdict(pos), "stage": STAGES[pos.stage]} for coin, pos in self.positions.items()}
+
+    # ========== Snapshot ==========
+
+    def to_state(self) -> Dict[str, Any]:
+        # A close in flight is saved as still open; the account sync settles it after a restart
+        return {coin: {**asdict(pos), "exiting": ""} for coin, pos in self.positions.items()}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.positions = {coin: ExitState(**values) for coin, values in state.items()}
@@ -1,9 +1,12 @@
 ﻿"""
 Risk Manager - Position sizing and loss limits
 """
-from typing import Dict, Any, Optional
-from datetime import datetime, date
-from dataclasses import dataclass, field
+import logging
+from typing import Dict, Any, Optional, Callable
+from datetime import date
+from dataclasses import dataclass, asdict
+
+log = logging.getLogger("bot")
 
 @dataclass
 class DailyStats:
@@ -15,39 +18,62 @@ class DailyStats:
     consecutive_losses: int = 0
 
 class RiskManager:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, gate=None, today: Callable[[], date] = date.today):
         self.config = config
+        self.today = today  # Replay passes its virtual clock's date, so day rollover follows the recording
         self.balance = 112.0  # Initial balance
-        self.daily_stats = DailyStats(date=date.today())
+        self.daily_stats = DailyStats(date=today())
         self.kill_switch_active = False
+        self.gate = gate  # Optional risk.portfolio_gate.PortfolioRiskGate shared across accounts
+        if gate:
+            gate.set_balance(self.balance)
         
     def can_trade(self) -> bool:
         """Check if trading is allowed"""
+        self._roll_day()  # A halted manager records no trades, so the new day is noticed here too
         if self.kill_switch_active:
             return False
+        
+        # Kill switch tripped by any account, or CRO entry block
+        if self.gate and not self.gate.can_trade():
+            return False
             
         # Check daily loss limit
         if self._check_daily_loss_limit():
-            print("⚠️ Daily loss limit reached")
-            self.kill_switch_active = True
+            log.warning("⚠️ Daily loss limit reached")
+            self._trip("daily loss limit")
             return False
             
         # Check consecutive losses
         if self._check_consecutive_losses():
-            print("⚠️ Consecutive loss limit reached")
-            self.kill_switch_active = True
+            log.warning("⚠️ Consecutive loss limit reached")
+            self._trip("consecutive losses")
             return False
             
         return True
     
+    def _trip(self, reason: str):
+        self.kill_switch_active = True
+        if self.gate:
+            # One account's streak halts only that account unless propagate_kill is set;
+            # the portfolio daily-loss trip (in the gate) always halts everyone
+            self.gate.trip(reason, account_only=not self.gate.config.get("propagate_kill", False))
+    
+    def limits(self) -> Dict[str, float]:
+        """Sizing and kill-switch parameters as applied here (risk.simulator uses the same)"""
+        return {
+            "max_position_pct": self.config.get("max_position_pct", 0.3),
+            "leverage": min(self.config.get("max_leverage", 3), 2),  # Conservative start
+            "daily_loss_pct": self.config.get("daily_loss_trigger_pct", 0.10),
+            "consecutive_losses": self.config.get("kill_switch", {}).get("consecutive_losses", 3),
+        }
+    
     def calculate_position_size(self, signal) -> float:
         """Calculate position size based on risk parameters"""
-        max_position_pct = self.config.get("max_position_pct", 0.3)
-        max_loss_pct = self.config.get("max_loss_per_trade_pct", 0.05)
-        max_leverage = self.config.get("max_leverage", 3)
+        limits = self.limits()
         
         # Max position value
-        max_position_value = self.balance * max_position_pct
+        max_position_value = self.balance * limits["max_position_pct"]
         
         # Adjust by confidence
         confidence_adjusted = max_position_value * signal.confidence
@@ -56,17 +82,13 @@ class RiskManager:
         btc_size = confidence_adjusted / signal.entry_price
         
         # Apply leverage limit
-        leveraged_size = btc_size * min(max_leverage, 2)  # Conservative start
+        leveraged_size = btc_size * limits["leverage"]
         
         return round(leveraged_size, 6)
     
     def record_trade(self, trade: Dict[str, Any]):
         """Record trade result for risk tracking"""
-        # Reset daily stats if new day
-        if date.today() != self.daily_stats.date:
-            self.daily_stats = DailyStats(date=date.today())
-            self.kill_switch_active = False
-        
+        self._roll_day()
         self.daily_stats.trades += 1
         
         pnl = trade.get("pnl", 0)
@@ -78,15 +100,24 @@ class RiskManager:
         else:
             self.daily_stats.losses += 1
             self.daily_stats.consecutive_losses += 1
+        
+        if self.gate:
+            self.gate.record_trade(pnl)
+    
+    def _roll_day(self):
+        """New day: fresh daily stats and the kill switch cleared"""
+        if self.today() != self.daily_stats.date:
+            self.daily_stats = DailyStats(date=self.today())
+            self.kill_switch_active = False
     
     def _check_daily_loss_limit(self) -> bool:
         """Check if daily loss limit is breached"""
-        max_daily_loss = self.balance * self.config.get("daily_loss_trigger_pct", 0.10)
+        max_daily_loss = self.balance * self.limits()["daily_loss_pct"]
         return self.daily_stats.pnl < -max_daily_loss
     
     def _check_consecutive_losses(self) -> bool:
         """Check consecutive loss limit"""
-        max_consecutive = self.config.get("kill_switch", {}).get("consecutive_losses", 3)
+        max_consecutive = self.limits()["consecutive_losses"]
         return self.daily_stats.consecutive_losses >= max_consecutive
     
     def get_stats(self) -> Dict[str, Any]:
@@ -100,8 +131,28 @@ class RiskManager:
             "kill_switch_active": self.kill_switch_active
         }
     
+    def to_state(self) -> Dict[str, Any]:
+        """Counters to carry across restarts"""
+        return {
+            "balance": self.balance,
+            "kill_switch_active": self.kill_switch_active,
+            "daily_stats": {**asdict(self.daily_stats), "date": self.daily_stats.date.isoformat()},
+        }
+    
+    def load_state(self, state: Dict[str, Any]):
+        """Restore counters; a snapshot from a previous day starts fresh"""
+        self.balance = state.get("balance", self.balance)
+        stats = dict(state.get("daily_stats", {}))
+        stats_date = date.fromisoformat(stats.pop("date", self.today().isoformat()))
+        if stats_date != self.today():
+            return
+        self.daily_stats = DailyStats(date=stats_date, **stats)
+        self.kill_switch_active = state.get("kill_switch_active", False)
+    
     def reset_kill_switch(self):
         """Manually reset kill switch"""
         self.kill_switch_active = False
         self.daily_stats.consecutive_losses = 0
-        print("✅ Kill switch reset")
+        if self.gate:
+            self.gate.reset(account_only=True)
+        log.info("✅ Kill switch reset")
@@ -0,0 +1,242 @@
+"""
+Portfolio Risk Gate - Shared-memory counters for every account, checked in microseconds
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+from pathlib import Path
+from datetime import date, datetime
+from typing import Dict, Any, Optional, List
+
+GATE_FILE = Path(__file__).parent.parent.parent / "state" / "portfolio-gate.mmap"
+
+MAGIC = b"HLRG"
+VERSION = 1
+MAX_SLOTS = 8
+
+# Header: magic, version, slots, kill flag, blocked_until, kill time, kill reason
+HEADER = struct.Struct("<4sIIIdd48s")
+# Slot: seq, name, day, trades, wins, losses, consecutive losses, kill flag, pnl, balance, updated
+SLOT = struct.Struct("<Q16sIIIIIIddd")
+HEADER_SIZE = 128
+SLOT_SIZE = 128
+FILE_SIZE = HEADER_SIZE + MAX_SLOTS * SLOT_SIZE
+
+_KILL_OFFSET = 12          # Offset of the kill flag inside the header
+_BLOCKED_OFFSET = 16       # Offset of blocked_until inside the header
+
+
+def _today() -> int:
+    return _day(date.today())
+
+
+def _day(d: date) -> int:
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+class PortfolioRiskGate:
+    """Kill switch and daily counters shared by all bot processes through one mmap file.
+
+    Each process owns one slot (by config index) and is its only writer, so
+    slots use a seqlock: the writer bumps `seq` to odd, writes, bumps to even;
+    readers retry while `seq` is odd or changed. The portfolio kill flag is a
+    single aligned word any process may set.
+    """
+
+    def __init__(self, path: Path = GATE_FILE, slot: Optional[int] = None, name: str = "",
+                 config: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.config = config or {}
+        self.slot = slot
+        self._map = self._open()
+        if slot is not None:
+            if not 0 <= slot < MAX_SLOTS:
+                raise ValueError(f"slot must be 0-{MAX_SLOTS - 1}")
+            stats = self.read_slot(slot)
+            if stats["name"] != name or stats["day"] != _today():
+                self._write_slot(name=name, day=_today(), trades=0, wins=0, losses=0,
+                                 consecutive_losses=0, kill=0, pnl=0.0,
+                                 balance=stats["balance"] if stats["name"] == name else 0.0)
+
+    def _open(self) -> mmap.mmap:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(fd).st_size < FILE_SIZE:
+                os.ftruncate(fd, FILE_SIZE)
+            mapped = mmap.mmap(fd, FILE_SIZE)
+        finally:
+            os.close(fd)
+        if mapped[:4] != MAGIC:
+            HEADER.pack_into(mapped, 0, MAGIC, VERSION, MAX_SLOTS, 0, 0.0, 0.0, b"")
+        return mapped
+
+    # ========== Slots ==========
+
+    def _slot_offset(self, slot: int) -> int:
+        return HEADER_SIZE + slot * SLOT_SIZE
+
+    def read_slot(self, slot: int) -> Dict[str, Any]:
+        offset = self._slot_offset(slot)
+        for _ in range(10_000):
+            values = SLOT.unpack_from(self._map, offset)
+            if values[0] % 2 == 0 and struct.unpack_from("<Q", self._map, offset)[0] == values[0]:
+                break
+        # else: writer died mid-update; the last values are the best we have
+        _, name, day, trades, wins, losses, consecutive, kill, pnl, balance, updated = values
+        stats = {
+            "name": name.rstrip(b"\0").decode("utf-8", "ignore"),
+            "day": day, "trades": trades, "wins": wins, "losses": losses,
+            "consecutive_losses": consecutive, "kill": bool(kill),
+            "pnl": pnl, "balance": balance, "updated": updated,
+        }
+        if day != _today():
+            # Yesterday's counters don't count against today
+            stats.update(trades=0, wins=0, losses=0, consecutive_losses=0, kill=False, pnl=0.0)
+        return stats
+
+    def _write_slot(self, **fields):
+        offset = self._slot_offset(self.slot)
+        current = SLOT.unpack_from(self._map, offset)
+        seq = current[0]
+        merged = dict(zip(("seq", "name", "day", "trades", "wins", "losses", "consecutive_losses",
+                           "kill", "pnl", "balance", "updated"), current))
+        merged.update(fields)
+        if isinstance(merged["name"], str):
+            merged["name"] = merged["name"].encode("utf-8")[:16]
+        merged["updated"] = time.time()
+
+        struct.pack_into("<Q", self._map, offset, seq + 1)   # odd: write in progress
+        SLOT.pack_into(self._map, offset, seq + 1, merged["name"], merged["day"], merged["trades"],
+                       merged["wins"], merged["losses"], merged["consecutive_losses"], merged["kill"],
+                       merged["pnl"], merged["balance"], merged["updated"])
+        struct.pack_into("<Q", self._map, offset, seq + 2)   # even: consistent
+
+    def slots(self) -> List[Dict[str, Any]]:
+        return [s for s in (self.read_slot(i) for i in range(MAX_SLOTS)) if s["name"]]
+
+    # ========== Writers (own slot) ==========
+
+    def record_trade(self, pnl: float):
+        stats = self.read_slot(self.slot)
+        win = pnl > 0
+        self._write_slot(
+            day=_today(),
+            trades=stats["trades"] + 1,
+            wins=stats["wins"] + (1 if win else 0),
+            losses=stats["losses"] + (0 if win else 1),
+            consecutive_losses=0 if win else stats["consecutive_losses"] + 1,
+            pnl=stats["pnl"] + pnl,
+            kill=int(stats["kill"]),
+        )
+
+    def set_balance(self, balance: float):
+        self._write_slot(balance=balance)
+
+    def trip(self, reason: str = "", account_only: bool = False):
+        """Trip the kill switch for this account, or (default) for the whole portfolio until the day rolls over"""
+        if self.slot is not None:
+            self._write_slot(kill=1)
+        if not account_only:
+            reason_bytes = f"{self.slot}:{reason}".encode("utf-8")[:48]
+            struct.pack_into("<d48s", self._map, 24, time.time(), reason_bytes)
+            struct.pack_into("<I", self._map, _KILL_OFFSET, 1)
+
+    def reset(self, account_only: bool = False):
+        """Clear this account's kill switch and, unless account_only, the portfolio's (manual)"""
+        if not account_only:
+            struct.pack_into("<I", self._map, _KILL_OFFSET, 0)
+            struct.pack_into("<d", self._map, _BLOCKED_OFFSET, 0.0)
+        if self.slot is not None:
+            self._write_slot(kill=0, consecutive_losses=0)
+
+    def block_until(self, until: float):
+        """Block new entries for every account until `until` (epoch seconds; inf = until reset)"""
+        struct.pack_into("<d", self._map, _BLOCKED_OFFSET, until)
+
+    def sync_org_gate(self, gate: Dict[str, Any]):
+        """Mirror the CRO risk-gate.json (allowNewEntry / emergencyClose / lockedUntil)"""
+        if gate.get("emergencyClose"):
+            self.trip("emergencyClose")
+        if gate.get("lockedUntil"):
+            locked = datetime.fromisoformat(str(gate["lockedUntil"]).replace("Z", "+00:00"))
+            self.block_until(locked.timestamp())
+        elif gate.get("allowNewEntry") is False:
+            self.block_until(float("inf"))
+        else:
+            self.block_until(0.0)
+
+    # ========== Readers ==========
+
+    @property
+    def killed(self) -> bool:
+        if struct.unpack_from("<I", self._map, _KILL_OFFSET)[0] != 1:
+            return False
+        kill_time = struct.unpack_from("<d", self._map, 24)[0]
+        if kill_time and _day(date.fromtimestamp(kill_time)) != _today():
+            # Tripped on an earlier day: cleared like the slots' daily counters
+            struct.pack_into("<I", self._map, _KILL_OFFSET, 0)
+            return False
+        return True
+
+    def can_trade(self) -> bool:
+        """Portfolio kill switch, entry block, this account's kill and portfolio daily loss"""
+        if self.killed:
+            return False
+        if struct.unpack_from("<d", self._map, _BLOCKED_OFFSET)[0] > time.time():
+            return False
+        if self.slot is not None and self.read_slot(self.slot)["kill"]:
+            return False
+        limit_pct = self.config.get("portfolio_daily_loss_pct")
+        if limit_pct:
+            slots = self.slots()
+            balance = sum(s["balance"] for s in slots)
+            if balance and sum(s["pnl"] for s in slots) < -balance * limit_pct:
+                self.trip("portfolio daily loss")
+                return False
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        killed = self.killed
+        _, _, _, _, blocked, kill_time, reason = HEADER.unpack_from(self._map, 0)
+        return {
+            "killed": killed,
+            "kill_time": kill_time or None,
+            "kill_reason": reason.rstrip(b"\0").decode("utf-8", "ignore"),
+            "blocked_until": blocked or None,
+            "accounts": self.slots(),
+        }
+
+    def close(self):
+        self._map.close()
+
+
+def from_config(config: Optional[Dict[str, Any]]) -> Optional[PortfolioRiskGate]:
+    """Gate for this process from the "portfolio_gate" config section, if enabled"""
+    if not config or not config.get("enabled"):
+        return None
+    return PortfolioRiskGate(Path(config.get("path") or GATE_FILE), slot=config.get("slot", 0),
+                             name=config.get("name", ""), config=config)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or control the shared portfolio risk gate")
+    parser.add_argument("command", choices=["status", "trip", "reset", "sync"])
+    parser.add_argument("arg", nargs="?", help="reason for trip / risk-gate.json path for sync")
+    parser.add_argument("--path", type=Path, default=GATE_FILE)
+    args = parser.parse_args()
+
+    gate = PortfolioRiskGate(args.path)
+    if args.command == "trip":
+        gate.trip(args.arg or "manual")
+    elif args.command == "reset":
+        gate.reset()
+    elif args.command == "sync":
+        if not args.arg:
+            sys.exit("sync needs the path to risk-gate.json")
+        gate.sync_org_gate(json.loads(Path(args.arg).read_text(encoding="utf-8-sig")))
+    print(json.dumps(gate.status(), indent=2, default=str))
@@ -0,0 +1,274 @@
+"""
+Risk Simulator - Monte Carlo risk of ruin for RiskManager limits, vectorized over paths and limit sets
+"""
+import os
+import sys
+import json
+import time
+import itertools
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from risk.manager import RiskManager
+
+CONFIG_FILE = Path(__file__).parent.parent.parent / "config" / "strategy.json"
+USER_HOME = os.environ.get("USERPROFILE", "C:\\Users\\Default")
+TRADE_HISTORY = Path(USER_HOME) / "clawd/memory/hyperliquid/trade-history.json"
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+CHUNK_ELEMENTS = 1 << 17
+
+
+# ========== Trade distribution ==========
+
+def load_trade_returns(path: Path = TRADE_HISTORY) -> Tuple[np.ndarray, np.ndarray, Optional[float]]:
+    """(returns per unit notional, confidences, trades per day) from trade-history.json.
+
+    Only closed trades with pnl, entry and size can be normalised; the rest are skipped.
+    """
+    trades = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+    returns, confidences, days = [], [], Counter()
+    for t in trades:
+        if t.get("result") not in ("win", "loss") or t.get("pnl") is None:
+            continue
+        entry = float(t.get("entry") or t.get("entryPrice") or 0)
+        size = abs(float(t.get("size") or 0))
+        if not entry or not size:
+            continue
+        returns.append(float(t["pnl"]) / (entry * size))
+        confidence = float(t.get("confidence") or 1.0)  # null / missing: full size
+        confidences.append(confidence / 100 if confidence > 1 else confidence)  # "確信度: XX%"
+        if t.get("time"):
+            days[t["time"][:10]] += 1
+    per_day = sum(days.values()) / len(days) if days else None
+    return np.array(returns), np.array(confidences), per_day
+
+
+def synthetic_returns(win_rate: float, avg_win: float, avg_loss: float, n: int = 1000) -> np.ndarray:
+    """Two-point distribution (TP / SL outcomes) for when there is not enough history yet"""
+    wins = int(round(win_rate * n))
+    return np.concatenate([np.full(wins, avg_win), np.full(n - wins, -abs(avg_loss))])
+
+
+# ========== Simulation ==========
+
+def simulate(limit_sets: List[Dict[str, Any]], returns: np.ndarray, confidences: Optional[np.ndarray] = None,
+             paths: int = 100_000, days: int = 30, trades_per_day: int = 3, balance: float = 112.0,
+             ruin_pct: float = 0.5, drawdown_pct: float = 0.15, compound: bool = False,
+             seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Simulate every limit set on the same bootstrapped trade sequences.
+
+    Each limit set is a `risk` config dict; sizing and kill rules come from
+    RiskManager.limits() and follow RiskManager exactly: notional =
+    balance * max_position_pct * confidence * leverage, the kill switch trips
+    when daily pnl < -balance * daily_loss_pct or consecutive losses reach the
+    limit (pnl <= 0 counts as a loss). A tripped switch stays on for the rest
+    of the day; the next day starts clean, as after the daily restart.
+    RiskManager sizes on its fixed `balance`; `compound=True` sizes on equity.
+    """
+    rng = np.random.default_rng(seed)
+    limits = [RiskManager(dict(cfg)).limits() for cfg in limit_sets]
+    fraction = np.array([l["max_position_pct"] * l["leverage"] for l in limits])[:, None]
+    daily_loss = np.array([l["daily_loss_pct"] for l in limits])[:, None]
+    max_consecutive = np.array([l["consecutive_losses"] for l in limits])[:, None]
+    if confidences is None or len(confidences) != len(returns):
+        confidences = np.ones(len(returns))
+
+    trade_returns = (confidences * returns).astype(np.float32)
+    params = (fraction.astype(np.float32), (-balance * daily_loss).astype(np.float32),
+              max_consecutive.astype(np.int16))
+
+    # Blocks of paths small enough that the ~15 working arrays stay in cache
+    block = max(1024, CHUNK_ELEMENTS // len(limit_sets))
+    chunks = [_simulate_chunk(rng, trade_returns, params, min(block, paths - start), days, trades_per_day,
+                              balance, balance * (1 - ruin_pct), compound)
+              for start in range(0, paths, block)]
+    equity, max_drawdown, longest_underwater, ruined, ruin_step, kill_days = (
+        np.concatenate(parts, axis=1) for parts in zip(*chunks))
+
+    results = []
+    for i, cfg in enumerate(limit_sets):
+        ruin_days = ruin_step[i][ruined[i]] / trades_per_day
+        results.append({
+            "limits": limits[i],
+            "config": cfg,
+            "paths": paths,
+            "p_ruin": float(ruined[i].mean()),
+            "p_drawdown": float((max_drawdown[i] > drawdown_pct).mean()),
+            "p_kill": float((kill_days[i] > 0).mean()),
+            "kill_days_mean": float(kill_days[i].mean()),
+            "max_drawdown": _quantiles(max_drawdown[i]),
+            "final_return": _quantiles(equity[i] / balance - 1, lower=True),
+            "days_to_ruin": _quantiles(ruin_days) if len(ruin_days) else None,
+            # Longest peak-to-recovery stretch; paths still underwater at the end are censored
+            "recovery_days": _quantiles(longest_underwater[i] / trades_per_day),
+        })
+    return results
+
+
+def _simulate_chunk(rng: np.random.Generator, trade_returns: np.ndarray, params: Tuple[np.ndarray, ...],
+                    paths: int, days: int, trades_per_day: int, balance: float, ruin_level: float,
+                    compound: bool) -> Tuple[np.ndarray, ...]:
+    fraction, loss_limit, max_consecutive = params
+    # float32 halves memory traffic; cents-level precision is plenty for percentiles
+    shape = (len(fraction), paths)
+    equity = np.full(shape, balance, dtype=np.float32)
+    peak = equity.copy()
+    max_drawdown = np.zeros(shape, dtype=np.float32)
+    underwater = np.zeros(shape, dtype=np.int16)
+    longest_underwater = np.zeros(shape, dtype=np.int16)
+    ruined = np.zeros(shape, dtype=bool)
+    ruin_step = np.full(shape, -1, dtype=np.int32)
+    kill_days = np.zeros(shape, dtype=np.int16)
+
+    daily_pnl = np.empty(shape, dtype=np.float32)
+    consecutive = np.empty(shape, dtype=np.int16)
+    killed = np.empty(shape, dtype=bool)
+    inactive = np.empty(shape, dtype=bool)
+    pnl = np.empty(shape, dtype=np.float32)
+    scratch = np.empty(shape, dtype=np.float32)
+    flag = np.empty(shape, dtype=bool)
+
+    for day in range(days):
+        daily_pnl.fill(0)
+        consecutive.fill(0)
+        killed.fill(False)
+        for slot in range(trades_per_day):
+            step = day * trades_per_day + slot
+            np.logical_or(killed, ruined, out=inactive)
+
+            # Common random numbers: every limit set sees the same trade sequence
+            picks = rng.integers(0, len(returns), paths)
+            np.multiply(fraction, trade_returns[picks], out=pnl)
+            pnl *= equity if compound else balance
+            np.copyto(pnl, 0.0, where=inactive)
+
+            equity += pnl
+            daily_pnl += pnl
+            # consecutive_losses: +1 on pnl <= 0, reset on a win, untouched when not trading
+            np.greater(pnl, 0, out=flag)
+            np.copyto(consecutive, 0, where=flag)
+            np.logical_or(flag, inactive, out=flag)
+            np.logical_not(flag, out=flag)
+            consecutive += flag
+            # can_trade() runs every loop tick, so limits latch right after the trade
+            if compound:
+                np.multiply(equity, loss_limit / balance, out=scratch)
+                np.less(daily_pnl, scratch, out=flag)
+            else:
+                np.less(daily_pnl, loss_limit, out=flag)
+            killed |= flag
+            np.greater_equal(consecutive, max_consecutive, out=flag)
+            killed |= flag
+
+            np.less_equal(equity, ruin_level, out=flag)
+            np.greater(flag, ruined, out=flag)  # newly ruined
+            np.copyto(ruin_step, step + 1, where=flag)
+            ruined |= flag
+
+            np.maximum(peak, equity, out=peak)
+            np.divide(equity, peak, out=scratch)
+            np.subtract(1, scratch, out=scratch)
+            np.maximum(max_drawdown, scratch, out=max_drawdown)
+            np.greater_equal(equity, peak, out=flag)
+            underwater += 1
+            np.copyto(underwater, 0, where=flag)
+            np.maximum(longest_underwater, underwater, out=longest_underwater)
+        kill_days += killed
+    return equity, max_drawdown, longest_underwater, ruined, ruin_step, kill_days
+
+
+def _quantiles(values: np.ndarray, lower: bool = False) -> Dict[str, float]:
+    qs = [1 - q for q in QUANTILES] if lower else QUANTILES
+    return {f"p{int(round(q * 100))}": float(v) for q, v in zip(qs, np.quantile(values, qs))}
+
+
+def sweep_sets(base: Dict[str, Any], grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Risk config dicts for every combination of the candidate values in `grid`"""
+    sets = []
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        cfg = json.loads(json.dumps(base))
+        for key, value in zip(keys, values):
+            if key == "consecutive_losses":
+                cfg.setdefault("kill_switch", {})[key] = value
+            else:
+                cfg[key] = value
+        sets.append(cfg)
+    return sets
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def floats(text: str) -> List[float]:
+        return [float(v) for v in text.split(",")]
+
+    parser = argparse.ArgumentParser(description="Monte Carlo risk of ruin for RiskManager limits")
+    parser.add_argument("--history", type=Path, default=TRADE_HISTORY)
+    parser.add_argument("--min-trades", type=int, default=20,
+                        help="below this many usable trades, fall back to the synthetic TP/SL distribution")
+    parser.add_argument("--win-rate", type=float, default=0.45)
+    parser.add_argument("--paths", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--trades-per-day", type=int)
+    parser.add_argument("--balance", type=float, default=112.0)
+    parser.add_argument("--ruin", type=float, default=0.5, help="ruin = equity down this fraction")
+    parser.add_argument("--drawdown", type=float, default=0.15, help="graduation drawdown limit")
+    parser.add_argument("--compound", action="store_true", help="size on equity instead of fixed balance")
+    parser.add_argument("--max-position-pct", type=floats)
+    parser.add_argument("--daily-loss-pct", type=floats)
+    parser.add_argument("--consecutive-losses", type=floats)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    with open(CONFIG_FILE, encoding="utf-8-sig") as f:
+        config = json.load(f)
+    risk = config["risk"]
+
+    returns, confidences, per_day = (np.array([]), None, None)
+    if args.history.exists():
+        returns, confidences, per_day = load_trade_returns(args.history)
+    if len(returns) < args.min_trades:
+        print(f"Only {len(returns)} usable trades in {args.history}; using synthetic "
+              f"{args.win_rate:.0%} win rate, TP {risk['take_profit_pct']:.1%} / SL {risk['stop_loss_pct']:.1%}", file=sys.stderr)
+        returns = synthetic_returns(args.win_rate, risk["take_profit_pct"], risk["stop_loss_pct"])
+        confidences = None
+    trades_per_day = args.trades_per_day or max(1, round(per_day or 3))
+
+    grid = {}
+    if args.max_position_pct:
+        grid["max_position_pct"] = args.max_position_pct
+    if args.daily_loss_pct:
+        grid["daily_loss_trigger_pct"] = args.daily_loss_pct
+    if args.consecutive_losses:
+        grid["consecutive_losses"] = [int(v) for v in args.consecutive_losses]
+    limit_sets = sweep_sets(risk, grid)
+
+    started = time.perf_counter()
+    results = simulate(limit_sets, returns, confidences, paths=args.paths, days=args.days,
+                       trades_per_day=trades_per_day, balance=args.balance, ruin_pct=args.ruin,
+                       drawdown_pct=args.drawdown, compound=args.compound, seed=args.seed)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(0)
+
+    print(f"{len(limit_sets)} limit sets x {args.paths:,} paths x {args.days}d x {trades_per_day} trades/day "
+          f"in {elapsed:.2f}s\n")
+    print(f"{'pos%':>6} {'dayloss':>7} {'consec':>6} | {'P(ruin)':>8} {'P(DD>' + format(args.drawdown, '.0%') + ')':>10} "
+          f"{'P(kill)':>8} | {'DD p50':>7} {'DD p99':>7} | {'ret p50':>8} {'ret p5':>8} | {'recov p95':>9}")
+    for r in sorted(results, key=lambda r: (r["p_ruin"], r["p_drawdown"])):
+        l = r["limits"]
+        print(f"{l['max_position_pct']:>6.2f} {l['daily_loss_pct']:>7.2f} {l['consecutive_losses']:>6} | "
+              f"{r['p_ruin']:>8.4f} {r['p_drawdown']:>10.4f} {r['p_kill']:>8.3f} | "
+              f"{r['max_drawdown']['p50']:>7.1%} {r['max_drawdown']['p99']:>7.1%} | "
+              f"{r['final_return']['p50']:>8.1%} {r['final_return']['p5']:>8.1%} | "
+              f"{r['recovery_days']['p95']:>8.1f}d")
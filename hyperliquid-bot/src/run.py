@@ -7,26 +7,33 @@ import asyncio
 import logging
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from data.market import MarketData
-from strategy.engine import StrategyEngine, SignalType
-from executor.hyperliquid import HyperliquidExecutor
+from data.market import create_market
+from strategy.engine import SignalType, create_engine
+from strategy.position import PositionStateMachine, tick_time, close_record
+from executor.hyperliquid import create_executor
+from executor.quality import OrderTrace
 from risk.manager import RiskManager
+from risk.portfolio_gate import from_config as portfolio_gate
+from risk.exits import ExitEngine
+from learning.params import ParamWatcher
+from snapshot import SnapshotWriter, load_snapshot, restore, capture, save_snapshot
+from replay import Recorder, RecordingMarket, RecordingExecutor
+from pipeline import TradingPipeline
+from profiler import Profiler
+from logconfig import setup_logging, bind, journal
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%H:%M:%S"
-)
 log = logging.getLogger("bot")
+trades_log = logging.getLogger("bot.trades")
 
 # Use environment variable for user profile path
 USER_HOME = os.environ.get("USERPROFILE", "C:\\Users\\Default")
 CLAUDE_TRADES = Path(USER_HOME) / "clawd/memory/hyperliquid/trades.md"
 CLAUDE_STRATEGY = Path(USER_HOME) / "clawd/memory/hyperliquid/strategy.md"
+TRADE_JOURNAL = Path(__file__).parent.parent / "state" / "trade-journal.jsonl"  # Entries and closes, joined on trade_id
 
 def load_config():
     config_path = Path(__file__).parent.parent / "config" / "strategy.json"
@@ -46,76 +53,290 @@ def get_mode_from_strategy():
         return "paper"
 
 def log_trade_for_claude(trade_data):
+    # trades.md row for review, JSON line with reason codes for attribution; both appended on the logging thread
     try:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        entry = f"| {timestamp} | {trade_data['side']} | {trade_data['size']} | ${trade_data['entry']:.2f} | - | - | {trade_data['reason']} | pending |\n"
-        with open(CLAUDE_TRADES, "a", encoding="utf-8") as f:
-            f.write(entry)
+        if trade_data.get("event") == "close":
+            entry = (f"| {timestamp} | close | {trade_data['size']} | ${trade_data['entry']:.2f} "
+                     f"| ${trade_data['exit']:.2f} | ${trade_data['pnl']:+.2f} | {trade_data['trigger']} "
+                     f"| {trade_data['result']} |")
+        else:
+            entry = f"| {timestamp} | {trade_data['side']} | {trade_data['size']} | ${trade_data['entry']:.2f} | - | - | {trade_data['reason']} | pending |"
+        record = json.dumps({"time": datetime.now().isoformat(timespec="seconds"), **trade_data},
+                            separators=(",", ":"))
+        journal(trades_log, {CLAUDE_TRADES: entry, TRADE_JOURNAL: record}, trade=trade_data)
         log.info(f"Trade logged for Claude review")
     except Exception as e:
         log.error(f"Failed to log trade: {e}")
 
-async def run_bot():
+def switch_executor(executor, mode, market, config=None):
+    """New executor for `mode` (same backend), carrying over tracked open orders"""
+    old_state = executor.to_state()
+    executor = create_executor(mode, market.books, config)
+    executor.load_state(old_state)
+    return executor
+
+def log_execution_quality(result):
+    if result.get("latency_ms") is not None:
+        slippage = result.get("slippage_bps")
+        log.info(f"  Signal->fill {result['latency_ms']:.0f}ms"
+                 + (f", slippage {slippage:+.2f}bps vs mid" if slippage is not None else ""))
+
+def entry_record(signal, result, trade_id):
+    """Journal row for an opening fill; its close is journaled under the same trade_id"""
+    return {
+        "event": "entry",
+        "trade_id": trade_id,
+        "side": signal.type.value,
+        "size": result["size"],
+        "entry": result["price"],
+        "reason": signal.reason,
+        "reason_codes": signal.reason_codes,
+        "features": signal.features
+    }
+
+def exit_engine(executor, config, risk, positions, journal=log_trade_for_claude):
+    """ExitEngine whose closes count as trades, flatten the state machine and are journaled.
+    
+    Its account poll also syncs the state machine with the exchange, so it runs even with
+    "exits.enabled" false (stops off).
+    """
+    exits_config = config.get("exits") or {}
+    
+    def on_account(asset_positions):
+        positions.sync_account(asset_positions, grace=2 * exits.account_interval)
+    
+    def on_exit(record):
+        risk.record_trade(record)
+        trade_id = positions.stopped_out(record["coin"])
+        journal(close_record(record["coin"], record["side"], record["size"], record["entry"], record["exit"],
+                             trade_id, record["trigger"]))
+    exits = ExitEngine(executor, exits_config, config["risk"], on_exit=on_exit, on_account=on_account)
+    return exits
+
+async def fetch_account(exits, mode):
+    """Open positions on the exchange at startup (live only): a position held before the start must not be opened again"""
+    if not exits or mode != "live":
+        return None
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, exits.fetch_account)
+    except Exception as e:
+        log.warning(f"Account state unavailable, positions not synced until the next poll: {e}")
+        return None
+
+def log_balance(executor):
+    # Spawns Node; runs off the event loop so startup doesn't wait on it
+    log.info(f"Balance: ${executor.get_balance().get('accountValue', 0):.2f}")
+
+async def run_bot(market=None, executor=None, mode=None, sleep=asyncio.sleep,
+                  journal=log_trade_for_claude, snapshots=True, recorder=None, hot_params=True,
+                  profile=True, today=date.today, portfolio=True):
+    """Main loop. Live by default; replay.py injects recorded market/executor and a virtual clock
+    (`sleep` and `today`), and runs without the shared portfolio gate (`portfolio=False`)."""
     config = load_config()
-    market = MarketData()
-    strategy = StrategyEngine(config)
-    risk = RiskManager(config["risk"])
+    if market is None:
+        market = create_market(config)
+    strategy = create_engine(config)
+    params = ParamWatcher(strategy) if hot_params else None
+    gate = portfolio_gate(config.get("portfolio_gate")) if portfolio else None
+    risk = RiskManager(config["risk"], gate=gate, today=today)
+    positions = PositionStateMachine(config.get("positions"), strategy)
     
-    mode = get_mode_from_strategy()
-    executor = HyperliquidExecutor(mode=mode)
+    pinned_mode = mode is not None
+    mode = mode or get_mode_from_strategy()
+    live_executor = executor is None
+    exits = None
+    if live_executor:
+        executor = create_executor(mode, market.books, config.get("executor"))
+        # Replay injects executors without an order manager, so local exits only run live/paper
+        exits = exit_engine(executor, config, risk, positions, journal)
+    bind(coin="BTC", account=(config.get("executor") or {}).get("account", 1), mode=mode)
+    
+    # Warm restart: candles, risk counters and open orders from the last run, then the exchange's positions
+    snapshot = load_snapshot() if snapshots else None
+    account = await fetch_account(exits, mode)
+    if snapshot or account is not None:
+        restore(snapshot or {}, market=market, risk=risk, executor=executor, positions=positions,
+                exits=exits, account=account)
+    writer = SnapshotWriter(config.get("snapshot_interval", 60), market=market, risk=risk,
+                            executor=executor, positions=positions, exits=exits) if snapshots else None
+    
+    if recorder:
+        market = RecordingMarket(market, recorder)
+        executor = RecordingExecutor(executor, recorder)
     
     log.info(f"Bot started in {mode.upper()} mode")
-    log.info(f"Balance: ${executor.get_balance().get('accountValue', 0):.2f}")
+    if snapshot:
+        age = datetime.now().timestamp() - snapshot["saved_at"]
+        log.info(f"Warm start from snapshot ({age:.0f}s old), fetching gap only")
+    if live_executor:
+        asyncio.get_running_loop().run_in_executor(None, log_balance, executor)
+    profiler = Profiler(config.get("profiling")) if profile else None
+    if profiler:
+        profiler.start()
+    if exits:
+        exits.start(live=mode == "live")
     
     last_price = None
     trade_count = 0
+    tick = 0
     
     try:
         while True:
-            current_mode = get_mode_from_strategy()
+            tick += 1
+            bind(tick=tick)
+            current_mode = mode if pinned_mode else get_mode_from_strategy()
             if current_mode != mode:
                 mode = current_mode
-                executor = HyperliquidExecutor(mode=mode)
+                bind(mode=mode)
+                executor = switch_executor(executor, mode, market, config.get("executor"))
+                if writer:
+                    writer.components["executor"] = executor
+                if exits:
+                    exits.switch(executor, live=mode == "live")
+                if recorder:
+                    executor = RecordingExecutor(executor, recorder)
                 log.info(f"Mode changed to {mode.upper()}")
             
+            if params:
+                params.poll()  # Optimizer output, swapped in between ticks
+            if profiler:
+                profiler.poll()
+                profiler.tick_start()
+            
             data = await market.get_latest()
             price = data["price"]
+            if data.get("stale"):
+                log.warning(f"Market data stale ({data['data_age']:.0f}s old), signals paused")
             
             if last_price and abs(price - last_price) / last_price > 0.005:
                 log.info(f"BTC ${price:,.2f} ({'+' if price > last_price else ''}{((price-last_price)/last_price)*100:.2f}%)")
             last_price = price
+            if exits:
+                exits.on_price("BTC", price)
+            
+            if writer:
+                await writer.maybe_save()
             
             if not risk.can_trade():
                 log.warning("Risk limit reached")
-                await asyncio.sleep(60)
+                await sleep(60)
                 continue
             
-            signal = strategy.analyze(data)
+            # Only signals that change the desired exposure reach the executor
+            signal = positions.decide(await strategy.analyze_async(data), now=tick_time(data))
             
             if signal and signal.type != SignalType.NONE:
+                trace = OrderTrace.from_signal(signal, data)
                 size = risk.calculate_position_size(signal)
+                trace.mark("risk")
                 
                 log.info(f"SIGNAL: {signal.type.value.upper()} @ ${price:,.2f}")
                 log.info(f"  Reason: {signal.reason}")
                 log.info(f"  Size: {size:.6f} BTC")
                 
-                result = await executor.execute(signal, size)
+                result = await executor.execute(signal, size, trace)
+                closed = positions.on_result(signal, result, now=tick_time(data))
                 
                 if result:
                     trade_count += 1
-                    risk.record_trade(result)
-                    log_trade_for_claude({
-                        "side": signal.type.value,
-                        "size": size,
-                        "entry": result["price"],
-                        "reason": signal.reason
-                    })
+                    if closed:
+                        risk.record_trade(closed)  # Entry fills carry no PnL: only closes count as wins/losses
+                    if exits:
+                        exits.on_fill(signal, result)
+                    journal(closed or entry_record(signal, result, positions.get("BTC").trade_id))
                     log.info(f"Trade #{trade_count} executed @ ${result['price']:,.2f}")
+                    log_execution_quality(result)
             
-            await asyncio.sleep(5)
+            if profiler:
+                profiler.tick_end()
+            await sleep(5)
             
     except KeyboardInterrupt:
         log.info(f"Bot stopped. Total trades: {trade_count}")
+    finally:
+        if profiler:
+            profiler.stop()
+        if exits:
+            exits.stop()
+        if hasattr(strategy, "close"):
+            strategy.close()  # Sharded pool: worker processes and shared memory
+        if writer:
+            save_snapshot(capture(**writer.components))
+        if recorder:
+            recorder.close()
+
+async def run_pipeline():
+    """Same components as run_bot, run as concurrent stages (see pipeline.py)"""
+    config = load_config()
+    market = create_market(config)
+    strategy = create_engine(config)
+    params = ParamWatcher(strategy)
+    risk = RiskManager(config["risk"], gate=portfolio_gate(config.get("portfolio_gate")))
+    positions = PositionStateMachine(config.get("positions"), strategy)
+    
+    mode = get_mode_from_strategy()
+    executor = create_executor(mode, market.books, config.get("executor"))
+    exits = exit_engine(executor, config, risk, positions)
+    bind(coin="BTC", account=(config.get("executor") or {}).get("account", 1), mode=mode)
+    
+    snapshot = load_snapshot()
+    account = await fetch_account(exits, mode)
+    if snapshot or account is not None:
+        restore(snapshot or {}, market=market, risk=risk, executor=executor, positions=positions,
+                exits=exits, account=account)
+    writer = SnapshotWriter(config.get("snapshot_interval", 60), market=market, risk=risk,
+                            executor=executor, positions=positions, exits=exits)
+    
+    pipeline_config = config.get("pipeline", {})
+    pipeline = TradingPipeline(market, strategy, risk, executor, log_trade_for_claude,
+                               interval=pipeline_config.get("interval", 5),
+                               max_signal_age=pipeline_config.get("max_signal_age", 10),
+                               positions=positions, exits=exits)
+    
+    async def on_tick():
+        nonlocal mode
+        current_mode = get_mode_from_strategy()
+        if current_mode != mode:
+            mode = current_mode
+            pipeline.executor = switch_executor(pipeline.executor, mode, market, config.get("executor"))
+            writer.components["executor"] = pipeline.executor
+            if exits:
+                exits.switch(pipeline.executor, live=mode == "live")
+            bind(mode=mode)
+            log.info(f"Mode changed to {mode.upper()}")
+        params.poll()
+        profiler.poll()
+        await writer.maybe_save()
+    pipeline.on_tick = on_tick
+    profiler = Profiler(config.get("profiling"))
+    profiler.start()
+    if exits:
+        exits.start(live=mode == "live")
+    
+    log.info(f"Bot started in {mode.upper()} mode (pipeline)")
+    asyncio.get_running_loop().run_in_executor(None, log_balance, executor)
+    try:
+        await pipeline.run(report_every=pipeline_config.get("report_interval", 300))
+    except KeyboardInterrupt:
+        log.info(f"Bot stopped. Total trades: {pipeline.trade_count}")
+    finally:
+        profiler.stop()
+        if exits:
+            exits.stop()
+        if hasattr(strategy, "close"):
+            strategy.close()
+        save_snapshot(capture(**writer.components))
 
 if __name__ == "__main__":
-    asyncio.run(run_bot())
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", type=Path, help="record market data and executor responses (gzip JSONL)")
+    parser.add_argument("--pipeline", action="store_true", help="run data/strategy/execution as concurrent stages")
+    args = parser.parse_args()
+    
+    setup_logging(load_config().get("logging"))
+    if args.pipeline:
+        asyncio.run(run_pipeline())
+    else:
+        asyncio.run(run_bot(recorder=Recorder(args.record) if args.record else None))
\ No newline at end of file
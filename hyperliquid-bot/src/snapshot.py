@@ -0,0 +1,114 @@
+"""
+Warm-restart snapshots - Compact bot state saved with atomic writes
+"""
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+log = logging.getLogger("bot")
+
+SNAPSHOT_FILE = Path(__file__).parent.parent / "state" / "snapshot.json.gz"
+VERSION = 1
+
+
+def capture(market=None, risk=None, executor=None, positions=None, exits=None) -> Dict[str, Any]:
+    """Collect component state into one plain dict (cheap, runs on the loop)"""
+    state: Dict[str, Any] = {"version": VERSION, "saved_at": time.time()}
+    if market is not None:
+        state["candles"] = market.aggregator.to_state()
+        state["last_price"] = market.last_price
+    if risk is not None:
+        state["risk"] = risk.to_state()
+    if executor is not None:
+        state["executor"] = executor.to_state()
+    if positions is not None:
+        state["positions"] = positions.to_state()
+    if exits is not None:
+        state["exits"] = exits.to_state()
+    return state
+
+
+def restore(state: Dict[str, Any], market=None, risk=None, executor=None, positions=None,
+            exits=None, account: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Load a snapshot into freshly constructed components.
+
+    `account` (clearinghouseState.assetPositions, live only) is applied last:
+    positions opened, closed or left mid-order since the snapshot follow the exchange.
+    """
+    if market is not None and "candles" in state:
+        if state["candles"].get("coin") == market.coin:
+            market.aggregator.load_state(state["candles"])
+            market.last_price = state.get("last_price")
+    if risk is not None and "risk" in state:
+        risk.load_state(state["risk"])
+    if executor is not None and "executor" in state:
+        executor.load_state(state["executor"])
+    if positions is not None and "positions" in state:
+        positions.load_state(state["positions"])
+    if exits is not None and "exits" in state:
+        exits.load_state(state["exits"])
+    if account is not None:
+        if positions is not None:
+            positions.sync_account(account)
+        if exits is not None:
+            exits.sync(account)
+
+
+def save_snapshot(state: Dict[str, Any], path: Path = SNAPSHOT_FILE) -> None:
+    """Write gzip JSON to a temp file, then rename over the old snapshot"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    payload = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    with open(tmp, "wb") as f:
+        f.write(gzip.compress(payload, compresslevel=1))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: Path = SNAPSHOT_FILE, max_age: float = 6 * 3600) -> Optional[Dict[str, Any]]:
+    """Read the last snapshot; None if missing, corrupt, stale or from another version"""
+    try:
+        with open(path, "rb") as f:
+            state = json.loads(gzip.decompress(f.read()))
+    except (OSError, ValueError, EOFError):
+        return None
+    if state.get("version") != VERSION:
+        return None
+    if time.time() - state.get("saved_at", 0) > max_age:
+        return None
+    return state
+
+
+class SnapshotWriter:
+    """Saves a snapshot every `interval` seconds without blocking the loop"""
+
+    def __init__(self, interval: float = 60, path: Path = SNAPSHOT_FILE, **components):
+        self.interval = interval
+        self.path = path
+        self.components = components
+        self.last_saved = time.monotonic()
+        self._pending: Optional[asyncio.Future] = None
+
+    async def maybe_save(self, force: bool = False) -> bool:
+        if not force and time.monotonic() - self.last_saved < self.interval:
+            return False
+        if self._pending is not None:
+            if not self._pending.done():
+                if not force:
+                    return False  # Previous write still running
+                await asyncio.wait([self._pending])
+            if self._pending.exception():
+                log.error(f"Snapshot write failed: {self._pending.exception()}")
+        state = capture(**self.components)
+        loop = asyncio.get_running_loop()
+        self._pending = loop.run_in_executor(None, save_snapshot, state, self.path)
+        self.last_saved = time.monotonic()
+        if force:
+            await self._pending
+        return True
@@ -2,10 +2,11 @@
 Strategy Engine - Signal generation with real indicators
 """
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
-import numpy as np
+
+from .reasons import Reason, describe
 
 class SignalType(Enum):
     LONG = "long"
@@ -22,14 +23,31 @@ class Signal:
     stop_loss: float
     take_profit: float
     timestamp: str
+    reason_codes: int = 0                                         # Reason bitmask (see reasons.py)
+    features: Dict[str, float] = field(default_factory=dict)      # Indicator values behind the codes
 
 class StrategyEngine:
     def __init__(self, config: dict):
         self.config = config
         self.entry_config = config.get("entry", {})
         self.risk_config = config.get("risk", {})
+    
+    def update_params(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Swap in new entry parameters between ticks; returns the ones that changed"""
+        changed = {k: v for k, v in entry.items() if self.entry_config.get(k) != v}
+        if changed:
+            # One reference assignment: analyze() never sees a half-updated dict
+            self.entry_config = {**self.entry_config, **changed}
+        return changed
+    
+    async def analyze_async(self, data: Dict[str, Any]) -> Optional[Signal]:
+        """analyze() for the event loop; engines that wait on workers override it to await instead"""
+        return self.analyze(data)
         
     def analyze(self, data: Dict[str, Any]) -> Optional[Signal]:
+        if data.get("stale"):
+            return None  # Never trade on old data
+        
         candles = data.get("candles", [])
         if len(candles) < 20:
             return None
@@ -38,12 +56,14 @@ class StrategyEngine:
         volumes = [float(c.get('v', c.get('volume', 0))) for c in candles]
         
         # Calculate indicators
-        rsi = self._calculate_rsi(closes)
+        rsi = self._calculate_rsi(closes, self.entry_config.get("rsi_period", 14))
         sma_fast, sma_slow = self._calculate_sma(closes)
-        volume_spike = self._check_volume_spike(volumes)
+        volume_ratio = self._volume_ratio(volumes)
+        volume_spike = volume_ratio > self.entry_config.get("volume_spike_threshold", 1.5)
         
         # Generate score
-        score = self._combine_signals(rsi, sma_fast, sma_slow, volume_spike)
+        raw_score = self._combine_signals(rsi, sma_fast, sma_slow, volume_spike)
+        score = self._apply_orderbook(raw_score, data.get("orderbook"))
         
         threshold = self.entry_config.get("min_confidence", 0.5)
         if abs(score) < threshold:
@@ -51,21 +71,33 @@ class StrategyEngine:
         
         signal_type = SignalType.LONG if score > 0 else SignalType.SHORT
         price = float(data.get("price", closes[-1]))
+        codes = self._reason_codes(rsi, sma_fast, sma_slow, volume_spike, score != raw_score)
+        features = {
+            "rsi": float(rsi),
+            "ma_spread": float((sma_fast - sma_slow) / sma_slow) if sma_slow else 0.0,
+            "volume_ratio": float(volume_ratio),
+            "score": float(score),
+        }
+        if data.get("orderbook"):
+            features["imbalance"] = float(data["orderbook"]["imbalance"])
         
         return Signal(
             type=signal_type,
             confidence=min(abs(score), 1.0),
-            reason=self._generate_reason(rsi, sma_fast > sma_slow, volume_spike, score),
+            reason=describe(codes, features),
             entry_price=price,
             stop_loss=self._calculate_stop_loss(price, signal_type),
             take_profit=self._calculate_take_profit(price, signal_type),
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now().isoformat(),
+            reason_codes=codes,
+            features=features
         )
     
     def _calculate_rsi(self, closes: List[float], period: int = 14) -> float:
         if len(closes) < period + 1:
             return 50.0
         
+        import numpy as np  # Deferred: keeps bot startup fast
         deltas = np.diff(closes[-period-1:])
         gains = np.where(deltas > 0, deltas, 0)
         losses = np.where(deltas < 0, -deltas, 0)
@@ -86,19 +118,23 @@ class StrategyEngine:
         if len(closes) < slow_period:
             return 0, 0
         
+        import numpy as np
         sma_fast = np.mean(closes[-fast_period:])
         sma_slow = np.mean(closes[-slow_period:])
         
         return sma_fast, sma_slow
     
-    def _check_volume_spike(self, volumes: List[float], threshold: float = 1.5) -> bool:
+    def _volume_ratio(self, volumes: List[float]) -> float:
+        """Last volume over the mean of the 19 before it (0 without enough history)"""
         if len(volumes) < 20:
-            return False
+            return 0.0
         
+        import numpy as np
         avg_volume = np.mean(volumes[-20:-1])
-        current_volume = volumes[-1]
-        
-        return current_volume > avg_volume * threshold
+        return volumes[-1] / avg_volume if avg_volume > 0 else 0.0
+    
+    def _check_volume_spike(self, volumes: List[float], threshold: float = 1.5) -> bool:
+        return self._volume_ratio(volumes) > threshold
     
     def _combine_signals(self, rsi: float, sma_fast: float, sma_slow: float, volume_spike: bool) -> float:
         score = 0.0
@@ -123,24 +159,33 @@ class StrategyEngine:
         
         return max(-1, min(1, score))
     
-    def _generate_reason(self, rsi: float, ma_bullish: bool, volume_spike: bool, score: float) -> str:
-        reasons = []
-        
-        if rsi < 30:
-            reasons.append(f"RSI oversold ({rsi:.1f})")
-        elif rsi > 70:
-            reasons.append(f"RSI overbought ({rsi:.1f})")
+    def _apply_orderbook(self, score: float, book: Optional[Dict[str, float]]) -> float:
+        """Tilt the score by L2 imbalance (scalping); off unless entry.orderbook_weight is set"""
+        weight = self.entry_config.get("orderbook_weight", 0)
+        if not weight or not book:
+            return score
+        max_spread = self.entry_config.get("max_spread_bps", 5)
+        if book["spread_bps"] > max_spread:
+            return 0.0  # Too wide to scalp
+        return max(-1, min(1, score + weight * book["imbalance"]))
+    
+    def _reason_codes(self, rsi: float, sma_fast: float, sma_slow: float, volume_spike: bool,
+                      book_tilt: bool) -> int:
+        # Same RSI bands as _combine_signals, so the codes name what actually moved the score
+        if rsi < self.entry_config.get("rsi_oversold", 30):
+            codes = Reason.RSI_OVERSOLD
+        elif rsi > self.entry_config.get("rsi_overbought", 70):
+            codes = Reason.RSI_OVERBOUGHT
         else:
-            reasons.append(f"RSI neutral ({rsi:.1f})")
-        
-        reasons.append("MA bullish" if ma_bullish else "MA bearish")
+            codes = Reason.RSI_NEUTRAL
         
+        if sma_fast > 0 and sma_slow > 0:
+            codes |= Reason.MA_BULLISH if sma_fast > sma_slow else Reason.MA_BEARISH
         if volume_spike:
-            reasons.append("Volume spike")
-        
-        reasons.append(f"Score: {score:.2f}")
-        
-        return " | ".join(reasons)
+            codes |= Reason.VOLUME_SPIKE
+        if book_tilt:
+            codes |= Reason.BOOK_TILT
+        return int(codes)
     
     def _calculate_stop_loss(self, price: float, signal_type: SignalType) -> float:
         sl_pct = self.risk_config.get("stop_loss_pct", 0.02)
@@ -153,3 +198,16 @@ class StrategyEngine:
         if signal_type == SignalType.LONG:
             return price * (1 + tp_pct)
         return price * (1 - tp_pct)
+
+
+def create_engine(config: dict) -> StrategyEngine:
+    """StrategyPoolEngine when "strategy_pool.enabled" is set (sharded across processes
+    when "strategy_pool.workers" is too), else the classic engine"""
+    pool = config.get("strategy_pool", {})
+    if pool.get("enabled") and pool.get("workers"):
+        from .sharded import ShardedPoolEngine
+        return ShardedPoolEngine(config)
+    if pool.get("enabled"):
+        from .pool import StrategyPoolEngine  # Deferred: pulls in numpy
+        return StrategyPoolEngine(config)
+    return StrategyEngine(config)
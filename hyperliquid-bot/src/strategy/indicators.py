@@ -0,0 +1,219 @@
+"""
+Indicators - Vectorized indicator series with a per-tick shared cache
+"""
+from typing import Dict, Any, List, Callable, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+INDICATORS: Dict[str, Callable] = {}
+
+
+def indicator(name: str):
+    """Register an indicator function: fn(cache, timeframe, **params) -> np.ndarray"""
+    def wrap(fn):
+        INDICATORS[name] = fn
+        return fn
+    return wrap
+
+
+def _key(name: str, timeframe: str, params: Dict[str, Any]) -> Tuple:
+    return (name, timeframe, tuple(sorted(params.items())))
+
+
+class IndicatorCache:
+    """Computes each (indicator, params, timeframe) at most once per tick.
+
+    Create one per tick from ``{timeframe: candles}``. Every series is a full
+    numpy array aligned with the candles, NaN where not yet defined.
+    """
+
+    def __init__(self, candles: Dict[str, List[Dict]]):
+        self.candles = candles
+        self._series: Dict[Tuple, np.ndarray] = {}
+        self._lengths: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_arrays(cls, columns: Dict[str, Dict[str, np.ndarray]]) -> "IndicatorCache":
+        """Cache over ready-made price columns, {timeframe: {"close": array, ...}} (no candle dicts)"""
+        cache = cls({})
+        for timeframe, fields in columns.items():
+            for name, values in fields.items():
+                cache._series[_key(name, timeframe, {})] = values
+            cache._lengths[timeframe] = len(fields["close"])
+        return cache
+
+    def get(self, name: str, timeframe: str = "1m", **params) -> np.ndarray:
+        key = _key(name, timeframe, params)
+        series = self._series.get(key)
+        if series is not None:
+            self.hits += 1
+            return series
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        self.misses += 1
+        series = INDICATORS[name](self, timeframe, **params)
+        self._series[key] = series
+        return series
+
+    def last(self, name: str, timeframe: str = "1m", **params) -> float:
+        series = self.get(name, timeframe, **params)
+        return float(series[-1]) if len(series) else float("nan")
+
+    def warm(self, requirements) -> None:
+        """Precompute a list of (name, timeframe, params) requirements"""
+        for name, timeframe, params in requirements:
+            self.get(name, timeframe, **params)
+
+    def length(self, timeframe: str) -> int:
+        if timeframe in self._lengths:
+            return self._lengths[timeframe]
+        return len(self.candles.get(timeframe, []))
+
+
+# ========== Helpers ==========
+
+def _pad(values: np.ndarray, n: int) -> np.ndarray:
+    """Left-pad with NaN so the series aligns with n candles"""
+    out = np.full(n, np.nan)
+    if len(values):
+        out[n - len(values):] = values
+    return out
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean via a truncated convolution kernel (no Python loop)"""
+    n = len(x)
+    if n == 0:
+        return x.astype(float)
+    if alpha >= 1:
+        return x.astype(float)
+    k = min(n, int(np.ceil(np.log(1e-8) / np.log(1 - alpha))) + 1)
+    w = alpha * (1 - alpha) ** np.arange(k)
+    num = np.convolve(x, w)[:n]
+    den = np.convolve(np.ones(n), w)[:n]
+    return num / den
+
+
+def _rolling(x: np.ndarray, period: int, fn) -> np.ndarray:
+    if period <= 0 or len(x) < period:
+        return np.full(len(x), np.nan)
+    return _pad(fn(sliding_window_view(x, period), axis=-1), len(x))
+
+
+# ========== Price fields ==========
+
+_FIELDS = {"close": ("c", "close"), "open": ("o", "open"), "high": ("h", "high"),
+           "low": ("l", "low"), "volume": ("v", "volume")}
+
+
+def _field(name: str):
+    short, long = _FIELDS[name]
+
+    def fn(cache: IndicatorCache, timeframe: str) -> np.ndarray:
+        candles = cache.candles.get(timeframe, [])
+        return np.array([float(c.get(short, c.get(long, 0))) for c in candles], dtype=float)
+    return fn
+
+
+for _name in _FIELDS:
+    indicator(_name)(_field(_name))
+
+
+# ========== Indicators ==========
+
+@indicator("sma")
+def sma(cache: IndicatorCache, timeframe: str, period: int, source: str = "close") -> np.ndarray:
+    return _rolling(cache.get(source, timeframe), period, np.mean)
+
+
+@indicator("ema")
+def ema(cache: IndicatorCache, timeframe: str, period: int, source: str = "close") -> np.ndarray:
+    return _ewm(cache.get(source, timeframe), 2.0 / (period + 1))
+
+
+@indicator("std")
+def std(cache: IndicatorCache, timeframe: str, period: int, source: str = "close") -> np.ndarray:
+    return _rolling(cache.get(source, timeframe), period, np.std)
+
+
+@indicator("rolling_max")
+def rolling_max(cache: IndicatorCache, timeframe: str, period: int, source: str = "high") -> np.ndarray:
+    return _rolling(cache.get(source, timeframe), period, np.max)
+
+
+@indicator("rolling_min")
+def rolling_min(cache: IndicatorCache, timeframe: str, period: int, source: str = "low") -> np.ndarray:
+    return _rolling(cache.get(source, timeframe), period, np.min)
+
+
+@indicator("roc")
+def roc(cache: IndicatorCache, timeframe: str, period: int) -> np.ndarray:
+    """Rate of change in percent over `period` bars"""
+    closes = cache.get("close", timeframe)
+    if len(closes) <= period:
+        return np.full(len(closes), np.nan)
+    return _pad((closes[period:] / closes[:-period] - 1) * 100, len(closes))
+
+
+@indicator("rsi")
+def rsi(cache: IndicatorCache, timeframe: str, period: int = 14) -> np.ndarray:
+    closes = cache.get("close", timeframe)
+    if len(closes) <= period:
+        return np.full(len(closes), np.nan)
+    deltas = np.diff(closes)
+    avg_gain = _ewm(np.clip(deltas, 0, None), 1.0 / period)
+    avg_loss = _ewm(np.clip(-deltas, 0, None), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    values[:period - 1] = np.nan
+    return _pad(values, len(closes))
+
+
+@indicator("volume_ratio")
+def volume_ratio(cache: IndicatorCache, timeframe: str, period: int = 20) -> np.ndarray:
+    """Current volume relative to the average of the previous `period` bars"""
+    volumes = cache.get("volume", timeframe)
+    avg = cache.get("sma", timeframe, period=period, source="volume")
+    prev_avg = np.concatenate(([np.nan], avg[:-1])) if len(avg) else avg
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return volumes / prev_avg
+
+
+@indicator("adx")
+def adx(cache: IndicatorCache, timeframe: str, period: int = 14) -> np.ndarray:
+    high = cache.get("high", timeframe)
+    low = cache.get("low", timeframe)
+    close = cache.get("close", timeframe)
+    n = len(close)
+    if n <= period:
+        return np.full(n, np.nan)
+
+    up = high[1:] - high[:-1]
+    down = low[:-1] - low[1:]
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    tr = np.maximum.reduce([high[1:] - low[1:],
+                            np.abs(high[1:] - close[:-1]),
+                            np.abs(low[1:] - close[:-1])])
+
+    alpha = 1.0 / period
+    atr = _ewm(tr, alpha)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * _ewm(plus_dm, alpha) / atr
+        minus_di = 100 * _ewm(minus_dm, alpha) / atr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    dx = np.nan_to_num(dx)
+    values = _ewm(dx, alpha)
+    values[:period - 1] = np.nan
+    return _pad(values, n)
+
+
+@indicator("bb_width")
+def bb_width(cache: IndicatorCache, timeframe: str, period: int = 20, mult: float = 2.0) -> np.ndarray:
+    """Bollinger band width as a fraction of the middle band"""
+    mid = cache.get("sma", timeframe, period=period)
+    dev = cache.get("std", timeframe, period=period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 2 * mult * dev / mid
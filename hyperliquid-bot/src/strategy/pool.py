@@ -0,0 +1,324 @@
+"""
+Strategy Pool - Pluggable strategies weighted by market regime
+"""
+from typing import Dict, Any, Optional, List, Callable, Tuple
+from dataclasses import dataclass
+from itertools import product
+from datetime import datetime
+import numpy as np
+
+from .engine import StrategyEngine, Signal, SignalType
+from .indicators import IndicatorCache
+from .reasons import Reason, STRATEGY_REASONS
+
+# Requirement: (indicator name, timeframe, params)
+Requirement = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class StrategyType:
+    name: str
+    check: Callable[[IndicatorCache, str, Dict[str, Any]], Tuple[int, float]]
+    requires: Callable[[Dict[str, Any]], List[Tuple[str, Dict[str, Any]]]]
+    regime_affinity: str
+    defaults: Dict[str, Any]
+
+
+@dataclass
+class StrategyVariant:
+    type: StrategyType
+    timeframe: str
+    params: Dict[str, Any]
+
+    @property
+    def id(self) -> str:
+        values = "_".join(str(v) for v in self.params.values())
+        return f"{self.type.name}_{values}@{self.timeframe}"
+
+    def requirements(self) -> List[Requirement]:
+        return [(name, self.timeframe, params) for name, params in self.type.requires(self.params)]
+
+
+@dataclass
+class PoolSignal:
+    strategy: str
+    direction: int          # +1 long, -1 short
+    strength: float         # 0-1 raw strategy strength
+    weight: float           # regime affinity weight
+    confidence: float = 0.0
+
+
+@dataclass
+class Regime:
+    trend: float            # 0-100
+    range: float            # 0-100
+    adx: float
+    bb_width: float
+
+
+STRATEGY_TYPES: Dict[str, StrategyType] = {}
+
+
+def strategy(name: str, regime_affinity: str, defaults: Dict[str, Any],
+             requires: Callable[[Dict[str, Any]], List[Tuple[str, Dict[str, Any]]]]):
+    """Register a strategy check: fn(cache, timeframe, params) -> (direction, strength)"""
+    def wrap(fn):
+        STRATEGY_TYPES[name] = StrategyType(name, fn, requires, regime_affinity, defaults)
+        return fn
+    return wrap
+
+
+def _valid(*values: float) -> bool:
+    return all(np.isfinite(v) for v in values)
+
+
+# ========== Strategies ==========
+
+@strategy("momentum", "trend", {"period": 5, "threshold": 0.5},
+          lambda p: [("roc", {"period": p["period"]})])
+def momentum(cache: IndicatorCache, tf: str, p: Dict[str, Any]) -> Tuple[int, float]:
+    change = cache.last("roc", tf, period=p["period"])
+    if not _valid(change) or abs(change) < p["threshold"]:
+        return 0, 0.0
+    return int(np.sign(change)), min(1.0, abs(change) / (p["threshold"] * 2))
+
+
+@strategy("maCross", "trend", {"shortPeriod": 9, "longPeriod": 21},
+          lambda p: [("sma", {"period": p["shortPeriod"]}), ("sma", {"period": p["longPeriod"]})])
+def ma_cross(cache: IndicatorCache, tf: str, p: Dict[str, Any]) -> Tuple[int, float]:
+    fast = cache.get("sma", tf, period=p["shortPeriod"])
+    slow = cache.get("sma", tf, period=p["longPeriod"])
+    if len(fast) < 2 or not _valid(fast[-1], fast[-2], slow[-1], slow[-2]):
+        return 0, 0.0
+    now, before = fast[-1] - slow[-1], fast[-2] - slow[-2]
+    if before <= 0 < now:
+        return 1, 1.0
+    if before >= 0 > now:
+        return -1, 1.0
+    return 0, 0.0
+
+
+@strategy("supportBounce", "range", {"rsiThreshold": 35, "supportLookback": 20},
+          lambda p: [("rsi", {"period": 14}), ("rolling_min", {"period": p["supportLookback"]})])
+def support_bounce(cache: IndicatorCache, tf: str, p: Dict[str, Any]) -> Tuple[int, float]:
+    support_series = cache.get("rolling_min", tf, period=p["supportLookback"])
+    if len(support_series) < 2:
+        return 0, 0.0
+    support = support_series[-2]
+    close = cache.last("close", tf)
+    rsi = cache.last("rsi", tf, period=14)
+    if not _valid(support, close, rsi) or support <= 0:
+        return 0, 0.0
+    near_support = (close - support) / support < p.get("zone", 0.005)
+    if near_support and rsi < p["rsiThreshold"]:
+        return 1, min(1.0, 0.5 + (p["rsiThreshold"] - rsi) / p["rsiThreshold"])
+    return 0, 0.0
+
+
+@strategy("breakout", "trend", {"rangePeriod": 20, "volumeMultiple": 1.5},
+          lambda p: [("rolling_max", {"period": p["rangePeriod"]}),
+                     ("rolling_min", {"period": p["rangePeriod"]}),
+                     ("volume_ratio", {"period": p["rangePeriod"]})])
+def breakout(cache: IndicatorCache, tf: str, p: Dict[str, Any]) -> Tuple[int, float]:
+    highs = cache.get("rolling_max", tf, period=p["rangePeriod"])
+    lows = cache.get("rolling_min", tf, period=p["rangePeriod"])
+    if len(highs) < 2:
+        return 0, 0.0
+    upper, lower = highs[-2], lows[-2]
+    close = cache.last("close", tf)
+    vol = cache.last("volume_ratio", tf, period=p["rangePeriod"])
+    if not _valid(upper, lower, close, vol) or vol < p["volumeMultiple"]:
+        return 0, 0.0
+    strength = min(1.0, vol / (p["volumeMultiple"] * 2))
+    if close > upper:
+        return 1, strength
+    if close < lower:
+        return -1, strength
+    return 0, 0.0
+
+
+@strategy("rsiReversal", "range", {"oversold": 30, "overbought": 70},
+          lambda p: [("rsi", {"period": 14})])
+def rsi_reversal(cache: IndicatorCache, tf: str, p: Dict[str, Any]) -> Tuple[int, float]:
+    rsi = cache.last("rsi", tf, period=14)
+    if not _valid(rsi):
+        return 0, 0.0
+    if rsi < p["oversold"]:
+        return 1, min(1.0, (p["oversold"] - rsi) / p["oversold"] + 0.5)
+    if rsi > p["overbought"]:
+        return -1, min(1.0, (rsi - p["overbought"]) / (100 - p["overbought"]) + 0.5)
+    return 0, 0.0
+
+
+# ========== Regime ==========
+
+def regime_series(cache: IndicatorCache, timeframe: str, adx_period: int = 14,
+                  bb_period: int = 20) -> Dict[str, np.ndarray]:
+    """Trend/range scores (0-100) for every bar, computed as whole arrays"""
+    adx = cache.get("adx", timeframe, period=adx_period)
+    width = cache.get("bb_width", timeframe, period=bb_period)
+
+    # ADX 15 -> no trend, 40 -> full trend
+    adx_score = np.clip((adx - 15) / 25 * 100, 0, 100)
+
+    # Band width percentile against its own recent history
+    valid = np.isfinite(width)
+    rank = np.full(len(width), np.nan)
+    if valid.any():
+        w = width[valid]
+        order = np.argsort(np.argsort(w))
+        rank[valid] = order / max(1, len(w) - 1) * 100
+
+    trend = np.where(np.isfinite(rank), 0.7 * adx_score + 0.3 * rank, adx_score)
+    return {"trend": trend, "range": 100 - trend, "adx": adx, "bb_width": width}
+
+
+def detect_regime(cache: IndicatorCache, timeframe: str) -> Regime:
+    series = regime_series(cache, timeframe)
+    trend = series["trend"][-1] if len(series["trend"]) else np.nan
+    if not np.isfinite(trend):
+        return Regime(trend=50.0, range=50.0, adx=float("nan"), bb_width=float("nan"))
+    return Regime(trend=float(trend), range=float(100 - trend),
+                  adx=float(series["adx"][-1]), bb_width=float(series["bb_width"][-1]))
+
+
+# ========== Pool ==========
+
+def build_variants(name: str, timeframe: str, grid: Optional[Dict[str, List[Any]]] = None) -> List[StrategyVariant]:
+    """Expand a parameter grid into variants, e.g. {"threshold": [0.3, 0.5]}"""
+    stype = STRATEGY_TYPES[name]
+    grid = grid or {}
+    keys = list(grid.keys())
+    variants = []
+    for combo in product(*(grid[k] for k in keys)):
+        params = dict(stype.defaults)
+        params.update(zip(keys, combo))
+        variants.append(StrategyVariant(stype, timeframe, params))
+    return variants
+
+
+class StrategyPoolEngine(StrategyEngine):
+    """Evaluates many strategy variants per tick against one shared IndicatorCache.
+
+    Config (optional) under "strategy_pool":
+        {"regime_timeframe": "5m",
+         "strategies": [{"name": "momentum", "timeframe": "5m", "grid": {"threshold": [0.3, 0.5]}}]}
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.pool_config = config.get("strategy_pool", {})
+        self.variants = self._build_pool()
+        self.regime_timeframe = self.pool_config.get("regime_timeframe", self.variants[0].timeframe)
+        self.confluence_multiple = self.pool_config.get("confluence_multiple", 1.5)
+        self.last_regime: Optional[Regime] = None
+        self.last_signals: List[PoolSignal] = []
+
+        # Deduplicated indicator requirements across the whole pool
+        seen = {}
+        for v in self.variants:
+            for name, tf, params in v.requirements():
+                seen[(name, tf, tuple(sorted(params.items())))] = (name, tf, params)
+        self.requirements = list(seen.values())
+
+    def _build_pool(self) -> List[StrategyVariant]:
+        entries = self.pool_config.get("strategies")
+        if not entries:
+            timeframe = self.config.get("timeframes", ["1m"])[-1]
+            entries = [{"name": name, "timeframe": timeframe} for name in STRATEGY_TYPES]
+        variants = []
+        for entry in entries:
+            variants.extend(build_variants(entry["name"], entry.get("timeframe", "1m"), entry.get("grid")))
+        return variants
+
+    def analyze(self, data: Dict[str, Any]) -> Optional[Signal]:
+        if data.get("stale"):
+            return None
+        timeframes = data.get("timeframes") or {"1m": data.get("candles", [])}
+        if len(timeframes.get(self.regime_timeframe, [])) < 20:
+            return None
+
+        cache = IndicatorCache(timeframes)
+        cache.warm(self.requirements)
+        regime = detect_regime(cache, self.regime_timeframe)
+        self.last_regime = regime
+
+        signals = self.generate_signals(cache, regime)
+        self.last_signals = signals
+        closes = cache.get("close", self.regime_timeframe)
+        return self.to_signal(signals, regime, float(data.get("price") or closes[-1]))
+
+    def to_signal(self, signals: List[PoolSignal], regime: Regime, price: float) -> Optional[Signal]:
+        """Confluence of the pool's signals -> the engine's Signal (None below min_confidence)"""
+        if not signals:
+            return None
+
+        direction, confidence, agreeing = self.check_confluence(signals)
+        threshold = self.entry_config.get("min_confidence", 0.5)
+        if direction == 0 or confidence < threshold:
+            return None
+
+        signal_type = SignalType.LONG if direction > 0 else SignalType.SHORT
+        return Signal(
+            type=signal_type,
+            confidence=min(confidence, 1.0),
+            reason=self._pool_reason(regime, agreeing),
+            entry_price=price,
+            stop_loss=self._calculate_stop_loss(price, signal_type),
+            take_profit=self._calculate_take_profit(price, signal_type),
+            timestamp=datetime.now().isoformat(),
+            reason_codes=self._pool_codes(regime, agreeing),
+            features={"regime_trend": regime.trend, "adx": regime.adx, "bb_width": regime.bb_width,
+                      "score": float(confidence), "agreeing": float(len(agreeing))}
+        )
+
+    def generate_signals(self, cache: IndicatorCache, regime: Regime) -> List[PoolSignal]:
+        """Run every variant and weight by regime affinity"""
+        signals = []
+        for variant in self.variants:
+            if cache.length(variant.timeframe) < 2:
+                continue
+            direction, strength = variant.type.check(cache, variant.timeframe, variant.params)
+            if direction == 0:
+                continue
+            signals.append(self.pool_signal(variant, direction, strength, regime))
+        return signals
+
+    def pool_signal(self, variant: StrategyVariant, direction: int, strength: float,
+                    regime: Regime) -> PoolSignal:
+        """Weight a variant's raw call by how well its regime affinity fits the market"""
+        weight = (regime.trend if variant.type.regime_affinity == "trend" else regime.range) / 100
+        return PoolSignal(variant.id, direction, strength, weight, strength * weight)
+
+    def check_confluence(self, signals: List[PoolSignal]) -> Tuple[int, float, List[PoolSignal]]:
+        """Pick the dominant direction; boost when distinct strategies agree"""
+        long_side = [s for s in signals if s.direction > 0]
+        short_side = [s for s in signals if s.direction < 0]
+        long_score = max((s.confidence for s in long_side), default=0.0)
+        short_score = max((s.confidence for s in short_side), default=0.0)
+
+        if long_score == short_score:
+            return 0, 0.0, []
+        direction, side, best, other = ((1, long_side, long_score, short_score) if long_score > short_score
+                                        else (-1, short_side, short_score, long_score))
+
+        kinds = {s.strategy.split("_")[0] for s in side}
+        confidence = (best - other * 0.5)
+        if len(kinds) >= 2:
+            confidence *= self.confluence_multiple
+        return direction, confidence, sorted(side, key=lambda s: -s.confidence)
+
+    def _pool_codes(self, regime: Regime, signals: List[PoolSignal]) -> int:
+        kinds = {s.strategy.split("_")[0] for s in signals}
+        codes = Reason.REGIME_TREND if regime.trend >= 50 else Reason.REGIME_RANGE
+        for kind in kinds:
+            codes |= STRATEGY_REASONS.get(kind, 0)
+        if len(kinds) >= 2:
+            codes |= Reason.CONFLUENCE
+        return int(codes)
+
+    def _pool_reason(self, regime: Regime, signals: List[PoolSignal]) -> str:
+        reasons = [f"Regime trend {regime.trend:.0f}/range {regime.range:.0f}"]
+        reasons.extend(f"{s.strategy} ({s.confidence:.2f})" for s in signals[:3])
+        return " | ".join(reasons)
+
@@ -0,0 +1,201 @@
+"""
+Position State - Per-coin entry/exit state machine between the strategy and the executor
+"""
+import time
+import uuid
+import logging
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from .engine import Signal, SignalType
+
+log = logging.getLogger("bot")
+
+FLAT = "flat"
+ENTERING = "entering"      # Entry order in flight
+LONG = "long"
+SHORT = "short"
+EXITING = "exiting"        # Close order in flight
+
+_HELD = {SignalType.LONG: LONG, SignalType.SHORT: SHORT}
+
+
+def tick_time(data: Dict[str, Any]) -> float:
+    """Epoch seconds of a market payload (recorded time under replay, so cooldowns replay too)"""
+    try:
+        return datetime.fromisoformat(data["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def close_record(coin: str, side: str, size: float, entry: float, exit_price: float,
+                 trade_id: str = "", trigger: str = "signal") -> Dict[str, Any]:
+    """Journal row for a closed position; trade_id links it to the entry's reason codes"""
+    pnl = (1 if side == LONG else -1) * (exit_price - entry) * size
+    return {"event": "close", "trade_id": trade_id, "coin": coin, "side": side, "size": size,
+            "entry": entry, "exit": exit_price, "pnl": pnl, "result": "win" if pnl > 0 else "loss",
+            "trigger": trigger}
+
+
+@dataclass
+class CoinState:
+    state: str = FLAT
+    size: float = 0.0
+    entry_price: float = 0.0
+    since: float = 0.0                 # When the current state was entered
+    last_order: float = 0.0            # When the last order was sent (cooldown)
+    disarmed: str = ""                 # Direction that must lapse before it may be re-entered
+    pending: str = ""                  # Target state of the order in flight
+    previous: str = ""                 # State before the order in flight (rollback on failure)
+    trade_id: str = ""                 # Journal id of the open position (links its close to the entry)
+
+
+class PositionStateMachine:
+    """Only lets a signal through when it changes the desired exposure.
+
+    flat --signal--> entering --fill--> long/short
+    long/short --opposite signal beyond flip_margin, after min_hold--> exiting --fill--> flat
+
+    Signals in the direction already held are absorbed. After an exit the
+    closed direction stays disarmed until a tick arrives without a signal
+    for it (hysteresis), and no order goes out within `cooldown_seconds` of
+    the previous one. A failed order rolls the state back.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, strategy=None):
+        config = config or {}
+        self.cooldown = config.get("cooldown_seconds", 60)
+        self.min_hold = config.get("min_hold_seconds", 300)
+        self.flip_margin = config.get("flip_margin", 0.1)
+        self.strategy = strategy  # Entry threshold is read live, so hot-swapped params apply
+        self.coins: Dict[str, CoinState] = {}
+        self.suppressed = 0
+
+    @property
+    def min_confidence(self) -> float:
+        entry = getattr(self.strategy, "entry_config", None) or {}
+        return entry.get("min_confidence", 0.5)
+
+    def get(self, coin: str) -> CoinState:
+        if coin not in self.coins:
+            self.coins[coin] = CoinState()
+        return self.coins[coin]
+
+    def decide(self, signal: Optional[Signal], coin: str = "BTC", now: Optional[float] = None,
+               commit: bool = True) -> Optional[Signal]:
+        """The order to send for this tick's signal (possibly turned into a CLOSE), or None.
+
+        commit=False only asks; the pipeline filters early and commits right before executing.
+        """
+        now = time.time() if now is None else now
+        pos = self.get(coin)
+        direction = _HELD.get(signal.type) if signal else None
+        if pos.disarmed and direction != pos.disarmed:
+            pos.disarmed = ""  # The condition lapsed: that direction may fire again
+        if direction is None:
+            return None
+
+        order = None
+        if pos.state == FLAT:
+            if direction != pos.disarmed:
+                order = signal
+        elif pos.state in (LONG, SHORT) and direction != pos.state:
+            held_long_enough = now - pos.since >= self.min_hold
+            if held_long_enough and signal.confidence >= self.min_confidence + self.flip_margin:
+                order = replace(signal, type=SignalType.CLOSE)
+
+        if order is None or (pos.last_order and now - pos.last_order < self.cooldown):
+            if commit:
+                self.suppressed += 1
+            return None
+        if not commit:
+            return order
+
+        pos.pending, pos.previous = _HELD.get(order.type, FLAT), pos.state
+        pos.state = ENTERING if order.type != SignalType.CLOSE else EXITING
+        pos.last_order = now
+        return order
+
+    def on_result(self, order: Signal, result: Optional[Dict[str, Any]], coin: str = "BTC",
+                  now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Apply the executor's answer to an order returned by decide(); returns the close record if it closed"""
+        now = time.time() if now is None else now
+        pos = self.get(coin)
+        if pos.state not in (ENTERING, EXITING):
+            return None
+        previous, closed = pos.previous, pos.state == EXITING
+        if not result:
+            # Nothing changed on the exchange: back to what we held before the order
+            pos.state, pos.pending, pos.previous = previous, "", ""
+            return None
+        pos.state, pos.pending, pos.previous, pos.since = pos.pending, "", "", now
+        if closed:
+            # A close without a reported fill price: the signal's price stands in
+            record = close_record(coin, previous, pos.size, pos.entry_price,
+                                  float(result.get("price") or order.entry_price), pos.trade_id)
+            pos.size, pos.entry_price, pos.disarmed, pos.trade_id = 0.0, 0.0, previous, ""
+            log.info(f"{coin} position closed ({previous} -> flat)")
+            return record
+        pos.size, pos.entry_price = float(result.get("size") or 0), float(result.get("price") or 0)
+        pos.trade_id = str(result.get("order_id") or uuid.uuid4().hex[:16])
+        return None
+
+    def stopped_out(self, coin: str = "BTC", now: Optional[float] = None) -> str:
+        """A protective exit (risk/exits.py) flattened the position: treated like a filled CLOSE.
+
+        Returns the closed position's trade_id ("" if the machine did not hold it).
+        """
+        now = time.time() if now is None else now
+        pos = self.get(coin)
+        if pos.state not in (LONG, SHORT):
+            return ""
+        trade_id = pos.trade_id
+        pos.disarmed, pos.state, pos.since, pos.last_order = pos.state, FLAT, now, now
+        pos.size, pos.entry_price, pos.trade_id = 0.0, 0.0, ""
+        return trade_id
+
+    def sync(self, coin: str, size: float, entry_price: float = 0.0, now: Optional[float] = None,
+             grace: float = 0.0):
+        """Reconcile with the exchange (signed size; 0 = flat), e.g. after a manual close.
+
+        A state entered less than `grace` seconds ago is left alone: a fresh fill
+        may not show in the account state yet.
+        """
+        now = time.time() if now is None else now
+        pos = self.get(coin)
+        if pos.state in (ENTERING, EXITING) or now - pos.since < grace:
+            return
+        held = FLAT if not size else (LONG if size > 0 else SHORT)
+        if held != pos.state:
+            log.info(f"{coin} position synced from the exchange: {pos.state} -> {held}")
+            pos.state, pos.since = held, now
+            if held == FLAT:
+                pos.trade_id = ""
+        pos.size, pos.entry_price = abs(size), entry_price
+
+    def sync_account(self, asset_positions: List[Dict[str, Any]], now: Optional[float] = None,
+                     grace: float = 0.0):
+        """sync() every coin against clearinghouseState.assetPositions; coins not listed are flat"""
+        held = {}
+        for item in asset_positions:
+            p = item.get("position", item)
+            held[p["coin"]] = (float(p.get("szi") or 0), float(p.get("entryPx") or 0))
+        for coin in set(self.coins) | set(held):
+            size, entry = held.get(coin, (0.0, 0.0))
+            self.sync(coin, size, entry, now=now, grace=grace)
+
+    def status(self) -> Dict[str, Any]:
+        return {"suppressed": self.suppressed,
+                "coins": {coin: pos.__dict__.copy() for coin, pos in self.coins.items()}}
+
+    # ========== Snapshot ==========
+
+    def to_state(self) -> Dict[str, Any]:
+        # An order in flight is saved as the state it started from; restore() syncs it with the account
+        return {coin: {**pos.__dict__, "state": pos.previous if pos.state in (ENTERING, EXITING) else pos.state,
+                       "pending": "", "previous": ""}
+                for coin, pos in self.coins.items()}
+
+    def load_state(self, state: Dict[str, Any]):
+        self.coins = {coin: CoinState(**values) for coin, values in state.items()}
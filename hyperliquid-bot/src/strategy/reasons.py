@@ -0,0 +1,103 @@
+"""
+Reason Codes - Why a signal fired, as a bitmask plus the feature values behind it
+"""
+import re
+from enum import IntFlag
+from typing import Dict, Any, List
+
+
+class Reason(IntFlag):
+    # Classic engine
+    RSI_OVERSOLD = 1 << 0
+    RSI_OVERBOUGHT = 1 << 1
+    RSI_NEUTRAL = 1 << 2
+    MA_BULLISH = 1 << 3
+    MA_BEARISH = 1 << 4
+    VOLUME_SPIKE = 1 << 5
+    BOOK_TILT = 1 << 6             # Score moved by L2 imbalance
+    # Strategy pool (one bit per strategy type among the agreeing signals)
+    MOMENTUM = 1 << 8
+    MA_CROSS = 1 << 9
+    SUPPORT_BOUNCE = 1 << 10
+    BREAKOUT = 1 << 11
+    RSI_REVERSAL = 1 << 12
+    CONFLUENCE = 1 << 13           # At least two distinct strategy types agree
+    REGIME_TREND = 1 << 14
+    REGIME_RANGE = 1 << 15
+
+
+# Pool strategy type name -> its bit
+STRATEGY_REASONS = {
+    "momentum": Reason.MOMENTUM,
+    "maCross": Reason.MA_CROSS,
+    "supportBounce": Reason.SUPPORT_BOUNCE,
+    "breakout": Reason.BREAKOUT,
+    "rsiReversal": Reason.RSI_REVERSAL,
+}
+
+_LABELS = {
+    Reason.RSI_OVERSOLD: "RSI oversold",
+    Reason.RSI_OVERBOUGHT: "RSI overbought",
+    Reason.RSI_NEUTRAL: "RSI neutral",
+    Reason.MA_BULLISH: "MA bullish",
+    Reason.MA_BEARISH: "MA bearish",
+    Reason.VOLUME_SPIKE: "Volume spike",
+    Reason.BOOK_TILT: "Book tilt",
+    Reason.CONFLUENCE: "Confluence",
+    Reason.REGIME_TREND: "Trend regime",
+    Reason.REGIME_RANGE: "Range regime",
+}
+_LABELS.update({flag: name for name, flag in STRATEGY_REASONS.items()})
+
+
+def names(codes: int) -> List[str]:
+    """Flag names set in `codes`, lowest bit first (stable keys for attribution)"""
+    return [flag.name for flag in Reason if codes & flag]
+
+
+def describe(codes: int, features: Dict[str, float]) -> str:
+    """Human-readable reason for logs and trades.md, rendered from the codes"""
+    parts = []
+    for flag in Reason:
+        if not codes & flag:
+            continue
+        label = _LABELS[flag]
+        if flag in (Reason.RSI_OVERSOLD, Reason.RSI_OVERBOUGHT, Reason.RSI_NEUTRAL) and "rsi" in features:
+            label += f" ({features['rsi']:.1f})"
+        elif flag == Reason.VOLUME_SPIKE and "volume_ratio" in features:
+            label += f" ({features['volume_ratio']:.1f}x)"
+        parts.append(label)
+    if "score" in features:
+        parts.append(f"Score: {features['score']:.2f}")
+    return " | ".join(parts)
+
+
+_PATTERNS = [(re.compile(pattern, re.IGNORECASE), flag) for pattern, flag in [
+    (r"RSI oversold", Reason.RSI_OVERSOLD),
+    (r"RSI overbought", Reason.RSI_OVERBOUGHT),
+    (r"RSI neutral", Reason.RSI_NEUTRAL),
+    (r"MA bullish", Reason.MA_BULLISH),
+    (r"MA bearish", Reason.MA_BEARISH),
+    (r"Volume spike", Reason.VOLUME_SPIKE),
+    (r"Book tilt", Reason.BOOK_TILT),
+    (r"Confluence", Reason.CONFLUENCE),
+]] + [(re.compile(rf"\b{name}(_|\b)"), flag) for name, flag in STRATEGY_REASONS.items()]
+
+
+def parse_reason(text: str) -> int:
+    """Best-effort codes for a legacy free-text reason (trades journaled before reason codes)"""
+    text = text or ""
+    codes = 0
+    for pattern, flag in _PATTERNS:
+        if pattern.search(text):
+            codes |= flag
+    regime = re.search(r"Regime trend (\d+)", text)  # Pool: "Regime trend 62/range 38"
+    if regime:
+        codes |= Reason.REGIME_TREND if int(regime.group(1)) >= 50 else Reason.REGIME_RANGE
+    return codes
+
+
+def trade_codes(trade: Dict[str, Any]) -> int:
+    """A journaled trade's codes, falling back to parsing its reason text"""
+    codes = trade.get("reason_codes")
+    return int(codes) if codes is not None else parse_reason(trade.get("reason", ""))
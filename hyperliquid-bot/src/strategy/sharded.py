@@ -0,0 +1,319 @@
+"""
+Sharded Pool - Strategy variants evaluated across worker processes over shared-memory candles
+"""
+import os
+import math
+import asyncio
+import logging
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
+
+from .engine import Signal
+from .indicators import IndicatorCache
+from .pool import StrategyPoolEngine, Regime, detect_regime
+
+log = logging.getLogger("bot")
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_SHORT = {"open": "o", "high": "h", "low": "l", "close": "c", "volume": "v"}
+
+# What a worker sends back per variant that fired: 13 bytes, no Signal objects
+RECORD = np.dtype([("variant", "<i4"), ("direction", "i1"), ("strength", "<f8")])
+
+
+class CandleBoard:
+    """Price columns for every (coin, timeframe) in one shared-memory block.
+
+    Layout: int64 generations[2], int64 lengths[2][slots], then
+    float64 bars[2][slots][field][capacity]. There are two buffers, alternated
+    per tick. A running worker can't be cancelled, so a late one may still be
+    reading a buffer when it is rewritten two ticks later: each buffer is
+    stamped with its tick before being written, and a worker whose stamp
+    changed under it gives up (its result would be dropped anyway).
+    """
+
+    def __init__(self, coins: List[str], timeframes: List[str], capacity: int = 1024,
+                 name: Optional[str] = None):
+        self.coins, self.timeframes, self.capacity = list(coins), list(timeframes), capacity
+        self.slots = {(coin, tf): i for i, (coin, tf) in
+                      enumerate((c, t) for c in self.coins for t in self.timeframes)}
+        n = len(self.slots)
+        size = 8 * 2 + 8 * 2 * n + 8 * 2 * n * len(FIELDS) * capacity
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.generations = np.ndarray((2,), dtype=np.int64, buffer=self.shm.buf)
+        self.lengths = np.ndarray((2, n), dtype=np.int64, buffer=self.shm.buf, offset=self.generations.nbytes)
+        self.bars = np.ndarray((2, n, len(FIELDS), capacity), dtype=np.float64, buffer=self.shm.buf,
+                               offset=self.generations.nbytes + self.lengths.nbytes)
+
+    @property
+    def spec(self) -> Tuple[List[str], List[str], int, str]:
+        """Arguments to attach to the same block from another process"""
+        return self.coins, self.timeframes, self.capacity, self.shm.name
+
+    def stamp(self, buffer: int, tick: int):
+        """Claim `buffer` for `tick`, before anything in it is overwritten"""
+        self.generations[buffer] = tick
+
+    def current(self, buffer: int, tick: int) -> bool:
+        """Whether `buffer` still holds the data of `tick`"""
+        return int(self.generations[buffer]) == tick
+
+    def write(self, buffer: int, coin: str, timeframes: Dict[str, List[Dict]]):
+        for tf in self.timeframes:
+            slot = self.slots[(coin, tf)]
+            candles = timeframes.get(tf, [])[-self.capacity:]
+            for i, field in enumerate(FIELDS):
+                short = _SHORT[field]
+                self.bars[buffer, slot, i, :len(candles)] = [float(c.get(short, c.get(field, 0))) for c in candles]
+            self.lengths[buffer, slot] = len(candles)
+
+    def columns(self, buffer: int, coin: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """Views (no copies) for IndicatorCache.from_arrays"""
+        columns = {}
+        for tf in self.timeframes:
+            slot = self.slots[(coin, tf)]
+            n = int(self.lengths[buffer, slot])
+            columns[tf] = {field: self.bars[buffer, slot, i, :n] for i, field in enumerate(FIELDS)}
+        return columns
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed
+        self.generations = self.lengths = self.bars = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ========== Worker side ==========
+
+_board: Optional[CandleBoard] = None
+_engine: Optional[StrategyPoolEngine] = None
+_requirements: Dict[Tuple[int, int], list] = {}
+
+
+def _init_worker(spec: Tuple, config: dict):
+    global _board, _engine
+    _board = CandleBoard(*spec[:3], name=spec[3])
+    _engine = StrategyPoolEngine(config)  # Same config -> same variants in the same order
+
+
+def _evaluate(tick: int, buffer: int, coin: str, start: int, stop: int,
+              with_regime: bool) -> Tuple[int, str, np.ndarray, Optional[Tuple[float, float, float]]]:
+    """Run variants[start:stop] for one coin; returns the ones that fired as RECORD rows.
+
+    Gives up with no rows as soon as the buffer is re-stamped for a newer tick.
+    """
+    variants = _engine.variants[start:stop]
+    records = np.zeros(len(variants), dtype=RECORD)
+    if not _board.current(buffer, tick):
+        return tick, coin, records[:0], None
+    cache = IndicatorCache.from_arrays(_board.columns(buffer, coin))
+    if (start, stop) not in _requirements:
+        seen = {}
+        for v in variants:
+            for name, tf, params in v.requirements():
+                seen[(name, tf, tuple(sorted(params.items())))] = (name, tf, params)
+        _requirements[(start, stop)] = list(seen.values())
+    cache.warm(_requirements[(start, stop)])
+
+    n = 0
+    for i, variant in enumerate(variants, start):
+        if not _board.current(buffer, tick):
+            return tick, coin, records[:0], None
+        if cache.length(variant.timeframe) < 2:
+            continue
+        direction, strength = variant.type.check(cache, variant.timeframe, variant.params)
+        if direction:
+            records[n] = (i, direction, strength)
+            n += 1
+    regime = None
+    if with_regime:
+        r = detect_regime(cache, _engine.regime_timeframe)
+        regime = (r.trend, r.adx, r.bb_width)
+    if not _board.current(buffer, tick):
+        return tick, coin, records[:0], None
+    return tick, coin, records[:n], regime
+
+
+# ========== Engine ==========
+
+class ShardedPoolEngine(StrategyPoolEngine):
+    """StrategyPoolEngine whose (coin, variant chunk) work runs on a persistent process pool.
+
+    Each tick the candles are written once into shared memory, and workers
+    build their indicator caches straight from those arrays. Anything not back
+    within `deadline_ms` is dropped: a late chunk loses its variants for that
+    tick, and a coin whose regime chunk is late gets no signal. The caller
+    waits at most that long, however many variants there are; on the event
+    loop use analyze_async(), which awaits the workers instead of blocking.
+
+    Config under "strategy_pool" (besides the pool's own):
+        {"workers": 4, "deadline_ms": 1000, "coins": ["BTC", "ETH"], "max_bars": 1024}
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.workers = self.pool_config.get("workers") or max(1, (os.cpu_count() or 2) - 1)
+        self.deadline = self.pool_config.get("deadline_ms", 1000) / 1000
+        self.coins = self.pool_config.get("coins") or [config.get("pair", "BTC-PERP").split("-")[0]]
+        timeframes = sorted({v.timeframe for v in self.variants} | {self.regime_timeframe})
+        self.board = CandleBoard(self.coins, timeframes, self.pool_config.get("max_bars", 1024))
+
+        # Enough chunks per coin to keep every worker busy, regime on chunk 0
+        per_coin = min(len(self.variants), max(1, math.ceil(self.workers * 2 / len(self.coins))))
+        bounds = np.linspace(0, len(self.variants), per_coin + 1).astype(int)
+        self.chunks = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.tick = 0
+        self.late = 0
+        self.last_signals_by_coin: Dict[str, list] = {}
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Started on first use so that building the engine (replay, tools) spawns nothing
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                             initargs=(self.board.spec, self.config))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self.board.close()
+
+    def analyze(self, data: Dict[str, Any]) -> Optional[Signal]:
+        coin = data.get("coin", self.coins[0])
+        return self.evaluate({coin: data}).get(coin)
+
+    async def analyze_async(self, data: Dict[str, Any]) -> Optional[Signal]:
+        coin = data.get("coin", self.coins[0])
+        return (await self.evaluate_async({coin: data})).get(coin)
+
+    def evaluate(self, markets: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[Signal]]:
+        """One tick for several coins ({coin: market data}) -> {coin: Signal or None}"""
+        prices, futures = self._submit(markets)
+        if not futures:
+            return {coin: None for coin in markets}
+        done, late = wait(futures, timeout=self.deadline)
+        return self._collect(markets, prices, futures, done, late)
+
+    async def evaluate_async(self, markets: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[Signal]]:
+        """evaluate() without blocking the event loop while the workers run"""
+        prices, futures = self._submit(markets)
+        if not futures:
+            return {coin: None for coin in markets}
+        waiting = {asyncio.wrap_future(f): f for f in futures}
+        done, late = await asyncio.wait(waiting, timeout=self.deadline)
+        for future in late:
+            future.cancel()  # Cancels the pool future too, if it hasn't started
+        return self._collect(markets, prices, futures, {waiting[f] for f in done}, {waiting[f] for f in late})
+
+    def _submit(self, markets: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, float], list]:
+        """Write this tick's candles and queue its chunks; no futures when nothing is tradeable"""
+        self.tick += 1
+        buffer = self.tick % 2
+        self.board.stamp(buffer, self.tick)
+        prices: Dict[str, float] = {}
+        for coin, data in markets.items():
+            timeframes = data.get("timeframes") or {"1m": data.get("candles", [])}
+            if data.get("stale") or coin not in self.coins or len(timeframes.get(self.regime_timeframe, [])) < 20:
+                continue
+            self.board.write(buffer, coin, timeframes)
+            closes = timeframes[self.regime_timeframe]
+            prices[coin] = float(data.get("price") or closes[-1].get("c", closes[-1].get("close", 0)))
+        if not prices:
+            return prices, []
+
+        pool = self._ensure_pool()
+        try:
+            return prices, [pool.submit(_evaluate, self.tick, buffer, coin, start, stop, k == 0)
+                            for coin in prices for k, (start, stop) in enumerate(self.chunks)]
+        except BrokenProcessPool as e:
+            log.error(f"Strategy workers died, restarting next tick: {e}")
+            self._pool = None
+            return prices, []
+
+    def _collect(self, markets: Dict[str, Dict[str, Any]], prices: Dict[str, float],
+                 futures: list, done: set, late: set) -> Dict[str, Optional[Signal]]:
+        results: Dict[str, Optional[Signal]] = {coin: None for coin in markets}
+        for future in late:
+            future.cancel()
+        if late:
+            self.late += len(late)
+            log.warning(f"Strategy deadline: {len(late)}/{len(futures)} shards late, dropped")
+
+        records: Dict[str, List[np.ndarray]] = {coin: [] for coin in prices}
+        regimes: Dict[str, Regime] = {}
+        for future in done:
+            if future.exception():
+                log.error(f"Strategy shard failed: {future.exception()}")
+                continue
+            tick, coin, rows, regime = future.result()
+            if tick != self.tick:
+                continue
+            records[coin].append(rows)
+            if regime:
+                trend, adx, width = regime
+                regimes[coin] = Regime(trend=trend, range=100 - trend, adx=adx, bb_width=width)
+
+        for coin, regime in regimes.items():
+            rows = np.concatenate(records[coin])
+            signals = [self.pool_signal(self.variants[r["variant"]], int(r["direction"]), float(r["strength"]), regime)
+                       for r in rows]
+            self.last_signals_by_coin[coin] = signals
+            self.last_regime, self.last_signals = regime, signals
+            results[coin] = self.to_signal(signals, regime, prices[coin])
+        return results
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare in-process and sharded evaluation on synthetic candles")
+    parser.add_argument("--coins", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--bars", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    coins = [f"C{i}" for i in range(args.coins)]
+    markets = {}
+    for coin in coins:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, args.bars)))
+        candles = [{"o": c, "h": c * 1.001, "l": c * 0.999, "c": c, "v": float(v)}
+                   for c, v in zip(close, rng.lognormal(0, 0.5, args.bars))]
+        markets[coin] = {"coin": coin, "price": float(close[-1]), "timestamp": datetime.now().isoformat(),
+                         "timeframes": {"5m": candles}}
+    grid = {"momentum": {"threshold": [0.1, 0.2, 0.3, 0.5]}, "breakout": {"volumeMultiple": [1.0, 1.5, 2.0]},
+            "rsiReversal": {"oversold": [25, 30, 35]}, "maCross": {"shortPeriod": [5, 9, 12]},
+            "supportBounce": {"rsiThreshold": [30, 35, 40]}}
+    config = {"entry": {"min_confidence": 0.1}, "strategy_pool": {
+        "enabled": True, "regime_timeframe": "5m", "coins": coins, "workers": args.workers,
+        "deadline_ms": 60000, "strategies": [{"name": n, "timeframe": "5m", "grid": g} for n, g in grid.items()]}}
+
+    serial = StrategyPoolEngine(config)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        expected = {coin: serial.analyze(data) for coin, data in markets.items()}
+    serial_ms = (time.perf_counter() - start) / args.ticks * 1000
+
+    sharded = ShardedPoolEngine(config)
+    sharded.evaluate(markets)  # Spawn and warm the workers
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        got = sharded.evaluate(markets)
+    sharded_ms = (time.perf_counter() - start) / args.ticks * 1000
+    sharded.close()
+
+    same = all((expected[c] and expected[c].type, expected[c] and expected[c].confidence)
+               == (got[c] and got[c].type, got[c] and got[c].confidence) for c in coins)
+    print(f"{len(coins)} coins x {len(serial.variants)} variants: in-process {serial_ms:.1f}ms/tick, "
+          f"{args.workers} workers {sharded_ms:.1f}ms/tick ({serial_ms / sharded_ms:.1f}x), "
+          f"same signals: {same}")